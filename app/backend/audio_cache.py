@@ -0,0 +1,323 @@
+"""
+Storage for generated audio
+Synthesized audio is content-addressed: the same voice audio, text, language
+and model always map to the same WAV, so repeated requests are served from
+disk without running inference. Files are sharded by id prefix and a
+background janitor enforces a TTL and a disk quota, sparing pinned audio.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+AUDIO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+# Temporary files older than this are leftovers of interrupted writes
+STALE_TMP_SECONDS = 3600
+
+# Share of the disk budget pinned entries can hold, the most recently used first; older pinned
+# entries are evicted like any other once pins alone would fill it
+PINNED_SHARE = 0.5
+
+
+def normalize_text(text):
+    """Normalize text so trivially different inputs share a cache entry"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def shard_path(base_dir, audio_id, extension):
+    """<base_dir>/<first two characters of the id>/<id>.<extension>"""
+    return Path(base_dir) / audio_id[:2] / f"{audio_id}.{extension}"
+
+
+def list_files(directory):
+    """(mtime, size, path) of every file below directory"""
+    files = []
+    for path in Path(directory).rglob('*'):
+        try:
+            if path.is_file():
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            pass
+    return files
+
+
+def remove_stale_files(directory, max_age, pattern='*'):
+    """Delete files below directory matching pattern that were not modified for max_age seconds"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in Path(directory).rglob(pattern):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class AudioCache:
+    """
+    LRU store of generated WAV files with a disk quota and an optional TTL.
+
+    Entries are stored as <id[:2]>/<id>.wav in cache_dir. Synthesized audio uses a
+    sha256 of its inputs as id, other generated audio (e.g. voice transformations)
+    may use any id matching AUDIO_ID_PATTERN. The id is what /api/audio/<id> serves.
+
+    Pin providers are callables returning ids that must survive eviction
+    (chunks of retained jobs, previews of unsaved voices, ...). They are only
+    asked when something is to be evicted, and pins hold at most PINNED_SHARE
+    of the budget. Files derived from entries (encoded copies, audiobooks) count
+    toward the budget as measured by the last janitor pass.
+    """
+
+    def __init__(self, cache_dir, max_bytes, ttl_seconds=0, on_evict=None):
+        self.cache_dir = Path(cache_dir)
+        self.on_evict = on_evict  # called with the key of every evicted entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds  # 0 keeps entries until the quota needs the space
+        self.entries = OrderedDict()  # key -> (size in bytes, last access time), least recently used first
+        self.total_bytes = 0
+        self.derived_bytes = 0  # files derived from entries, measured by sweep
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.voice_hashes = {}
+        self.pin_providers = []
+        self.janitor = None
+        self.lock = threading.Lock()
+        self._scan()
+
+    def _scan(self):
+        """Load existing entries, oldest access first, moving files of the old flat layout into shards"""
+        shards = [d for d in self.cache_dir.iterdir() if d.is_dir() and len(d.name) == 2]
+        files = []
+        for path in [*self.cache_dir.glob('*.wav'), *(p for d in shards for p in d.glob('*.wav'))]:
+            if not AUDIO_ID_PATTERN.match(path.stem):
+                continue  # temporary files of interrupted writes
+            sharded = self.path_for(path.stem)
+            if path != sharded:
+                sharded.parent.mkdir(exist_ok=True)
+                os.replace(path, sharded)
+            stat = sharded.stat()
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for mtime, key, size in sorted(files):
+            self.entries[key] = (size, mtime)
+            self.total_bytes += size
+
+    def voice_hash(self, audio_path):
+        """sha256 of a voice's audio file (or of the hashes of a list of samples), memoized until a file changes"""
+        if isinstance(audio_path, (list, tuple)):
+            return hashlib.sha256(' '.join(self.voice_hash(path) for path in audio_path).encode('ascii')).hexdigest()
+        stat = os.stat(audio_path)
+        memo_key = (str(audio_path), stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            digest = self.voice_hashes.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(audio_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self.lock:
+                self.voice_hashes[memo_key] = digest
+        return digest
+
+    def make_key(self, voice_audio_path, text, language, model_version):
+        """Cache key for one synthesis"""
+        parts = [self.voice_hash(voice_audio_path), normalize_text(text), language, model_version]
+        return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return shard_path(self.cache_dir, key, 'wav')
+
+    def lookup(self, key):
+        """Return the cached file for key (and mark it recently used), or None"""
+        path = self.path_for(key)
+        with self.lock:
+            if key in self.entries and path.exists():
+                self.entries[key] = (self.entries[key][0], time.time())
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                if key in self.entries:
+                    self.total_bytes -= self.entries.pop(key)[0]
+                self.misses += 1
+                return None
+        # Persist recency so the LRU order survives restarts
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def add(self, key, source_path):
+        """Move a freshly generated file into the store and enforce the quota"""
+        if not AUDIO_ID_PATTERN.match(key):
+            raise ValueError(f"Invalid audio id: {key}")
+        path = self.path_for(key)
+        path.parent.mkdir(exist_ok=True)
+        os.replace(source_path, path)
+        size = path.stat().st_size
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[0]
+            self.entries[key] = (size, time.time())
+            self.total_bytes += size
+            over_quota = self._over_quota()
+        if over_quota:
+            self._evict(self.pinned())
+        return path
+
+    def add_pin_provider(self, provider):
+        """Register a callable returning ids that must not be evicted"""
+        self.pin_providers.append(provider)
+
+    def pinned(self):
+        keys = set()
+        for provider in self.pin_providers:
+            try:
+                keys.update(provider())
+            except Exception as e:
+                print(f"Pin provider failed: {str(e)}")
+        return keys
+
+    def _over_quota(self):
+        """Caller holds the lock"""
+        return self.total_bytes + self.derived_bytes > self.max_bytes
+
+    def _evict(self, pinned):
+        """Drop least recently used unprotected entries until under quota"""
+        victims = []
+        with self.lock:
+            # Pins are honored most recently used first, up to their share of the budget
+            protected, protected_bytes = set(), 0
+            for key, (size, _) in reversed(self.entries.items()):
+                if key in pinned and protected_bytes + size <= self.max_bytes * PINNED_SHARE:
+                    protected.add(key)
+                    protected_bytes += size
+            # Never evict the newest entry, it was just requested
+            for key, (size, _) in list(self.entries.items())[:-1]:
+                if not self._over_quota():
+                    break
+                if key not in protected:
+                    del self.entries[key]
+                    self.total_bytes -= size
+                    victims.append(key)
+            self.evictions += len(victims)
+        self._delete(victims)
+        return len(victims)
+
+    def _expire(self, pinned):
+        """Drop unpinned entries not accessed within the TTL"""
+        if not self.ttl_seconds:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        victims = []
+        with self.lock:
+            for key, (size, accessed) in list(self.entries.items()):
+                if accessed >= cutoff:
+                    break  # entries are ordered by last access
+                if key not in pinned:
+                    del self.entries[key]
+                    self.total_bytes -= size
+                    victims.append(key)
+            self.expirations += len(victims)
+        self._delete(victims)
+        return len(victims)
+
+    def _delete(self, keys):
+        for key in keys:
+            self.path_for(key).unlink(missing_ok=True)
+            if self.on_evict is not None:
+                self.on_evict(key)
+
+    def sweep(self, derived_dirs=()):
+        """
+        One janitor pass: expire entries past the TTL, enforce the quota and
+        delete temporary files left behind by interrupted writes.
+
+        Args:
+            derived_dirs: Directories of files derived from entries (encoded copies,
+                assembled audiobooks) that are deleted once older than the TTL
+        """
+        stale = remove_stale_files(self.cache_dir, STALE_TMP_SECONDS, '*.tmp*')
+        if self.ttl_seconds:
+            for directory in derived_dirs:
+                stale += remove_stale_files(directory, self.ttl_seconds)
+        derived = sorted(entry for directory in derived_dirs for entry in list_files(directory))
+        with self.lock:
+            self.derived_bytes = sum(size for _, size, _ in derived)
+
+        # Pins are only worth collecting when an entry is past the TTL or the budget is exceeded
+        pinned = self.pinned() if self._pins_needed() else set()
+        expired = self._expire(pinned)
+        evicted = self._evict(pinned)
+
+        # Derived files left over the budget once entries are evicted go oldest first
+        for _, size, path in derived:
+            with self.lock:
+                if not self._over_quota():
+                    break
+                self.derived_bytes -= size
+            path.unlink(missing_ok=True)
+            evicted += 1
+        return {'expired': expired, 'evicted': evicted, 'stale_files': stale}
+
+    def _pins_needed(self):
+        with self.lock:
+            if self._over_quota():
+                return True
+            if not self.ttl_seconds or not self.entries:
+                return False
+            # Entries are ordered by last access, the first is the oldest
+            return next(iter(self.entries.values()))[1] < time.time() - self.ttl_seconds
+
+    def start_janitor(self, interval, derived_dirs=(), before_sweep=None):
+        """
+        Run sweep every interval seconds on a daemon thread
+
+        Args:
+            before_sweep: {name: callable} of other expiry run first on each pass (e.g. old jobs,
+                whose chunks are no longer pinned then), each returning a count for the log
+        """
+        if self.janitor is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    result = {name: expire() for name, expire in (before_sweep or {}).items()}
+                    result.update(self.sweep(derived_dirs))
+                    if any(result.values()):
+                        print(f"Output janitor: {result}")
+                except Exception as e:
+                    print(f"Output janitor failed: {str(e)}")
+
+        self.janitor = threading.Thread(target=run, name='output-janitor', daemon=True)
+        self.janitor.start()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'derived_bytes': self.derived_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
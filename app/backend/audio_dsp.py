@@ -0,0 +1,138 @@
+"""
+In-process post-processing of synthesized speech
+Time-stretching, pitch shifting, resampling and loudness normalization of the
+model's float waveform with vectorized numpy, so effects are applied in memory
+before the audio is written once (no ffmpeg process or intermediate files).
+"""
+import numpy as np
+
+# Phase vocoder STFT: 1024 samples (~43 ms at 24 kHz) with 75% overlap
+FFT_SIZE = 1024
+HOP = FFT_SIZE // 4
+
+# Loudness measurement blocks (as in ITU-R BS.1770: 400 ms, 75% overlap, -70 dB absolute
+# and -10 dB relative gates), measured on the unweighted signal
+LOUDNESS_BLOCK_SECONDS = 0.4
+ABSOLUTE_GATE_DB = -70.0
+RELATIVE_GATE_DB = -10.0
+
+SPEED_RANGE = (0.5, 2.0)
+PITCH_RANGE = (0.5, 2.0)
+
+
+def _frames(wav, size, hop):
+    """Overlapping frames of wav as a (frames, size) view"""
+    return np.lib.stride_tricks.sliding_window_view(wav, size)[::hop]
+
+
+def stft(wav):
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    padded = np.pad(wav, (FFT_SIZE // 2, FFT_SIZE // 2 + HOP))
+    return np.fft.rfft(_frames(padded, FFT_SIZE, HOP) * window, axis=1)
+
+
+def istft(spectrum, length):
+    """Weighted overlap-add of the inverse STFT, trimmed to length samples"""
+    window = np.hanning(FFT_SIZE).astype(np.float32)
+    frames = np.fft.irfft(spectrum, n=FFT_SIZE, axis=1) * window
+    positions = (np.arange(len(frames))[:, None] * HOP + np.arange(FFT_SIZE)).ravel()
+    size = positions[-1] + 1
+    wav = np.bincount(positions, weights=frames.ravel(), minlength=size)
+    norm = np.bincount(positions, weights=np.tile(window ** 2, len(frames)), minlength=size)
+    wav = wav / np.maximum(norm, 1e-8)
+    return wav[FFT_SIZE // 2:FFT_SIZE // 2 + length].astype(np.float32)
+
+
+def time_stretch(wav, rate):
+    """
+    Change the tempo by rate (2.0 = twice as fast) without changing the pitch (phase vocoder)
+    """
+    if rate == 1.0 or len(wav) == 0:
+        return wav
+    spectrum = stft(wav)
+    spectrum = np.vstack([spectrum, np.zeros((1, spectrum.shape[1]), dtype=spectrum.dtype)])
+    steps = np.arange(0, len(spectrum) - 1, rate)
+    left = steps.astype(int)
+    alpha = (steps - left)[:, None]
+
+    magnitude = (1 - alpha) * np.abs(spectrum[left]) + alpha * np.abs(spectrum[left + 1])
+    # Phase advance per hop: the bin frequency plus the measured deviation from it
+    expected = 2 * np.pi * HOP * np.arange(spectrum.shape[1]) / FFT_SIZE
+    deviation = np.angle(spectrum[left + 1]) - np.angle(spectrum[left]) - expected
+    deviation -= 2 * np.pi * np.round(deviation / (2 * np.pi))
+    advance = expected + deviation
+    phase = np.angle(spectrum[0]) + np.vstack([np.zeros((1, advance.shape[1])), np.cumsum(advance[:-1], axis=0)])
+
+    return istft(magnitude * np.exp(1j * phase), int(round(len(wav) / rate)))
+
+
+def resample_to_length(wav, length):
+    """Band-limited (FFT) resampling of a clip to exactly length samples. Clips start and end in silence."""
+    if length == len(wav) or len(wav) == 0:
+        return wav
+    spectrum = np.fft.rfft(wav)
+    bins = length // 2 + 1
+    resized = np.zeros(bins, dtype=spectrum.dtype)
+    keep = min(bins, len(spectrum))
+    resized[:keep] = spectrum[:keep]
+    return (np.fft.irfft(resized, n=length) * (length / len(wav))).astype(np.float32)
+
+
+def resample(wav, orig_rate, target_rate):
+    return resample_to_length(wav, int(round(len(wav) * target_rate / orig_rate)))
+
+
+def loudness_db(wav, sample_rate):
+    """Gated mean power of wav in dB relative to full scale, or None for silence"""
+    block = int(LOUDNESS_BLOCK_SECONDS * sample_rate)
+    if len(wav) < block:
+        powers = np.array([np.mean(wav ** 2)]) if len(wav) else np.zeros(0)
+    else:
+        energy = np.concatenate([[0.0], np.cumsum(wav.astype(np.float64) ** 2)])
+        starts = np.arange(0, len(wav) - block + 1, block // 4)
+        powers = (energy[starts + block] - energy[starts]) / block
+    powers = powers[powers > 10 ** (ABSOLUTE_GATE_DB / 10)]
+    if len(powers) == 0:
+        return None
+    powers = powers[powers > np.mean(powers) * 10 ** (RELATIVE_GATE_DB / 10)]
+    return float(10 * np.log10(np.mean(powers)))
+
+
+def normalize_loudness(wav, sample_rate, target_db, peak_db=-1.0):
+    """Scale wav to target_db gated loudness, with less gain if peaks would exceed peak_db"""
+    current = loudness_db(wav, sample_rate)
+    if current is None:
+        return wav
+    gain = 10 ** ((target_db - current) / 20)
+    peak = np.max(np.abs(wav))
+    if peak > 0:
+        gain = min(gain, 10 ** (peak_db / 20) / peak)
+    return (wav * gain).astype(np.float32)
+
+
+def apply_effects(wav, sample_rate, speed=1.0, pitch=1.0, output_sample_rate=None, loudness=None):
+    """
+    Post-process a synthesized waveform
+
+    Speed and pitch share one phase vocoder pass and one resampling: the clip is stretched
+    by speed / pitch and resampled by 1 / pitch (folded together with any change of sample
+    rate), which scales the pitch by pitch and the duration by 1 / speed.
+
+    Args:
+        wav: Float waveform in [-1, 1]
+        sample_rate: Sample rate of wav
+        speed: Tempo factor (2.0 = twice as fast), the pitch is kept
+        pitch: Pitch factor (2.0 = an octave up), the duration is kept
+        output_sample_rate: Sample rate of the result (None = sample_rate)
+        loudness: Target gated loudness in dBFS (None = unchanged)
+
+    Returns:
+        (processed float32 waveform, its sample rate)
+    """
+    wav = np.asarray(wav, dtype=np.float32).reshape(-1)
+    output_sample_rate = output_sample_rate or sample_rate
+    wav = time_stretch(wav, speed / pitch)
+    wav = resample_to_length(wav, int(round(len(wav) * output_sample_rate / sample_rate / pitch)))
+    if loudness is not None:
+        wav = normalize_loudness(wav, output_sample_rate, loudness)
+    return np.clip(wav, -1.0, 1.0), output_sample_rate
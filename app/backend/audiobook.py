@@ -0,0 +1,141 @@
+"""
+Audiobook assembly
+Joins the chunk WAVs of a finished job into one continuous WAV, copying
+frames block by block (nothing is decoded into memory as a whole) and
+recording where every chunk starts so players can seek by chunk
+"""
+import json
+import os
+import struct
+import uuid
+import wave
+from pathlib import Path
+
+BLOCK_FRAMES = 64 * 1024
+WAV_HEADER_SIZE = 44
+
+
+class AssemblyError(Exception):
+    """A chunk is missing or its format does not match the others"""
+
+
+def wav_header(sample_rate, channels, sample_width, data_size):
+    """Canonical 44-byte PCM WAV header"""
+    block_align = channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b'data', data_size
+    )
+
+
+class Assembly:
+    """
+    Plan for joining chunk WAVs: checks formats and computes the index up front,
+    so the exact size is known before any audio is copied.
+
+    Args:
+        chunks: List of (chunk index, audio id, wav path) in playback order
+        silence_ms: Silence inserted between consecutive chunks
+    """
+
+    def __init__(self, chunks, silence_ms=0):
+        if not chunks:
+            raise AssemblyError('No audio to assemble')
+
+        self.chunks = []
+        params = None
+        for chunk_index, audio_id, path in chunks:
+            if not Path(path).exists():
+                raise AssemblyError(f'Audio of chunk {chunk_index} is no longer available')
+            with wave.open(str(path), 'rb') as wav_file:
+                chunk_params = (wav_file.getframerate(), wav_file.getnchannels(), wav_file.getsampwidth())
+                frames = wav_file.getnframes()
+            if params is None:
+                params = chunk_params
+            elif chunk_params != params:
+                raise AssemblyError(f'Chunk {chunk_index} has a different audio format')
+            self.chunks.append((chunk_index, audio_id, Path(path), frames))
+
+        self.sample_rate, self.channels, self.sample_width = params
+        self.frame_size = self.channels * self.sample_width
+        self.silence_frames = int(self.sample_rate * silence_ms / 1000)
+        self.silence_ms = silence_ms
+
+        self.index = []
+        position = 0
+        for n, (chunk_index, audio_id, _, frames) in enumerate(self.chunks):
+            if n > 0:
+                position += self.silence_frames
+            self.index.append({
+                'index': chunk_index,
+                'audio_id': audio_id,
+                'start_seconds': round(position / self.sample_rate, 3),
+                'duration_seconds': round(frames / self.sample_rate, 3),
+                'start_byte': WAV_HEADER_SIZE + position * self.frame_size
+            })
+            position += frames
+        self.total_frames = position
+
+    @property
+    def data_size(self):
+        return self.total_frames * self.frame_size
+
+    @property
+    def file_size(self):
+        return WAV_HEADER_SIZE + self.data_size
+
+    def index_document(self):
+        return {
+            'sample_rate': self.sample_rate,
+            'silence_ms': self.silence_ms,
+            'duration_seconds': round(self.total_frames / self.sample_rate, 3),
+            'size_bytes': self.file_size,
+            'chunks': self.index
+        }
+
+    def iter_bytes(self):
+        """Yield the complete WAV file (header first) block by block"""
+        yield wav_header(self.sample_rate, self.channels, self.sample_width, self.data_size)
+        silence = b'\x00' * (self.silence_frames * self.frame_size)
+        for n, (_, _, path, _) in enumerate(self.chunks):
+            if n > 0 and silence:
+                yield silence
+            with wave.open(str(path), 'rb') as wav_file:
+                while True:
+                    frames = wav_file.readframes(BLOCK_FRAMES)
+                    if not frames:
+                        break
+                    yield frames
+
+    def iter_and_write(self, output_path, index_path):
+        """
+        Yield the WAV like iter_bytes while writing it to output_path.
+        The file and its index only appear once every block has been produced,
+        so an interrupted stream leaves nothing behind.
+        """
+        output_path = Path(output_path)
+        tmp_path = output_path.with_name(f"{output_path.stem}.{uuid.uuid4().hex}.tmp.wav")
+        try:
+            with open(tmp_path, 'wb') as f:
+                for block in self.iter_bytes():
+                    f.write(block)
+                    yield block
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        index_path = Path(index_path)
+        tmp_index = index_path.with_name(f"{index_path.stem}.{uuid.uuid4().hex}.json.tmp")
+        try:
+            with open(tmp_index, 'w') as f:
+                json.dump(self.index_document(), f)
+            os.replace(tmp_index, index_path)
+        finally:
+            tmp_index.unlink(missing_ok=True)
+
+    def write(self, output_path, index_path):
+        """Write the audiobook and its index atomically"""
+        for _ in self.iter_and_write(output_path, index_path):
+            pass
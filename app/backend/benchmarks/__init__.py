@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the Easy Voice Clone backend
+Run from app/backend, e.g. python -m benchmarks.bench_chunking,
+or every suite at once with python -m benchmarks.run --json results.json
+"""
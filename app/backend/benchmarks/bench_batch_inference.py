@@ -0,0 +1,72 @@
+"""
+Measure batched XTTS inference throughput to tune INFERENCE_BATCH_SIZE
+
+Needs the XTTS model and a voice sample. Usage (from app/backend):
+    python -m benchmarks.bench_batch_inference --voice path/to/sample.wav [--batch-sizes 1,2,4,8] [--chunks 8]
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import inference
+
+SAMPLE_CHUNKS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Every chapter of the book is read aloud with a cloned voice.",
+    "Batching similar sentences together keeps the processor busy.",
+    "Short lines finish quickly.",
+    "Longer sentences, with a few commas and clauses, take noticeably more time to synthesize.",
+    "This is a benchmark of chunks per second.",
+]
+
+
+def run(voice_path, batch_sizes, num_chunks, language='en'):
+    texts = [SAMPLE_CHUNKS[i % len(SAMPLE_CHUNKS)] for i in range(num_chunks)]
+    # Load the model and conditioning once, outside the timed region
+    inference.get_tts_model()
+    inference.get_speaker_latents('benchmark', voice_path)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for batch_size in batch_sizes:
+            output_paths = [Path(tmp_dir) / f"{batch_size}_{i}.wav" for i in range(num_chunks)]
+            start = time.perf_counter()
+            if batch_size == 1:
+                for text, path in zip(texts, output_paths):
+                    inference.synthesize_to_file(text, 'benchmark', voice_path, language, path)
+            else:
+                inference.synthesize_batch_to_files(
+                    texts, 'benchmark', voice_path, language, output_paths, batch_size=batch_size
+                )
+            elapsed = time.perf_counter() - start
+            results.append({
+                'batch_size': batch_size,
+                'chunks': num_chunks,
+                'seconds': round(elapsed, 3),
+                'chunks_per_second': round(num_chunks / elapsed, 3)
+            })
+            print(f"batch size {batch_size:>3}: {num_chunks} chunks in {elapsed:.1f}s "
+                  f"({results[-1]['chunks_per_second']} chunks/s)")
+    inference.invalidate_speaker_latents('benchmark')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voice', required=True, help='Reference audio of the voice to clone')
+    parser.add_argument('--batch-sizes', default='1,2,4,8')
+    parser.add_argument('--chunks', type=int, default=8)
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run(args.voice, [int(b) for b in args.batch_sizes.split(',')], args.chunks, args.language)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
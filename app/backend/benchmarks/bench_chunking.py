@@ -0,0 +1,102 @@
+"""
+Benchmark text cleaning and chunking on large generated inputs
+
+Usage (from app/backend):
+    python -m benchmarks.bench_chunking [--sizes 100000,1000000,5000000] [--json results.json]
+"""
+import argparse
+import json
+import random
+import time
+
+from chunking import clean_text, chunk_text_by_sentences, chunk_text_by_paragraphs
+
+WORDS = (
+    'the voice model reads every page of the book aloud while listeners follow along '
+    'chapter after chapter with careful pauses between long and short sentences'
+).split()
+
+
+def generate_text(size, seed=0):
+    """Book-like text of about size characters: wrapped lines, blank-line paragraphs, page numbers"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    page = 1
+    while length < size:
+        paragraph = []
+        for _ in range(rng.randint(2, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(4, 40))]
+            if rng.random() < 0.05:
+                # Occasional run-on sentence over the XTTS limit
+                words += [rng.choice(WORDS) + ',' for _ in range(60)]
+            paragraph.append(' '.join(words).capitalize() + '.')
+        text = ' '.join(paragraph)
+        # Wrap lines like PDF extraction does
+        lines = [text[i:i + 80] for i in range(0, len(text), 80)]
+        parts.append('\n'.join(lines))
+        length += len(text)
+        if rng.random() < 0.2:
+            parts.append(str(page))
+            page += 1
+    return '\n\n'.join(parts)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(sizes, max_chars=500, language='en'):
+    results = []
+    for size in sizes:
+        text = generate_text(size)
+        cleaned, clean_seconds = timed(clean_text, text)
+        sentence_chunks, sentence_seconds = timed(
+            chunk_text_by_sentences, cleaned, max_chars=max_chars, min_chars=100, language=language
+        )
+        paragraph_chunks, paragraph_seconds = timed(
+            chunk_text_by_paragraphs, cleaned, max_chars=max_chars, language=language
+        )
+
+        lengths = [len(c) for c in sentence_chunks]
+        results.append({
+            'input_chars': len(text),
+            'clean_text_seconds': round(clean_seconds, 4),
+            'sentences_seconds': round(sentence_seconds, 4),
+            'sentences_chunks': len(sentence_chunks),
+            'sentences_chars_per_second': int(len(cleaned) / sentence_seconds) if sentence_seconds else None,
+            'sentences_chunk_min': min(lengths),
+            'sentences_chunk_max': max(lengths),
+            'sentences_chunk_mean': round(sum(lengths) / len(lengths), 1),
+            'paragraphs_seconds': round(paragraph_seconds, 4),
+            'paragraphs_chunks': len(paragraph_chunks),
+            'paragraph_breaks_kept': cleaned.count('\n\n')
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100000,1000000,5000000', help='Comma-separated input sizes in characters')
+    parser.add_argument('--max-chars', type=int, default=500)
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.sizes.split(',')], max_chars=args.max_chars, language=args.language)
+    for row in results:
+        print(
+            f"{row['input_chars']:>10} chars  clean {row['clean_text_seconds']:>7.3f}s  "
+            f"sentences {row['sentences_seconds']:>7.3f}s ({row['sentences_chunks']} chunks, "
+            f"{row['sentences_chunk_min']}-{row['sentences_chunk_max']} chars)  "
+            f"paragraphs {row['paragraphs_seconds']:>7.3f}s ({row['paragraphs_chunks']} chunks)"
+        )
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
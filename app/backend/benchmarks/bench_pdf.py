@@ -0,0 +1,118 @@
+"""
+Benchmark PDF text extraction on generated PDFs of increasing size
+
+Measures serial extraction, the process-pool path and cache hits.
+Usage (from app/backend):
+    python -m benchmarks.bench_pdf [--pages 10,100,500] [--json results.json]
+"""
+import argparse
+import hashlib
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from pdf_extract import PdfExtractor
+from benchmarks.bench_chunking import generate_text
+
+LINES_PER_PAGE = 45
+CHARS_PER_LINE = 90
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def generate_pdf(path, pages, seed=0):
+    """Write a PDF of pages text pages (Helvetica, no external library needed)"""
+    text = ' '.join(generate_text(pages * LINES_PER_PAGE * CHARS_PER_LINE, seed=seed).split())
+    lines = [text[i:i + CHARS_PER_LINE] for i in range(0, len(text), CHARS_PER_LINE)]
+
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_refs = []
+    for page in range(pages):
+        page_lines = lines[page * LINES_PER_PAGE:(page + 1) * LINES_PER_PAGE] or ['']
+        body = ' T* '.join(f'({_escape(line)}) Tj' for line in page_lines)
+        stream = f'BT /F1 10 Tf 14 TL 40 780 Td {body} ET'.encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects)
+        )
+        page_refs.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(page_refs), pages)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, obj)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+    return path
+
+
+def extract_all(extractor, path):
+    """Extract every page the way /api/pdf/extract does, returns (seconds, characters)"""
+    pdf_hash = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    start = time.perf_counter()
+    count = extractor.page_count(path, pdf_hash)
+    chars = sum(len(text) for _, text in extractor.iter_pages(path, pdf_hash, list(range(count))))
+    return time.perf_counter() - start, chars
+
+
+def run(page_counts, workers=None):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        warmup_path = generate_pdf(tmp_dir / 'warmup.pdf', 2, seed=1)
+        for pages in page_counts:
+            pdf_path = generate_pdf(tmp_dir / f'{pages}.pdf', pages)
+
+            serial = PdfExtractor(tmp_dir / f'serial_{pages}.db', workers=1)
+            serial_seconds, chars = extract_all(serial, pdf_path)
+            cached_seconds, _ = extract_all(serial, pdf_path)
+
+            parallel = PdfExtractor(tmp_dir / f'parallel_{pages}.db', workers=workers, parallel_min_pages=1)
+            extract_all(parallel, warmup_path)  # start the worker processes outside the timed run
+            parallel_seconds, _ = extract_all(parallel, pdf_path)
+            if parallel.executor is not None:
+                parallel.executor.shutdown()
+
+            results.append({
+                'pages': pages,
+                'file_bytes': pdf_path.stat().st_size,
+                'chars': chars,
+                'serial_seconds': round(serial_seconds, 4),
+                'serial_pages_per_second': round(pages / serial_seconds, 1),
+                'parallel_seconds': round(parallel_seconds, 4),
+                'parallel_workers': parallel.workers,
+                'cached_seconds': round(cached_seconds, 4)
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default='10,100,500', help='Comma-separated page counts')
+    parser.add_argument('--workers', type=int, help='Extraction processes (default: CPU count)')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run([int(p) for p in args.pages.split(',')], workers=args.workers)
+    for row in results:
+        print(
+            f"{row['pages']:>5} pages  serial {row['serial_seconds']:>7.3f}s  "
+            f"parallel {row['parallel_seconds']:>7.3f}s ({row['parallel_workers']} workers)  "
+            f"cached {row['cached_seconds']:>7.3f}s"
+        )
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+A/B test of CPU inference profiles against the fp32 reference
+
+For every profile (fp32, int8, bf16, optionally with torch.compile, and onnx for the
+ONNX Runtime backend) this reports:
+    - speed: end-to-end synthesis time of a fixed text set, real-time factor and speedup over fp32
+    - quality: the audio codes sampled by the fp32 model are decoded by each profile, so the
+      waveforms line up sample by sample with the fp32 decode. Reported as SNR (dB, higher is
+      better) and log-spectral distance (dB, lower is better). Sampling randomness is excluded,
+      only the numerical error of the profile remains.
+
+Needs the XTTS model and a voice sample. Usage (from app/backend):
+    python -m benchmarks.bench_profiles --voice path/to/sample.wav [--profiles fp32,int8,bf16,onnx] [--compile]
+"""
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+
+import inference
+from inference_profiles import apply_profile
+from onnx_backend import use_onnx_runtime
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Every chapter of the book is read aloud with a cloned voice.",
+    "Numbers like 1984 and 2024, and names like Anna, are hard to pronounce.",
+    "Longer sentences, with a few commas and clauses, take noticeably more time to synthesize, "
+    "which is exactly where quantization should pay off.",
+    "Is this a question?",
+]
+
+SAMPLE_RATE = 24000
+FFT_SIZE = 1024
+HOP = 256
+
+
+def log_spectrum(wav):
+    frames = max(1, 1 + (len(wav) - FFT_SIZE) // HOP)
+    padded = np.pad(wav, (0, max(0, FFT_SIZE + (frames - 1) * HOP - len(wav))))
+    windows = np.stack([padded[i * HOP:i * HOP + FFT_SIZE] for i in range(frames)]) * np.hanning(FFT_SIZE)
+    return 20 * np.log10(np.abs(np.fft.rfft(windows, axis=1)) + 1e-5)
+
+
+def snr_db(reference, wav):
+    length = min(len(reference), len(wav))
+    reference, wav = reference[:length], wav[:length]
+    noise = np.sum((reference - wav) ** 2)
+    return float(10 * np.log10(np.sum(reference ** 2) / noise)) if noise > 0 else float('inf')
+
+
+def log_spectral_distance(reference, wav):
+    length = min(len(reference), len(wav))
+    ref_spec, spec = log_spectrum(reference[:length]), log_spectrum(wav[:length])
+    return float(np.mean(np.sqrt(np.mean((ref_spec - spec) ** 2, axis=1))))
+
+
+def time_synthesis(model, latents, language, settings, repeats):
+    """Median seconds to synthesize TEXTS one by one, and the seconds of audio produced"""
+    import torch
+    timings = []
+    audio_seconds = 0.0
+    for _ in range(repeats):
+        torch.manual_seed(0)
+        start = time.perf_counter()
+        samples = 0
+        for text in TEXTS:
+            wav = model.inference(text, language, latents['gpt_cond_latent'], latents['speaker_embedding'], **settings)['wav']
+            samples += len(np.asarray(wav).reshape(-1))
+        timings.append(time.perf_counter() - start)
+        audio_seconds = samples / SAMPLE_RATE
+    return float(np.median(timings)), audio_seconds
+
+
+def run(voice_path, profiles, compile=False, language='en', repeats=1):
+    import torch
+    from TTS.api import TTS
+
+    # Load the fp32 reference directly so INFERENCE_PROFILE does not apply to it
+    tts = TTS(inference.MODEL_NAME, progress_bar=False, gpu=False)
+    inference.tts_model = tts
+    reference = tts.synthesizer.tts_model
+    latents = inference.compute_speaker_latents('ab_benchmark', voice_path)
+    settings = inference.get_inference_settings(reference)
+
+    # Audio codes of every text sampled once by the reference, decoded by every profile
+    torch.manual_seed(0)
+    codes = [inference.generate_codes(reference, [text], language, latents, settings) for text in TEXTS]
+    reference_wavs = [inference.decode_codes(reference, c, latents)[0] for c in codes]
+
+    # Plain fp32 always runs first, speedups are relative to it
+    variants = [('fp32', False)] + [
+        (profile, compile and profile != 'onnx') for profile in profiles if (profile, compile) != ('fp32', False)
+    ]
+    results = []
+    baseline_seconds = None
+    for profile, compiled in variants:
+        model = reference if (profile, compiled) == ('fp32', False) else copy.deepcopy(reference)
+        if profile == 'onnx':
+            name = use_onnx_runtime(model, inference.get_tts_version())
+        else:
+            name = apply_profile(model, profile, compile=compiled)
+        if compiled:
+            time_synthesis(model, latents, language, settings, 1)  # compile outside the timed runs
+
+        seconds, audio_seconds = time_synthesis(model, latents, language, settings, repeats)
+        wavs = [inference.decode_codes(model, c, latents)[0] for c in codes]
+        if baseline_seconds is None:
+            baseline_seconds = seconds
+
+        snrs = [snr_db(ref, wav) for ref, wav in zip(reference_wavs, wavs)]
+        results.append({
+            'profile': name,
+            'seconds': round(seconds, 3),
+            'audio_seconds': round(audio_seconds, 3),
+            'real_time_factor': round(seconds / audio_seconds, 3) if audio_seconds else None,
+            'speedup': round(baseline_seconds / seconds, 3) if baseline_seconds else None,
+            'snr_db': round(float(np.mean(snrs)), 2) if all(np.isfinite(snrs)) else None,
+            'log_spectral_distance_db': round(float(np.mean(
+                [log_spectral_distance(ref, wav) for ref, wav in zip(reference_wavs, wavs)]
+            )), 3)
+        })
+        row = results[-1]
+        print(f"{name:>14}  {row['seconds']:>7.2f}s  RTF {row['real_time_factor']}  speedup {row['speedup']}  "
+              f"SNR {row['snr_db']} dB  LSD {row['log_spectral_distance_db']} dB")
+        if model is not reference:
+            del model
+
+    inference.invalidate_speaker_latents('ab_benchmark')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voice', required=True, help='Reference audio of the voice to clone')
+    parser.add_argument('--profiles', default='fp32,int8,bf16', help='Comma-separated profiles (fp32 always runs as the reference)')
+    parser.add_argument('--compile', action='store_true', help='Also torch.compile each profile')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run(args.voice, args.profiles.split(','), compile=args.compile, language=args.language, repeats=args.repeats)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
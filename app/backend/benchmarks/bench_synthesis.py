@@ -0,0 +1,237 @@
+"""
+Benchmark synthesis: XTTS real-time factor, or server overhead with a stub model
+
+The default mode runs real CPU/GPU inference for texts of several lengths in
+several languages and reports the real-time factor (synthesis seconds per
+second of audio) with the GPT / vocoder split.
+
+--stub replaces the model with one that writes silence instantly and drives
+the Flask app, so what remains is the server's own cost per request
+(routing, cache keys, WAV handling, transcoding, JSON).
+
+Usage (from app/backend):
+    python -m benchmarks.bench_synthesis --voice path/to/sample.wav [--languages en,es,de] [--lengths 40,120,240]
+    python -m benchmarks.bench_synthesis --stub [--requests 50]
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+SAMPLE_TEXTS = {
+    'en': "The old lighthouse keeper climbed the stairs every evening, lit the lamp and watched the ships "
+          "pass safely along the rocky coast. Nobody in the village remembered a night when the light had "
+          "failed, and the keeper intended to keep it that way for as long as he could still climb.",
+    'es': "El viejo farero subía las escaleras cada tarde, encendía la lámpara y miraba pasar los barcos "
+          "a salvo junto a la costa rocosa. Nadie en el pueblo recordaba una noche en la que la luz hubiera "
+          "fallado, y el farero pensaba mantenerlo así mientras pudiera seguir subiendo.",
+    'de': "Der alte Leuchtturmwärter stieg jeden Abend die Treppe hinauf, zündete die Lampe an und sah den "
+          "Schiffen nach, die sicher an der felsigen Küste vorbeifuhren. Niemand im Dorf erinnerte sich an "
+          "eine Nacht, in der das Licht versagt hatte, und so sollte es bleiben.",
+    'fr': "Le vieux gardien du phare montait l'escalier chaque soir, allumait la lampe et regardait les "
+          "navires longer sans danger la côte rocheuse. Personne au village ne se souvenait d'une nuit où "
+          "la lumière s'était éteinte, et le gardien comptait bien que cela dure.",
+    'it': "Il vecchio guardiano del faro saliva le scale ogni sera, accendeva la lampada e guardava le navi "
+          "passare al sicuro lungo la costa rocciosa. Nessuno in paese ricordava una notte in cui la luce "
+          "si fosse spenta, e il guardiano voleva che restasse così.",
+    'pt': "O velho faroleiro subia as escadas todas as noites, acendia a lâmpada e via os navios passarem "
+          "em segurança pela costa rochosa. Ninguém na aldeia se lembrava de uma noite em que a luz tivesse "
+          "falhado, e o faroleiro queria que continuasse assim.",
+    'zh-cn': "老灯塔看守人每天傍晚都会爬上楼梯，点亮灯塔，看着船只安全地驶过岩石海岸。村里没有人记得灯光熄灭过的夜晚，"
+             "看守人打算只要自己还能爬楼梯，就一直这样守下去。",
+    'ja': "年老いた灯台守は毎晩階段を上り、ランプをともして、船が岩の多い海岸を無事に通り過ぎるのを見守った。"
+          "村の誰も、灯りが消えた夜を覚えていなかった。",
+}
+
+# Speech rate the stub model pretends to have (characters per second of audio)
+STUB_CHARS_PER_SECOND = 14.0
+STUB_SAMPLE_RATE = 24000
+
+
+def sample_text(language, length):
+    """Up to length characters of the language's sample, cut at a word boundary where possible"""
+    text = SAMPLE_TEXTS[language]
+    if len(text) <= length:
+        return text
+    cut = text.rfind(' ', 0, length + 1)
+    return text[:cut if cut > length // 2 else length]
+
+
+def wav_seconds(path):
+    with wave.open(str(path), 'rb') as wav_file:
+        return wav_file.getnframes() / float(wav_file.getframerate())
+
+
+def stage_totals():
+    """Cumulative seconds per pipeline stage recorded by the metrics module"""
+    from metrics import STAGE_SECONDS
+    with STAGE_SECONDS.lock:
+        return {key[0][1]: total for key, (_, total) in STAGE_SECONDS.values.items()}
+
+
+def run(voice_path, languages, lengths, repeats=2):
+    """Real inference: real-time factor per language and text length"""
+    import inference
+
+    # Load the model and conditioning once, outside the timed region
+    start = time.perf_counter()
+    inference.get_tts_model()
+    load_seconds = time.perf_counter() - start
+    inference.get_speaker_latents('benchmark', voice_path)
+    print(f"model loaded in {load_seconds:.1f}s")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir) / 'out.wav'
+        for language in languages:
+            for length in lengths:
+                text = sample_text(language, length)
+                timings, audio = [], 0.0
+                before = stage_totals()
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    inference.synthesize_to_file(text, 'benchmark', voice_path, language, output_path)
+                    timings.append(time.perf_counter() - start)
+                    audio = wav_seconds(output_path)
+                after = stage_totals()
+                seconds = statistics.median(timings)
+                results.append({
+                    'language': language,
+                    'text_chars': len(text),
+                    'seconds': round(seconds, 3),
+                    'audio_seconds': round(audio, 3),
+                    'real_time_factor': round(seconds / audio, 3) if audio else None,
+                    'chars_per_second': round(len(text) / seconds, 1),
+                    'gpt_seconds': round((after.get('gpt', 0) - before.get('gpt', 0)) / repeats, 3),
+                    'vocoder_seconds': round((after.get('vocoder', 0) - before.get('vocoder', 0)) / repeats, 3)
+                })
+                row = results[-1]
+                print(f"{language:>6} {row['text_chars']:>4} chars  {row['seconds']:>7.2f}s for "
+                      f"{row['audio_seconds']:>6.2f}s audio  RTF {row['real_time_factor']}  "
+                      f"(gpt {row['gpt_seconds']}s, vocoder {row['vocoder_seconds']}s)")
+    inference.invalidate_speaker_latents('benchmark')
+    return results
+
+
+def write_silence(path, seconds):
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(STUB_SAMPLE_RATE)
+        wav_file.writeframes(b'\x00\x00' * int(seconds * STUB_SAMPLE_RATE))
+
+
+def stub_synthesize_to_file(text, voice_id, audio_path, language, output_path, effects=None):
+    write_silence(output_path, max(0.1, len(text) / STUB_CHARS_PER_SECOND))
+    return output_path
+
+
+def stub_synthesize_batch_to_files(texts, voice_id, audio_path, language, output_paths, batch_size=1):
+    for text, output_path in zip(texts, output_paths):
+        stub_synthesize_to_file(text, voice_id, audio_path, language, output_path)
+    return output_paths
+
+
+def load_stub_server(tmp_dir):
+    """Import the Flask app with all state under tmp_dir and the model replaced by the stub"""
+    import config
+    tmp_dir = Path(tmp_dir)
+    config.MODELS_DIR = tmp_dir / 'models'
+    config.OUTPUT_DIR = tmp_dir / 'output'
+    config.AUDIOBOOK_DIR = config.OUTPUT_DIR / 'audiobooks'
+    config.VOICES_DB = tmp_dir / 'voices.db'
+    config.JOBS_DIR = tmp_dir / 'jobs'
+    config.LEGACY_VOICES_JSON = tmp_dir / 'voices.json'
+    config.LEGACY_TEMP_VOICES_JSON = tmp_dir / 'temp_voices.json'
+    config.TRANSLATION_CACHE_DB = tmp_dir / 'translations.db'
+    config.PDF_CACHE_DB = tmp_dir / 'pdf_cache.db'
+    config.TRANSLATION_BACKEND = 'offline'
+    config.INFERENCE_WORKERS = 0
+
+    import server
+    server.init_services()
+    server.synthesize_to_file = stub_synthesize_to_file
+    server.synthesize_batch_to_files = stub_synthesize_batch_to_files
+    return server
+
+
+def run_stub(num_requests):
+    """Stub model: latency of the server's request handling"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = load_stub_server(tmp_dir)
+        voice_path = server.MODELS_DIR / 'benchmark.wav'
+        write_silence(voice_path, 3.0)
+        server.voice_store.put('benchmark', {
+            'id': 'benchmark', 'name': 'Benchmark', 'audio_path': str(voice_path),
+            'language': 'en', 'created_at': '2024-01-01T00:00:00', 'type': 'cloned'
+        })
+        client = server.app.test_client()
+        text = sample_text('en', 240)
+
+        def synthesize(i, unique):
+            body = {'voice_id': 'benchmark', 'text': f"{text} {i}" if unique else text, 'language': 'en'}
+            response = client.post('/api/synthesize', json=body)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            return response.get_json()['audio_id']
+
+        audio_id = synthesize(0, unique=False)
+        scenarios = [
+            ('synthesize_miss', lambda i: synthesize(i + 1, unique=True)),
+            ('synthesize_hit', lambda i: synthesize(0, unique=False)),
+            ('audio_wav', lambda i: client.get(f'/api/audio/{audio_id}').get_data()),
+            ('audio_opus', lambda i: client.get(f'/api/audio/{audio_id}?format=opus').get_data()),
+            ('audio_range', lambda i: client.get(f'/api/audio/{audio_id}', headers={'Range': 'bytes=1000-50999'}).get_data()),
+            ('voices_list', lambda i: client.get('/api/voices').get_data()),
+            ('health', lambda i: client.get('/api/health').get_data()),
+        ]
+
+        results = []
+        for name, request in scenarios:
+            timings = []
+            for i in range(num_requests):
+                start = time.perf_counter()
+                request(i)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            results.append({
+                'scenario': name,
+                'requests': num_requests,
+                'mean_seconds': round(statistics.mean(timings), 6),
+                'p50_seconds': round(timings[len(timings) // 2], 6),
+                'p95_seconds': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 6)
+            })
+            row = results[-1]
+            print(f"{name:>16}  mean {row['mean_seconds'] * 1000:>8.2f}ms  p50 {row['p50_seconds'] * 1000:>8.2f}ms  "
+                  f"p95 {row['p95_seconds'] * 1000:>8.2f}ms")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voice', help='Reference audio of the voice to clone (real inference)')
+    parser.add_argument('--languages', default='en,es,de,fr')
+    parser.add_argument('--lengths', default='40,120,240', help='Comma-separated text lengths in characters')
+    parser.add_argument('--repeats', type=int, default=2)
+    parser.add_argument('--stub', action='store_true', help='Replace the model with a stub and measure server overhead')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per scenario in --stub mode')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    if args.stub:
+        results = run_stub(args.requests)
+    elif args.voice:
+        results = run(
+            args.voice, args.languages.split(','), [int(n) for n in args.lengths.split(',')], repeats=args.repeats
+        )
+    else:
+        parser.error('--voice is required unless --stub is given')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark voice library operations at increasing library sizes
+
+Times the SQLite voice store (startup, migration, lookups, filtered and paginated
+listing, writes) next to the old pattern of rewriting voices.json on every change.
+Usage (from app/backend):
+    python -m benchmarks.bench_voice_store [--sizes 10,1000,10000] [--json results.json]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from voice_store import VoiceStore
+
+LANGUAGES = ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'zh-cn']
+SAMPLE_OPS = 200
+
+
+def generate_voices(count, seed=0):
+    """{voice_id: record} shaped like the records the server stores"""
+    rng = random.Random(seed)
+    voices = {}
+    for i in range(count):
+        voice_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        voices[voice_id] = {
+            'id': voice_id,
+            'name': f"Voice {i} {rng.choice(['Narrator', 'Reader', 'Host', 'Guide'])}",
+            'audio_path': f"/models/voices/{voice_id}.wav",
+            'language': rng.choice(LANGUAGES),
+            'created_at': datetime.fromtimestamp(1700000000 + i).isoformat(),
+            'type': rng.choice(['cloned', 'designed'])
+        }
+    return voices
+
+
+def per_op(func, args_list):
+    """Mean seconds per call over args_list"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / max(1, len(args_list))
+
+
+def run(sizes):
+    results = []
+    rng = random.Random(1)
+    for size in sizes:
+        voices = generate_voices(size)
+        ids = list(voices)
+        sample_ids = [rng.choice(ids) for _ in range(SAMPLE_OPS)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            json_path = tmp_dir / 'voices.json'
+            with open(json_path, 'w') as f:
+                json.dump(voices, f)
+
+            db_path = tmp_dir / 'voices.db'
+            start = time.perf_counter()
+            store = VoiceStore(db_path)
+            store.migrate_json(json_path)
+            migrate_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            reopened = VoiceStore(db_path)
+            open_seconds = time.perf_counter() - start
+            assert reopened.count() == size
+
+            get_seconds = per_op(store.get, [(voice_id,) for voice_id in sample_ids])
+            list_seconds = per_op(store.list, [()] * 5)
+            filtered_seconds = per_op(
+                lambda: store.list(language='en', query='narrator', limit=50), [()] * 20
+            )
+            page_seconds = per_op(lambda: store.list(limit=50, offset=size // 2), [()] * 20)
+            update_seconds = per_op(
+                lambda voice_id: store.update(voice_id, name='Renamed'), [(voice_id,) for voice_id in sample_ids]
+            )
+            new_voices = generate_voices(SAMPLE_OPS, seed=2)
+            put_seconds = per_op(store.put, list(new_voices.items()))
+            delete_seconds = per_op(store.delete, [(voice_id,) for voice_id in new_voices])
+
+            # What every write cost before the store: load and rewrite the whole JSON file
+            def json_rewrite(voice_id):
+                with open(json_path, 'r') as f:
+                    data = json.load(f)
+                data[voice_id]['name'] = 'Renamed'
+                with open(json_path, 'w') as f:
+                    json.dump(data, f, indent=2)
+            json_ops = sample_ids[:20]
+            json_write_seconds = per_op(json_rewrite, [(voice_id,) for voice_id in json_ops])
+
+        results.append({
+            'voices': size,
+            'migrate_seconds': round(migrate_seconds, 4),
+            'open_seconds': round(open_seconds, 4),
+            'get_seconds': round(get_seconds, 7),
+            'list_all_seconds': round(list_seconds, 5),
+            'list_filtered_seconds': round(filtered_seconds, 5),
+            'list_page_seconds': round(page_seconds, 5),
+            'update_seconds': round(update_seconds, 6),
+            'put_seconds': round(put_seconds, 6),
+            'delete_seconds': round(delete_seconds, 6),
+            'legacy_json_write_seconds': round(json_write_seconds, 6)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,1000,10000', help='Comma-separated numbers of voices')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.sizes.split(',')])
+    for row in results:
+        print(
+            f"{row['voices']:>6} voices  open {row['open_seconds'] * 1000:>8.2f}ms  "
+            f"get {row['get_seconds'] * 1e6:>7.1f}us  list {row['list_all_seconds'] * 1000:>7.2f}ms  "
+            f"filtered {row['list_filtered_seconds'] * 1000:>6.2f}ms  update {row['update_seconds'] * 1000:>6.2f}ms  "
+            f"(json rewrite {row['legacy_json_write_seconds'] * 1000:>8.2f}ms)"
+        )
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
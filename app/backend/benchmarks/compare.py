@@ -0,0 +1,103 @@
+"""
+Compare benchmark results against a saved baseline and flag regressions
+
+Rows of each suite are matched by their key fields (e.g. input size). Fields
+ending in '_seconds' or named 'real_time_factor' are lower-is-better, fields
+ending in '_per_second' higher-is-better; everything else is informational.
+
+Usage (from app/backend):
+    python -m benchmarks.compare results.json baseline.json [--tolerance 0.2]
+"""
+import argparse
+import json
+import sys
+
+# Fields identifying a row within a suite
+SUITE_KEYS = {
+    'chunking': ('input_chars',),
+    'pdf': ('pages',),
+    'voice_store': ('voices',),
+    'synthesis': ('language', 'text_chars'),
+    'server': ('scenario',),
+    'batch_inference': ('batch_size',),
+    'profiles': ('profile',),
+}
+
+# Timings below this are too noisy to compare (seconds)
+MIN_SECONDS = 0.0005
+
+
+def direction(field):
+    """1 if higher is better, -1 if lower is better, 0 if the field is not a performance number"""
+    if field.endswith('_per_second'):
+        return 1
+    if field.endswith('_seconds') or field == 'seconds' or field == 'real_time_factor':
+        return -1
+    return 0
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns a list of dicts (suite, row key, field, baseline, current, change)
+    for every field that got worse by more than tolerance (0.2 = 20%)
+    """
+    regressions = []
+    for suite, rows in results.get('suites', {}).items():
+        keys = SUITE_KEYS.get(suite)
+        baseline_rows = baseline.get('suites', {}).get(suite)
+        if not keys or not baseline_rows:
+            continue
+        baseline_by_key = {tuple(row.get(k) for k in keys): row for row in baseline_rows}
+        for row in rows:
+            row_key = tuple(row.get(k) for k in keys)
+            old_row = baseline_by_key.get(row_key)
+            if old_row is None:
+                continue
+            for field, value in row.items():
+                sign = direction(field)
+                old = old_row.get(field)
+                if not sign or not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old <= 0:
+                    continue
+                if sign < 0 and max(value, old) < MIN_SECONDS and field != 'real_time_factor':
+                    continue
+                change = (value - old) / old
+                if change * sign < -tolerance:
+                    regressions.append({
+                        'suite': suite,
+                        'row': dict(zip(keys, row_key)),
+                        'field': field,
+                        'baseline': old,
+                        'current': value,
+                        'change': round(change, 3)
+                    })
+    return regressions
+
+
+def report(regressions, tolerance):
+    if not regressions:
+        print(f"No regressions beyond {tolerance:.0%}")
+        return
+    print(f"{len(regressions)} regression(s) beyond {tolerance:.0%}:")
+    for r in regressions:
+        row = ', '.join(f"{k}={v}" for k, v in r['row'].items())
+        print(f"  {r['suite']} [{row}] {r['field']}: {r['baseline']} -> {r['current']} ({r['change']:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('results')
+    parser.add_argument('baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown as a fraction')
+    args = parser.parse_args()
+
+    with open(args.results) as f:
+        results = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    report(regressions, args.tolerance)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Run the offline benchmark suites and save the results as one JSON file
+
+No network is needed. The synthesis suite (real XTTS inference) only runs with
+--voice; the server suite uses a stub model. With --baseline, results are
+compared to a saved run and the exit status is 1 on regressions.
+
+Usage (from app/backend):
+    python -m benchmarks.run [--suites chunking,pdf,voice_store,server] [--quick]
+                             [--voice sample.wav] [--json results.json]
+                             [--baseline baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+from benchmarks import bench_chunking, bench_pdf, bench_voice_store, bench_synthesis
+from benchmarks.compare import compare, report
+
+DEFAULT_SUITES = 'chunking,pdf,voice_store,server'
+
+
+def run_suite(name, args):
+    quick = args.quick
+    if name == 'chunking':
+        return bench_chunking.run([100000, 1000000] if quick else [100000, 1000000, 5000000])
+    if name == 'pdf':
+        return bench_pdf.run([10, 100] if quick else [10, 100, 500])
+    if name == 'voice_store':
+        return bench_voice_store.run([10, 1000] if quick else [10, 1000, 10000])
+    if name == 'server':
+        return bench_synthesis.run_stub(20 if quick else 100)
+    if name == 'synthesis':
+        if not args.voice:
+            raise SystemExit('The synthesis suite needs --voice')
+        return bench_synthesis.run(
+            args.voice, ['en'] if quick else ['en', 'es', 'de', 'fr'], [40, 240] if quick else [40, 120, 240]
+        )
+    raise SystemExit(f"Unknown suite: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suites', default=DEFAULT_SUITES,
+                        help='Comma-separated suites: chunking, pdf, voice_store, server, synthesis')
+    parser.add_argument('--voice', help='Reference audio for the synthesis suite (adds it to the default suites)')
+    parser.add_argument('--quick', action='store_true', help='Smaller inputs for a fast check')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--baseline', help='Compare against a results file saved earlier')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown as a fraction')
+    args = parser.parse_args()
+
+    suites = args.suites.split(',')
+    if args.voice and args.suites == DEFAULT_SUITES:
+        suites.append('synthesis')
+
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quick': args.quick
+        },
+        'suites': {}
+    }
+    for name in suites:
+        print(f"== {name}")
+        results['suites'][name] = run_suite(name, args)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        report(regressions, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
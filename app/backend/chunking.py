@@ -0,0 +1,229 @@
+"""
+Text cleaning and chunking for synthesis
+Chunks are built in one linear pass, no sentence handed to XTTS exceeds the
+model's per-language character limit, and chunk size can follow a target
+audio duration derived from measured speech rate and real-time factor
+"""
+import math
+import re
+import threading
+
+# Per-language text limits of the XTTS v2 tokenizer (longer sentences get truncated audio)
+XTTS_CHAR_LIMITS = {
+    'en': 250, 'de': 253, 'fr': 273, 'es': 239, 'it': 213, 'pt': 203, 'pl': 224, 'zh': 82,
+    'ar': 166, 'cs': 186, 'ru': 182, 'nl': 251, 'tr': 226, 'ja': 71, 'hu': 224, 'ko': 95, 'hi': 150
+}
+DEFAULT_CHAR_LIMIT = 250
+
+CLAUSE_BREAK = re.compile(r'[,;:、，；：]$')
+SENTENCE_FALLBACK = re.compile(r'(?<=[.!?。！？])\s+')
+
+
+def char_limit(language):
+    """Longest sentence XTTS handles for a language ('zh-cn' uses the 'zh' limit)"""
+    return XTTS_CHAR_LIMITS.get((language or 'en').split('-')[0], DEFAULT_CHAR_LIMIT)
+
+
+def clean_text(text):
+    """
+    Clean extracted text, keeping paragraph breaks (blank lines) intact.
+    Single line breaks from PDF layout are joined into spaces.
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    # Remove excessive whitespace within lines
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    # Remove page numbers (lines holding only a number)
+    text = re.sub(r'^\d+$', '', text, flags=re.MULTILINE)
+    # Blank lines separate paragraphs, other line breaks are layout
+    text = re.sub(r'\n{2,}', '\n\n', text)
+    text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
+    return text.strip()
+
+
+def split_sentences(text):
+    """Sentence tokenization, with a punctuation-based fallback when NLTK data is missing"""
+    import nltk
+    try:
+        return nltk.sent_tokenize(text)
+    except LookupError:
+        return [s for s in SENTENCE_FALLBACK.split(text) if s]
+
+
+def ensure_sentence_data():
+    """Download the NLTK sentence tokenizer data if it is missing (needs network, failures are ignored)"""
+    import nltk
+    for resource in ('punkt', 'punkt_tab'):
+        try:
+            nltk.data.find(f'tokenizers/{resource}')
+        except LookupError:
+            try:
+                nltk.download(resource, quiet=True)
+            except Exception as e:
+                print(f"Could not download NLTK {resource}: {str(e)}")
+
+
+def split_long_sentence(sentence, limit):
+    """
+    Split a sentence longer than limit into pieces of at most limit characters,
+    preferring clause punctuation, then word boundaries, then a hard cut
+    """
+    if len(sentence) <= limit:
+        return [sentence]
+
+    pieces = []
+    words = []        # words of the current piece
+    length = 0        # length of ' '.join(words)
+    clause_end = 0    # number of words up to the last clause break in the current piece
+
+    for word in sentence.split():
+        while len(word) > limit:
+            # No spaces to break at (e.g. Chinese or Japanese text)
+            if words:
+                pieces.append(' '.join(words))
+                words, length, clause_end = [], 0, 0
+            pieces.append(word[:limit])
+            word = word[limit:]
+
+        while words and length + 1 + len(word) > limit:
+            split_at = clause_end or len(words)
+            pieces.append(' '.join(words[:split_at]))
+            words = words[split_at:]
+            length = len(' '.join(words))
+            clause_end = 0
+
+        length += len(word) + (1 if words else 0)
+        words.append(word)
+        if CLAUSE_BREAK.search(word):
+            clause_end = len(words)
+
+    if words:
+        pieces.append(' '.join(words))
+    return [piece for piece in pieces if piece]
+
+
+def chunk_text_by_sentences(text, max_chars=500, min_chars=100, language='en'):
+    """
+    Intelligently chunk text into manageable pieces for TTS.
+
+    Args:
+        text: The text to chunk
+        max_chars: Maximum characters per chunk (ideal for ~30-60 second audio)
+        min_chars: Minimum characters to start a new chunk
+        language: Language code, sentences over its XTTS limit are split
+
+    Returns:
+        List of text chunks
+    """
+    return _pack_sentences(split_sentences(text), len(text), max_chars, min_chars, char_limit(language))
+
+
+def _pack_sentences(sentences, total, max_chars, min_chars, limit):
+    """Greedily pack sentences (split to the XTTS limit) into chunks of similar size"""
+    max_chars = max(max_chars, limit)
+
+    # Aim for equally sized chunks instead of full chunks plus a short remainder
+    target = total / math.ceil(total / max_chars) if total else max_chars
+
+    chunks = []
+    parts = []
+    length = 0
+    for sentence in sentences:
+        for piece in split_long_sentence(sentence, limit):
+            if parts and length + 1 + len(piece) > max_chars and length >= min_chars:
+                chunks.append(' '.join(parts))
+                parts, length = [], 0
+            length += len(piece) + (1 if parts else 0)
+            parts.append(piece)
+            if length >= target:
+                chunks.append(' '.join(parts))
+                parts, length = [], 0
+
+    # Add the last chunk if it has content
+    if parts:
+        chunks.append(' '.join(parts))
+    return chunks
+
+
+def chunk_text_by_paragraphs(text, max_chars=800, language='en'):
+    """
+    Chunk text by paragraphs with a maximum size.
+    Good for maintaining context and natural breaks.
+    """
+    limit = char_limit(language)
+    chunks = []
+    parts = []
+    length = 0
+
+    for para in text.split('\n\n'):
+        para = para.strip()
+        if not para:
+            continue
+
+        # If paragraph alone exceeds max (or holds an over-long sentence), break it into sentences
+        sentences = split_sentences(para) if len(para) > limit else [para]
+        if len(para) > max_chars or any(len(sentence) > limit for sentence in sentences):
+            if parts:
+                chunks.append('\n\n'.join(parts))
+                parts, length = [], 0
+            chunks.extend(_pack_sentences(sentences, len(para), max_chars, 100, limit))
+            continue
+
+        if parts and length + 2 + len(para) > max_chars:
+            chunks.append('\n\n'.join(parts))
+            parts, length = [], 0
+        length += len(para) + (2 if parts else 0)
+        parts.append(para)
+
+    if parts:
+        chunks.append('\n\n'.join(parts))
+    return chunks
+
+
+class SpeechRateTracker:
+    """
+    Moving averages of speech rate (characters per second of audio) and
+    real-time factor (synthesis seconds per second of audio), measured from
+    finished syntheses and used to size chunks by duration
+    """
+
+    def __init__(self, chars_per_second=14.0, smoothing=0.1):
+        self.chars_per_second = chars_per_second
+        self.real_time_factor = None
+        self.smoothing = smoothing
+        self.samples = 0
+        self.lock = threading.Lock()
+
+    def record(self, chars, audio_seconds, synthesis_seconds):
+        """Add one measurement"""
+        if chars <= 0 or audio_seconds <= 0:
+            return
+        rate = chars / audio_seconds
+        rtf = synthesis_seconds / audio_seconds
+        with self.lock:
+            if self.samples == 0:
+                self.chars_per_second, self.real_time_factor = rate, rtf
+            else:
+                self.chars_per_second += self.smoothing * (rate - self.chars_per_second)
+                self.real_time_factor += self.smoothing * (rtf - self.real_time_factor)
+            self.samples += 1
+
+    def chars_for_duration(self, audio_seconds):
+        """Characters expected to produce audio_seconds of speech"""
+        with self.lock:
+            return max(1, int(audio_seconds * self.chars_per_second))
+
+    def chars_for_compute(self, synthesis_seconds):
+        """Characters expected to take synthesis_seconds to synthesize (None until measured)"""
+        with self.lock:
+            if not self.real_time_factor:
+                return None
+            return max(1, int(synthesis_seconds / self.real_time_factor * self.chars_per_second))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'chars_per_second': round(self.chars_per_second, 2),
+                'real_time_factor': round(self.real_time_factor, 3) if self.real_time_factor else None,
+                'samples': self.samples
+            }
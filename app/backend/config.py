@@ -0,0 +1,127 @@
+"""
+Shared configuration for the Easy Voice Clone backend
+Paths and tuning knobs, overridable through environment variables
+"""
+import os
+from pathlib import Path
+
+# Paths
+BASE_DIR = Path(__file__).parent.parent.parent
+MODELS_DIR = BASE_DIR / "models" / "voices"
+OUTPUT_DIR = BASE_DIR / "output" / "app"
+VOICES_DB = BASE_DIR / "app" / "voices.db"
+JOBS_DIR = BASE_DIR / "app" / "jobs"
+AUDIOBOOK_DIR = OUTPUT_DIR / "audiobooks"
+# Exported ONNX graphs of the model, one directory per TTS library version
+ONNX_DIR = BASE_DIR / "models" / "onnx"
+
+# Legacy JSON voice files, imported into VOICES_DB once
+LEGACY_VOICES_JSON = BASE_DIR / "app" / "voices.json"
+LEGACY_TEMP_VOICES_JSON = BASE_DIR / "app" / "temp_voices.json"
+
+# Number of voices whose speaker conditioning latents are kept in memory
+LATENT_CACHE_SIZE = int(os.environ.get('LATENT_CACHE_SIZE', 32))
+
+# Reference samples are trimmed of silence quieter than REFERENCE_SILENCE_DB below their peak at both ends
+# and capped to REFERENCE_MAX_SECONDS, the audio XTTS conditioning reads (the larger of max_ref_len and
+# gpt_cond_len in the XTTS v2 checkpoint config, 0 = no cap); checked against the model when it loads
+REFERENCE_MAX_SECONDS = float(os.environ.get('REFERENCE_MAX_SECONDS', 30))
+REFERENCE_SILENCE_DB = float(os.environ.get('REFERENCE_SILENCE_DB', 40))
+
+# Number of GPT tokens decoded per streamed audio frame (lower = faster first audio)
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 20))
+
+# Open /api/synthesize/stream responses, beyond which requests get 503 Service Unavailable. Streams generate
+# one at a time on the server process's model, the others wait for it while holding a request thread.
+MAX_AUDIO_STREAMS = int(os.environ.get('MAX_AUDIO_STREAMS', 2))
+
+# HTTP server: FLASK_DEBUG=true runs the Flask debug server with the reloader, otherwise the
+# production server (waitress) handles socket I/O on an event loop and requests on SERVER_THREADS threads
+SERVER_HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('FLASK_PORT', 5000))
+SERVER_DEBUG = os.environ.get('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 16))
+
+# Threads parsing uploaded PDFs for request handlers (large documents also use PDF_EXTRACT_WORKERS processes)
+PDF_PARSE_THREADS = int(os.environ.get('PDF_PARSE_THREADS', 2))
+
+# Admission control: interactive syntheses waiting for inference (in total and per client), and jobs
+# waiting for a job worker, beyond which requests get 429 Too Many Requests. Waiting requests hold a
+# request thread, so the interactive limit is lowered to what SERVER_THREADS leaves after the running
+# syntheses and the event and audio streams (minus one thread for the other endpoints)
+MAX_QUEUED_INTERACTIVE = int(os.environ.get('MAX_QUEUED_INTERACTIVE', 8))
+MAX_QUEUED_PER_CLIENT = int(os.environ.get('MAX_QUEUED_PER_CLIENT', 4))
+MAX_QUEUED_JOBS = int(os.environ.get('MAX_QUEUED_JOBS', 20))
+
+# Background threads processing PDF and batch synthesis jobs
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 1))
+
+# Seconds between keepalive comments on an idle job event stream (/api/jobs/<id>/events), also how soon
+# a disconnected client is noticed. Every open stream holds one of the SERVER_THREADS request threads.
+JOB_EVENTS_KEEPALIVE = int(os.environ.get('JOB_EVENTS_KEEPALIVE', 15))
+
+# Open job event streams, beyond which /api/jobs/<id>/events answers 503 with Retry-After (the web UI then
+# polls the job). Capped so that event and audio streams always leave SERVER_THREADS for the other endpoints.
+MAX_EVENT_STREAMS = int(os.environ.get('MAX_EVENT_STREAMS', max(1, SERVER_THREADS // 4)))
+
+# Inference worker processes, each with its own model replica (0 = synthesize in the server process)
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 0))
+
+# Chunks of a PDF or batch job synthesized together, and sentences per model batch (1 = no batching);
+# only sentences with the same number of text tokens share a batch
+INFERENCE_BATCH_SIZE = int(os.environ.get('INFERENCE_BATCH_SIZE', 1))
+
+# Inference backend: torch (eager PyTorch) or onnx (ONNX Runtime on the CPU, graphs exported on first load)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'torch').lower()
+
+# CPU inference profile: fp32 (reference), int8 (dynamic quantization of the GPT) or bf16 (autocast)
+INFERENCE_PROFILE = os.environ.get('INFERENCE_PROFILE', 'fp32').lower()
+
+# torch.compile the GPT transformer and the vocoder (slow first requests, needs a C++ compiler)
+INFERENCE_COMPILE = os.environ.get('INFERENCE_COMPILE', '0').lower() in ('1', 'true', 'yes')
+
+# Load the model in the background at startup instead of on the first request (with INFERENCE_WORKERS the
+# workers load their replicas at startup and the server process loads none until a stream needs one)
+PRELOAD_MODEL = os.environ.get('PRELOAD_MODEL', '1').lower() not in ('0', 'false', 'no')
+
+# Run a short synthesis after loading so the first request does not pay for cold kernels
+WARMUP_MODEL = os.environ.get('WARMUP_MODEL', '1').lower() not in ('0', 'false', 'no')
+
+# Torch intra-op threads per inference worker (0 = torch default)
+THREADS_PER_WORKER = int(os.environ.get('THREADS_PER_WORKER', 0))
+
+# Voice transformation output: target gated loudness in dBFS, and the sample rates clients may ask for
+OUTPUT_LOUDNESS_DB = float(os.environ.get('OUTPUT_LOUDNESS_DB', -20))
+OUTPUT_SAMPLE_RATES = (16000, 22050, 24000, 44100, 48000)
+
+# Disk budget for generated audio, including encoded copies and audiobooks; least recently used entries are
+# evicted. Chunks of jobs not yet expired (see OUTPUT_TTL_HOURS) are kept while they fit in half the budget.
+AUDIO_CACHE_MAX_MB = int(os.environ.get('AUDIO_CACHE_MAX_MB', 2048))
+
+# Generated audio not accessed for this long is deleted (0 = keep until the disk budget needs the space),
+# and so are finished jobs not updated for this long (0 = keep them forever)
+OUTPUT_TTL_HOURS = float(os.environ.get('OUTPUT_TTL_HOURS', 168))
+
+# Seconds between passes of the background cleanup of generated audio
+OUTPUT_JANITOR_INTERVAL = int(os.environ.get('OUTPUT_JANITOR_INTERVAL', 300))
+
+# Translation service: 'google' (needs network) or 'offline' (returns text unchanged)
+TRANSLATION_BACKEND = os.environ.get('TRANSLATION_BACKEND', 'google')
+
+# Persistent cache of translated text
+TRANSLATION_CACHE_DB = BASE_DIR / "app" / "translations.db"
+
+# Concurrent requests to the translation service
+TRANSLATION_CONCURRENCY = int(os.environ.get('TRANSLATION_CONCURRENCY', 4))
+
+# Characters sent per translation request (Google rejects requests over 5000)
+TRANSLATION_BATCH_CHARS = int(os.environ.get('TRANSLATION_BATCH_CHARS', 4500))
+
+# Per-page cache of extracted PDF text, keyed by the PDF's content hash
+PDF_CACHE_DB = BASE_DIR / "app" / "pdf_cache.db"
+
+# Worker processes extracting pages of large PDFs (0 = one per CPU)
+PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', 0))
+
+# Uncached pages needed before extraction is spread across worker processes
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 50))
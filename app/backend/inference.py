@@ -0,0 +1,496 @@
+"""
+XTTS inference for Easy Voice Clone
+Loads the model, caches speaker conditioning latents and runs synthesis.
+Imported by the Flask server and by inference worker processes.
+torch and TTS are imported on first use, so importing this module is cheap.
+"""
+import importlib.metadata
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from config import (
+    MODELS_DIR, LATENT_CACHE_SIZE, REFERENCE_MAX_SECONDS, STREAM_CHUNK_SIZE, INFERENCE_BATCH_SIZE, INFERENCE_PROFILE, INFERENCE_COMPILE,
+    INFERENCE_BACKEND
+)
+from chunking import char_limit, split_long_sentence
+from metrics import observe_stage, timed_stage
+from inference_profiles import apply_profile
+from reference_audio import REFERENCE_SAMPLE_RATE
+
+MODEL_NAME = 'tts_models/multilingual/multi-dataset/xtts_v2'
+
+# Initialize TTS model (singleton)
+tts_model = None
+# Inference profile applied to the loaded model (see inference_profiles)
+active_profile = None
+tts_model_lock = threading.Lock()
+# Held for every call into the loaded model: XTTS keeps per-call state on it (the GPT's
+# cached conditioning prefix), so concurrent calls would corrupt each other's output
+model_lock = threading.Lock()
+
+# In-process LRU of speaker conditioning latents (voice_id -> latents)
+speaker_latents_cache = OrderedDict()
+speaker_latents_lock = threading.Lock()
+
+# Vocoder time of the current thread's inference call, to separate it from GPT time
+vocoder_timing = threading.local()
+
+def get_tts_model():
+    """Lazy load TTS model"""
+    global tts_model, active_profile
+    with tts_model_lock:
+        if tts_model is None:
+            import torch
+            from TTS.api import TTS
+            with timed_stage('model_load'):
+                model = TTS(MODEL_NAME, 
+                           progress_bar=False, 
+                           gpu=torch.cuda.is_available())
+                active_profile = load_backend(model.synthesizer.tts_model)
+            instrument_vocoder(model.synthesizer.tts_model)
+            check_reference_config(model.synthesizer.tts_model.config)
+            tts_model = model
+    return tts_model
+
+def load_backend(model):
+    """Apply INFERENCE_BACKEND and INFERENCE_PROFILE to a freshly loaded XTTS model, returns the active profile"""
+    if INFERENCE_BACKEND == 'onnx':
+        from onnx_backend import use_onnx_runtime
+        profile = use_onnx_runtime(model, get_tts_version(), INFERENCE_PROFILE)
+        if profile is not None:
+            return profile
+    elif INFERENCE_BACKEND != 'torch':
+        raise ValueError(f"Unknown inference backend {INFERENCE_BACKEND!r}, use torch or onnx")
+    return apply_profile(model, INFERENCE_PROFILE, INFERENCE_COMPILE)
+
+def check_reference_config(config):
+    """Warn when stored reference samples do not match what the checkpoint's conditioning reads"""
+    cond_seconds = max(config.max_ref_len, config.gpt_cond_len)
+    if REFERENCE_MAX_SECONDS and REFERENCE_MAX_SECONDS < cond_seconds:
+        print(f"REFERENCE_MAX_SECONDS={REFERENCE_MAX_SECONDS:g} is shorter than the {cond_seconds}s the model "
+              f"conditions on (max_ref_len={config.max_ref_len}, gpt_cond_len={config.gpt_cond_len})")
+    if config.audio.sample_rate != REFERENCE_SAMPLE_RATE:
+        print(f"Reference samples are stored at {REFERENCE_SAMPLE_RATE} Hz but the model conditions at "
+              f"{config.audio.sample_rate} Hz, they are resampled on every load")
+
+def instrument_vocoder(model):
+    """Time every HiFi-GAN decoder call as the 'vocoder' stage"""
+    def before(module, args):
+        vocoder_timing.start = time.perf_counter()
+    
+    def after(module, args, output):
+        elapsed = time.perf_counter() - vocoder_timing.start
+        vocoder_timing.seconds = getattr(vocoder_timing, 'seconds', 0.0) + elapsed
+        observe_stage('vocoder', elapsed)
+    
+    model.hifigan_decoder.register_forward_pre_hook(before)
+    model.hifigan_decoder.register_forward_hook(after)
+
+def run_timed(inference_call):
+    """Run one inference call and record its time outside the vocoder as the 'gpt' stage"""
+    vocoder_timing.seconds = 0.0
+    start = time.perf_counter()
+    result = inference_call()
+    observe_stage('gpt', time.perf_counter() - start - vocoder_timing.seconds)
+    return result
+
+def get_model_version():
+    """Identifies the model weights and library producing the audio (part of output cache keys)"""
+    version = f"{MODEL_NAME}@{get_tts_version()}"
+    # Other backends, quantized and reduced-precision output differ from torch fp32, keep their cached audio apart
+    if INFERENCE_BACKEND != 'torch':
+        version = f"{version}+{INFERENCE_BACKEND}"
+    return version if INFERENCE_PROFILE == 'fp32' else f"{version}+{INFERENCE_PROFILE}"
+
+def get_tts_version():
+    """Version of the installed TTS library, read from package metadata to avoid importing it"""
+    for distribution in ('coqui-tts', 'TTS'):
+        try:
+            return importlib.metadata.version(distribution)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    from TTS import __version__
+    return __version__
+
+def is_model_loaded():
+    """Whether the model has been loaded in this process"""
+    return tts_model is not None
+
+def get_latents_path(voice_id):
+    """Path of the persisted conditioning latents for a voice"""
+    return MODELS_DIR / f"{voice_id}.latents.pt"
+
+def get_sample_latents_path(sample_path):
+    """Path of the persisted conditioning latents of one reference sample"""
+    sample_path = Path(sample_path)
+    return sample_path.with_name(f"{sample_path.stem}.sample-latents.pt")
+
+def reference_samples(audio_path):
+    """Sample paths of a voice's reference audio (one path, or a list for multi-sample voices)"""
+    return list(audio_path) if isinstance(audio_path, (list, tuple)) else [audio_path]
+
+def get_audio_fingerprint(audio_path):
+    """Cheap fingerprint of a voice's audio files, changes whenever a file is rewritten, added or removed"""
+    fingerprints = []
+    for sample_path in reference_samples(audio_path):
+        stat = os.stat(sample_path)
+        fingerprints.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+    return '|'.join(fingerprints)
+
+def cache_speaker_latents(voice_id, latents):
+    """Insert latents into the in-process LRU"""
+    with speaker_latents_lock:
+        speaker_latents_cache[voice_id] = latents
+        speaker_latents_cache.move_to_end(voice_id)
+        while len(speaker_latents_cache) > LATENT_CACHE_SIZE:
+            speaker_latents_cache.popitem(last=False)
+
+def write_latents(latents_path, latents):
+    """Persist latents atomically, inference workers may be reading or writing the same file"""
+    import torch
+    tmp_path = latents_path.with_name(f"{latents_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    torch.save(latents, tmp_path)
+    os.replace(tmp_path, latents_path)
+
+def get_sample_latents(sample_path):
+    """Conditioning latents of one reference sample, from disk or by running the model on it"""
+    import torch
+    fingerprint = get_audio_fingerprint(sample_path)
+    latents_path = get_sample_latents_path(sample_path)
+    if latents_path.exists():
+        try:
+            latents = torch.load(latents_path, map_location='cpu')
+            if latents.get('fingerprint') == fingerprint:
+                return latents
+        except Exception as e:
+            print(f"Ignoring unreadable latents for sample {sample_path}: {str(e)}")
+    
+    model = get_tts_model().synthesizer.tts_model
+    with model_lock, timed_stage('speaker_conditioning'):
+        gpt_cond_latent, speaker_embedding = model.get_conditioning_latents(
+            audio_path=str(sample_path),
+            max_ref_length=model.config.max_ref_len,
+            gpt_cond_len=model.config.gpt_cond_len,
+            gpt_cond_chunk_len=model.config.gpt_cond_chunk_len,
+            sound_norm_refs=model.config.sound_norm_refs
+        )
+    latents = {
+        'fingerprint': fingerprint,
+        'gpt_cond_latent': gpt_cond_latent.cpu(),
+        'speaker_embedding': speaker_embedding.cpu()
+    }
+    write_latents(latents_path, latents)
+    return latents
+
+def compute_speaker_latents(voice_id, audio_path):
+    """
+    Compute XTTS conditioning latents for a voice and persist them next to its audio
+
+    Every sample is conditioned on its own and the results are averaged, so a new sample
+    only runs the model on that sample. XTTS averages speaker embeddings of several
+    references the same way (its GPT latents would only read the start of all samples joined).
+
+    Args:
+        voice_id: Voice the latents belong to
+        audio_path: Reference audio of the voice, or a list of samples
+
+    Returns:
+        Dict with 'gpt_cond_latent', 'speaker_embedding' and the audio 'fingerprint'
+    """
+    import torch
+    samples = [get_sample_latents(sample_path) for sample_path in reference_samples(audio_path)]
+    latents = {
+        'fingerprint': '|'.join(sample['fingerprint'] for sample in samples),
+        'gpt_cond_latent': torch.stack([sample['gpt_cond_latent'] for sample in samples]).mean(dim=0),
+        'speaker_embedding': torch.stack([sample['speaker_embedding'] for sample in samples]).mean(dim=0)
+    }
+    write_latents(get_latents_path(voice_id), latents)
+    cache_speaker_latents(voice_id, latents)
+    return latents
+
+def precompute_speaker_latents(voice_id, audio_path):
+    """compute_speaker_latents for another process: the latents are persisted, only their fingerprint is returned"""
+    return compute_speaker_latents(voice_id, audio_path)['fingerprint']
+
+def get_speaker_latents(voice_id, audio_path):
+    """Get conditioning latents for a voice from memory, disk, or by computing them"""
+    fingerprint = get_audio_fingerprint(audio_path)
+    
+    with speaker_latents_lock:
+        latents = speaker_latents_cache.get(voice_id)
+        if latents is not None and latents['fingerprint'] == fingerprint:
+            speaker_latents_cache.move_to_end(voice_id)
+            return latents
+    
+    latents_path = get_latents_path(voice_id)
+    if latents_path.exists():
+        import torch
+        try:
+            latents = torch.load(latents_path, map_location='cpu')
+            if latents.get('fingerprint') == fingerprint:
+                cache_speaker_latents(voice_id, latents)
+                return latents
+        except Exception as e:
+            print(f"Ignoring unreadable latents for voice {voice_id}: {str(e)}")
+    
+    # Audio changed or latents never computed
+    return compute_speaker_latents(voice_id, audio_path)
+
+def invalidate_speaker_latents(voice_id):
+    """Drop cached and persisted latents for a voice"""
+    with speaker_latents_lock:
+        speaker_latents_cache.pop(voice_id, None)
+    get_latents_path(voice_id).unlink(missing_ok=True)
+
+def delete_sample(sample_path):
+    """Delete a reference sample and its persisted latents"""
+    get_sample_latents_path(sample_path).unlink(missing_ok=True)
+    Path(sample_path).unlink(missing_ok=True)
+
+def get_inference_settings(model):
+    """Sampling settings XTTS uses by default (same as tts_to_file)"""
+    return {
+        key: model.config[key]
+        for key in ['temperature', 'length_penalty', 'repetition_penalty', 'top_k', 'top_p']
+    }
+
+WARMUP_TEXT = "Warming up the voice model."
+
+def builtin_speaker_latents(model):
+    """Conditioning latents of a speaker bundled with the XTTS checkpoint, or None"""
+    speakers = getattr(getattr(model, 'speaker_manager', None), 'speakers', None)
+    if not speakers:
+        return None
+    speaker = next(iter(speakers.values()))
+    return {'gpt_cond_latent': speaker['gpt_cond_latent'], 'speaker_embedding': speaker['speaker_embedding']}
+
+def warmup(voice_id=None, audio_path=None, language='en'):
+    """
+    Run one short synthesis so one-time initialization and cold kernels are
+    paid before the first request. Uses a speaker bundled with the checkpoint,
+    or the given voice if the checkpoint has none.
+    
+    Returns:
+        Seconds the warmup synthesis took, or None if no voice was available
+    """
+    model = get_tts_model().synthesizer.tts_model
+    latents = builtin_speaker_latents(model)
+    if latents is None and audio_path is not None:
+        latents = get_speaker_latents(voice_id, audio_path)
+    if latents is None:
+        return None
+    
+    with model_lock:
+        start = time.perf_counter()
+        model.inference(
+            WARMUP_TEXT,
+            language,
+            latents['gpt_cond_latent'],
+            latents['speaker_embedding'],
+            **get_inference_settings(model)
+        )
+        return time.perf_counter() - start
+
+def split_for_synthesis(tts, text, language):
+    """Sentences of text as the synthesizer splits them, each within the XTTS length limit"""
+    limit = char_limit(language)
+    return [
+        piece
+        for sentence in tts.synthesizer.split_into_sentences(text)
+        for piece in split_long_sentence(sentence, limit)
+    ]
+
+def synthesize_to_file(text, voice_id, audio_path, language, output_path, effects=None):
+    """
+    Generate speech with cached speaker latents and write it to a WAV file.
+    Mirrors tts.tts_to_file (sentence splitting and padding) without re-conditioning.
+    effects are keyword arguments of audio_dsp.apply_effects, applied in memory before the file is written.
+    """
+    from TTS.utils.synthesizer import PAD_SILENCE_SAMPLES
+    tts = get_tts_model()
+    model = tts.synthesizer.tts_model
+    latents = get_speaker_latents(voice_id, audio_path)
+    inference_settings = get_inference_settings(model)
+    
+    wavs = []
+    with model_lock:
+        for sentence in split_for_synthesis(tts, text, language):
+            outputs = run_timed(lambda: model.inference(
+                sentence,
+                language,
+                latents['gpt_cond_latent'],
+                latents['speaker_embedding'],
+                **inference_settings
+            ))
+            wavs.append(np.asarray(outputs['wav']).squeeze())
+            wavs.append(np.zeros(PAD_SILENCE_SAMPLES, dtype=np.float32))
+    
+    if effects:
+        import soundfile as sf
+        from audio_dsp import apply_effects
+        with timed_stage('post_processing'):
+            wav, sample_rate = apply_effects(np.concatenate(wavs), tts.synthesizer.output_sample_rate, **effects)
+        with timed_stage('file_write'):
+            sf.write(str(output_path), wav, sample_rate, subtype='PCM_16')
+        return output_path
+    
+    with timed_stage('file_write'):
+        tts.synthesizer.save_wav(wav=np.concatenate(wavs), path=str(output_path))
+    return output_path
+
+def encode_text(model, sentence, language):
+    """Text tokens of a sentence, as Xtts.inference tokenizes it"""
+    return model.tokenizer.encode(sentence.strip().lower(), lang=language.split('-')[0])
+
+def generate_codes(model, sentences, language, latents, inference_settings):
+    """
+    Tokenize sentences of one voice into a batch and sample their audio codes with the XTTS GPT.
+    The GPT takes no text attention mask, so all sentences must have the same number of tokens
+    (padding would condition the shorter ones on extra stop tokens).
+    
+    Returns:
+        Dict with 'text_tokens', 'text_lengths', 'gpt_codes' and 'code_lengths' (codes up to each stop token)
+    """
+    import torch
+    device = model.device
+    gpt = model.gpt
+    
+    tokens = [encode_text(model, sentence, language) for sentence in sentences]
+    if len({len(t) for t in tokens}) > 1:
+        raise ValueError("Sentences of a batch must have the same number of text tokens")
+    text_tokens = torch.tensor(tokens, dtype=torch.int32, device=device)
+    text_lengths = torch.full((len(tokens),), text_tokens.shape[-1], device=device)
+    
+    gpt_cond_latent = latents['gpt_cond_latent'].to(device).expand(len(tokens), -1, -1)
+    
+    with torch.inference_mode():
+        gpt_codes = gpt.generate(
+            cond_latents=gpt_cond_latent,
+            text_inputs=text_tokens,
+            do_sample=True,
+            num_return_sequences=1,
+            num_beams=1,
+            output_attentions=False,
+            **inference_settings
+        )
+        # Sequences that finished early are padded with the stop token, keep each up to its own
+        is_stop = gpt_codes == gpt.stop_audio_token
+        code_lengths = torch.where(
+            is_stop.any(dim=1),
+            is_stop.int().argmax(dim=1) + 1,
+            torch.full_like(text_lengths, gpt_codes.shape[-1])
+        )
+    return {'text_tokens': text_tokens, 'text_lengths': text_lengths, 'gpt_codes': gpt_codes, 'code_lengths': code_lengths}
+
+def decode_codes(model, codes, latents):
+    """
+    Run generated codes through the GPT (latents) and the HiFi-GAN decoder, one waveform per sentence.
+    The GPT is causal, so codes padded after a sentence's stop token do not change its latents; the
+    decoder runs on each sentence's own latents, so its output does not see the padding either.
+    """
+    import torch
+    device = model.device
+    gpt = model.gpt
+    code_lengths = codes['code_lengths']
+    gpt_cond_latent = latents['gpt_cond_latent'].to(device).expand(len(code_lengths), -1, -1)
+    speaker_embedding = latents['speaker_embedding'].to(device)
+    
+    with torch.inference_mode():
+        gpt_latents = gpt(
+            codes['text_tokens'],
+            codes['text_lengths'],
+            codes['gpt_codes'],
+            code_lengths * gpt.code_stride_len,
+            cond_latents=gpt_cond_latent,
+            return_attentions=False,
+            return_latent=True
+        )
+        # Latents of a sentence end as many frames before the batch's as its codes are shorter
+        latent_lengths = gpt_latents.shape[1] - (code_lengths.max() - code_lengths)
+        return [
+            model.hifigan_decoder(gpt_latents[row:row + 1, :int(latent_lengths[row])], g=speaker_embedding)
+            .cpu().reshape(-1).numpy()
+            for row in range(len(code_lengths))
+        ]
+
+def infer_batch(model, sentences, language, latents, inference_settings):
+    """
+    Run several sentences of one voice (with the same number of text tokens) through the XTTS GPT
+    as one batch and decode each. Same steps as Xtts.inference, returns one waveform per sentence in input order.
+    """
+    return decode_codes(model, generate_codes(model, sentences, language, latents, inference_settings), latents)
+
+def synthesize_batch_to_files(texts, voice_id, audio_path, language, output_paths, batch_size=INFERENCE_BATCH_SIZE):
+    """
+    Synthesize several texts of one voice with batched inference and write one WAV per text.
+    
+    Sentences of all texts are grouped by their number of text tokens into batches of up to
+    batch_size, so no sentence is padded and each is conditioned exactly as in synthesize_to_file.
+    The files differ from synthesize_to_file's only as two samplings of the GPT do (and by float
+    rounding of batched kernels); sentences without a same-length partner run alone.
+    """
+    from TTS.utils.synthesizer import PAD_SILENCE_SAMPLES
+    tts = get_tts_model()
+    model = tts.synthesizer.tts_model
+    latents = get_speaker_latents(voice_id, audio_path)
+    inference_settings = get_inference_settings(model)
+    
+    sentences = [
+        (text_idx, sentence)
+        for text_idx, text in enumerate(texts)
+        for sentence in split_for_synthesis(tts, text, language)
+    ]
+    by_length = {}
+    for i, (_, sentence) in enumerate(sentences):
+        by_length.setdefault(len(encode_text(model, sentence, language)), []).append(i)
+    batches = [
+        group[start:start + max(1, batch_size)]
+        for _, group in sorted(by_length.items())
+        for start in range(0, len(group), max(1, batch_size))
+    ]
+    
+    sentence_wavs = [None] * len(sentences)
+    with model_lock:
+        for batch in batches:
+            wavs = run_timed(
+                lambda: infer_batch(model, [sentences[i][1] for i in batch], language, latents, inference_settings)
+            )
+            for i, wav in zip(batch, wavs):
+                sentence_wavs[i] = wav
+    
+    per_text = [[] for _ in texts]
+    for (text_idx, _), wav in zip(sentences, sentence_wavs):
+        per_text[text_idx].append(wav)
+        per_text[text_idx].append(np.zeros(PAD_SILENCE_SAMPLES, dtype=np.float32))
+    
+    for wavs, output_path in zip(per_text, output_paths):
+        if not wavs:
+            wavs = [np.zeros(PAD_SILENCE_SAMPLES, dtype=np.float32)]
+        with timed_stage('file_write'):
+            tts.synthesizer.save_wav(wav=np.concatenate(wavs), path=str(output_path))
+    return output_paths
+
+def stream_speech(text, voice_id, audio_path, language, stream_chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield 16-bit PCM frames as soon as XTTS decodes them.
+    The model is held from the first frame until the generator is exhausted or closed.
+    """
+    model = get_tts_model().synthesizer.tts_model
+    latents = get_speaker_latents(voice_id, audio_path)
+    
+    with model_lock:
+        frames = model.inference_stream(
+            text,
+            language,
+            latents['gpt_cond_latent'],
+            latents['speaker_embedding'],
+            stream_chunk_size=stream_chunk_size,
+            enable_text_splitting=True,
+            **get_inference_settings(model)
+        )
+        for frame in frames:
+            pcm = np.clip(frame.cpu().numpy(), -1.0, 1.0)
+            yield (pcm * 32767).astype('<i2').tobytes()
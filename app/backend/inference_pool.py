@@ -0,0 +1,284 @@
+"""
+Pool of inference worker processes
+Each worker loads its own XTTS replica so chunks are synthesized on all CPU cores
+instead of being serialized on the server's single model
+"""
+import atexit
+import itertools
+import multiprocessing as mp
+import threading
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+from metrics import replay_stages
+
+
+def _worker_main(worker_idx, threads_per_worker, conn, warmup=False):
+    """Entry point of a worker process: load a model replica (and warm it up) and synthesize tasks"""
+    import torch
+    if threads_per_worker > 0:
+        torch.set_num_threads(threads_per_worker)
+
+    import inference
+    from metrics import buffered_stages
+    with buffered_stages() as stages:
+        try:
+            inference.get_tts_model()
+        except Exception as e:
+            conn.send(('failed', None, str(e)))
+            return
+        if warmup:
+            try:
+                inference.warmup()
+            except Exception as e:
+                print(f"Inference worker {worker_idx} warmup failed: {str(e)}")
+    conn.send(('ready', None, None, stages))
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        task_id, function, kwargs = task
+        # Stage timings travel back with the result and are recorded by the server
+        with buffered_stages() as stages:
+            try:
+                message = ('done', task_id, getattr(inference, function)(**kwargs))
+            except Exception as e:
+                message = ('error', task_id, str(e))
+        conn.send(message + (stages,))
+
+
+def task_audio_path(audio_path):
+    """Reference audio in a picklable form (a path string, or a list of them for multi-sample voices)"""
+    if isinstance(audio_path, (list, tuple)):
+        return [str(path) for path in audio_path]
+    return str(audio_path)
+
+
+class InferencePool:
+    """
+    Dispatches synthesis tasks to a fixed number of worker processes.
+
+    Tasks wait in the parent and are handed to a worker only when it is idle,
+    so the pool always knows which task each worker is running. Results come
+    back as futures; callers keep their own ordering.
+    """
+
+    def __init__(self, num_workers, threads_per_worker=0, warmup=False):
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.warmup = warmup  # workers run a warmup synthesis before reporting ready
+        self.ctx = mp.get_context('spawn')
+        self.pending = deque()
+        self.futures = {}  # task_id -> future
+        self.task_ids = itertools.count()
+        self.lock = threading.Lock()
+        self.started = False
+        self.stopping = False
+        self.workers = [
+            {'process': None, 'conn': None, 'status': 'stopped', 'task': None,
+             'completed': 0, 'failed': 0, 'restarts': 0, 'error': None}
+            for _ in range(num_workers)
+        ]
+
+    def start(self):
+        """Spawn the worker processes (idempotent)"""
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+            for idx in range(self.num_workers):
+                self._spawn(idx)
+        threading.Thread(target=self._collect, name='inference-pool-collector', daemon=True).start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Ask workers to exit after their current task"""
+        with self.lock:
+            self.stopping = True
+            for worker in self.workers:
+                if worker['conn'] is not None and worker['status'] != 'failed':
+                    try:
+                        worker['conn'].send(None)
+                    except OSError:
+                        pass
+
+    def submit(self, function, **kwargs):
+        """Queue a call of an inference module function. Returns a Future resolving to its result."""
+        self.start()
+        future = Future()
+        task_id = next(self.task_ids)
+        with self.lock:
+            if all(worker['status'] == 'failed' for worker in self.workers):
+                future.set_exception(RuntimeError('No inference worker available'))
+                return future
+            self.futures[task_id] = future
+            self.pending.append((task_id, function, kwargs))
+            self._dispatch()
+        return future
+
+    def synthesize_to_file(self, text, voice_id, audio_path, language, output_path, effects=None):
+        """Blocking synthesis on the next free worker"""
+        return self.submit(
+            'synthesize_to_file', text=text, voice_id=voice_id, audio_path=task_audio_path(audio_path),
+            language=language, output_path=str(output_path), effects=effects
+        ).result()
+
+    def synthesize_batch_to_files(self, texts, voice_id, audio_path, language, output_paths):
+        """Blocking batched synthesis of several texts on the next free worker"""
+        return self.submit(
+            'synthesize_batch_to_files', texts=list(texts), voice_id=voice_id, audio_path=task_audio_path(audio_path),
+            language=language, output_paths=[str(path) for path in output_paths]
+        ).result()
+
+    def compute_speaker_latents(self, voice_id, audio_path):
+        """Blocking conditioning of a voice on the next free worker, the latents are persisted for every process"""
+        return self.submit(
+            'precompute_speaker_latents', voice_id=voice_id, audio_path=task_audio_path(audio_path)
+        ).result()
+
+    def status(self):
+        """Per-worker status for the health endpoint"""
+        with self.lock:
+            return [
+                {
+                    'worker': idx,
+                    'pid': worker['process'].pid if worker['process'] else None,
+                    'alive': bool(worker['process'] and worker['process'].is_alive()),
+                    'status': worker['status'],
+                    'completed': worker['completed'],
+                    'failed': worker['failed'],
+                    'restarts': worker['restarts'],
+                    'error': worker['error']
+                }
+                for idx, worker in enumerate(self.workers)
+            ]
+
+    def ready_workers(self):
+        """Number of workers that loaded their model and accept tasks"""
+        with self.lock:
+            return sum(1 for worker in self.workers if worker['status'] in ('idle', 'busy'))
+
+    def queue_depth(self):
+        """Tasks waiting for a free worker"""
+        with self.lock:
+            return len(self.pending)
+
+    def _spawn(self, idx):
+        """Start (or restart) worker idx. Caller holds the lock."""
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(idx, self.threads_per_worker, child_conn, self.warmup),
+            name=f"inference-worker-{idx}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self.workers[idx].update({'process': process, 'conn': parent_conn, 'status': 'loading', 'task': None})
+
+    def _dispatch(self):
+        """Hand pending tasks to idle workers. Caller holds the lock."""
+        for worker in self.workers:
+            if not self.pending:
+                return
+            if worker['status'] != 'idle':
+                continue
+            task = self.pending.popleft()
+            worker.update({'status': 'busy', 'task': task[0]})
+            worker['conn'].send(task)
+
+    def _resolve(self, task_id, result=None, error=None):
+        with self.lock:
+            future = self.futures.pop(task_id, None)
+        if future is None:
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(RuntimeError(error))
+
+    def _collect(self):
+        """Receive worker messages, resolve futures and restart crashed workers"""
+        while True:
+            with self.lock:
+                waitables = {}
+                for idx, worker in enumerate(self.workers):
+                    if worker['status'] != 'failed':
+                        waitables[worker['conn']] = idx
+                        waitables[worker['process'].sentinel] = idx
+
+            for ready in wait(list(waitables), timeout=1.0):
+                idx = waitables[ready]
+                worker = self.workers[idx]
+                if ready is worker['conn']:
+                    try:
+                        message = worker['conn'].recv()
+                    except (EOFError, OSError):
+                        continue  # process exit is handled through its sentinel
+                    self._handle_message(idx, *message)
+                elif ready == worker['process'].sentinel:
+                    self._handle_exit(idx)
+
+            with self.lock:
+                self._dispatch()
+
+    def _handle_message(self, idx, event, task_id, payload, stages=()):
+        replay_stages(stages)
+        with self.lock:
+            worker = self.workers[idx]
+            if event == 'ready':
+                worker.update({'status': 'idle', 'error': None})
+            elif event == 'done':
+                worker.update({'status': 'idle', 'task': None})
+                worker['completed'] += 1
+            elif event == 'error':
+                worker.update({'status': 'idle', 'task': None})
+                worker['failed'] += 1
+            elif event == 'failed':
+                worker.update({'status': 'failed', 'error': payload})
+
+        # payload is the result for 'done' and an error message otherwise
+        if event == 'done':
+            self._resolve(task_id, result=payload)
+        elif event == 'error':
+            self._resolve(task_id, error=payload)
+        elif event == 'failed':
+            print(f"Inference worker {idx} could not load the model: {payload}")
+            self._fail_if_no_workers(payload)
+
+    def _handle_exit(self, idx):
+        """Fail the in-flight task of a dead worker and replace the process"""
+        with self.lock:
+            worker = self.workers[idx]
+            process = worker['process']
+            process.join()
+            if self.stopping or worker['status'] == 'failed':
+                return
+            lost_task = worker['task']
+            if worker['status'] == 'loading':
+                # Died before becoming ready, restarting would only crash again
+                worker.update({'status': 'failed', 'error': f"exited during startup with code {process.exitcode}"})
+            else:
+                worker['restarts'] += 1
+                self._spawn(idx)
+            restarted = worker['status'] != 'failed'
+
+        if lost_task is not None:
+            self._resolve(lost_task, error=f"Inference worker {idx} crashed")
+        if restarted:
+            print(f"Inference worker {idx} exited with code {process.exitcode}, restarted")
+        else:
+            print(f"Inference worker {idx} {worker['error']}")
+            self._fail_if_no_workers(worker['error'])
+
+    def _fail_if_no_workers(self, error):
+        """Fail every pending task when no worker could load the model"""
+        with self.lock:
+            if any(worker['status'] != 'failed' for worker in self.workers):
+                return
+            pending = [task[0] for task in self.pending]
+            self.pending.clear()
+        for task_id in pending:
+            self._resolve(task_id, error=f"No inference worker available: {error}")
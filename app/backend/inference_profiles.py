@@ -0,0 +1,94 @@
+"""
+CPU inference profiles for XTTS
+fp32 is the reference. int8 applies dynamic int8 quantization to the linear
+layers of the GPT (the autoregressive loop that dominates CPU time), bf16 runs
+the GPT and the HiFi-GAN vocoder under bfloat16 autocast, and compile wraps
+the GPT transformer and the vocoder generator in torch.compile.
+Use benchmarks.bench_profiles to measure speed and quality against fp32.
+"""
+import functools
+
+PROFILES = ('fp32', 'int8', 'bf16')
+
+
+def conv1d_to_linear(module):
+    """Replace the transformers Conv1D layers of GPT-2 with equivalent nn.Linear layers (quantizable)"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features, bias=child.bias is not None)
+            with torch.no_grad():
+                linear.weight.copy_(child.weight.t())
+                if child.bias is not None:
+                    linear.bias.copy_(child.bias)
+            setattr(module, name, linear)
+        else:
+            conv1d_to_linear(child)
+
+
+def quantize_gpt(model):
+    """Dynamic int8 quantization of every linear layer of the XTTS GPT"""
+    import torch
+    conv1d_to_linear(model.gpt)
+    torch.ao.quantization.quantize_dynamic(model.gpt, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _to_float(value):
+    import torch
+    if isinstance(value, torch.Tensor) and value.is_floating_point():
+        return value.float()
+    return value
+
+
+def autocast_method(obj, name, dtype):
+    """Run obj.name under CPU autocast, returning float32 tensors so callers keep working in fp32"""
+    import torch
+    method = getattr(obj, name)
+
+    @functools.wraps(method)
+    def wrapped(*args, **kwargs):
+        with torch.autocast('cpu', dtype=dtype):
+            result = method(*args, **kwargs)
+        if isinstance(result, tuple):
+            return tuple(_to_float(item) for item in result)
+        return _to_float(result)
+
+    setattr(obj, name, wrapped)
+
+
+def compile_hot_modules(model):
+    """torch.compile the GPT transformer and the vocoder generator (falls back to eager if compilation fails)"""
+    import torch
+    import torch._dynamo
+    torch._dynamo.config.suppress_errors = True
+    # Patch forward in place: the GPT inference wrapper holds its own reference to the transformer
+    for module in (model.gpt.gpt, model.hifigan_decoder.waveform_decoder):
+        module.forward = torch.compile(module.forward, dynamic=True)
+
+
+def apply_profile(model, profile='fp32', compile=False):
+    """
+    Apply an inference profile to a loaded XTTS model (model.synthesizer.tts_model), in place.
+
+    Returns:
+        Name of the applied profile, as used in model version strings (e.g. 'int8+compile')
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown inference profile {profile!r}, use one of: {', '.join(PROFILES)}")
+    if profile != 'fp32' and next(model.parameters()).is_cuda:
+        print(f"Inference profile {profile} is for CPU inference, keeping fp32 on GPU")
+        profile = 'fp32'
+
+    if profile == 'int8':
+        quantize_gpt(model)
+    elif profile == 'bf16':
+        import torch
+        autocast_method(model.gpt, 'generate', torch.bfloat16)
+        autocast_method(model.gpt, 'forward', torch.bfloat16)
+        autocast_method(model.hifigan_decoder, 'forward', torch.bfloat16)
+    if compile:
+        compile_hot_modules(model)
+    return profile + ('+compile' if compile else '')
@@ -0,0 +1,367 @@
+"""
+Durable background jobs for long synthesis runs
+Jobs are processed chunk by chunk and persisted under a jobs directory,
+so progress can be polled and a restarted server resumes where it stopped
+"""
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+UNFINISHED = (QUEUED, RUNNING)
+
+
+class JobQueue:
+    """
+    Persistent job queue processed by background worker threads.
+
+    Each job is stored as two files in jobs_dir:
+        <job_id>.json          - job type, parameters, items and status
+        <job_id>.chunks.jsonl  - one result per completed item, appended as it finishes
+
+    Finished jobs are deleted (record and files) by expire() once not updated for ttl_seconds.
+    """
+
+    def __init__(self, jobs_dir, num_workers=1, chunk_workers=1, batch_size=1, ttl_seconds=0):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.num_workers = num_workers
+        self.chunk_workers = chunk_workers
+        self.batch_size = batch_size
+        self.ttl_seconds = ttl_seconds  # 0 keeps finished jobs forever
+        self.handlers = {}
+        self.batch_handlers = {}
+        self.jobs = {}
+        self.lock = threading.Lock()
+        # Notified whenever a job records a result or changes status
+        self.changed = threading.Condition(self.lock)
+        self.pending = queue.Queue()
+        self.workers = []
+
+    def register(self, job_type, handler, batch_handler=None):
+        """
+        Register the function that processes one item of a job type
+
+        Args:
+            job_type: Name of the job type (e.g. 'pdf')
+            handler: Called as handler(params, index, item) and returns a result dict
+            batch_handler: Optional, called as batch_handler(params, [(index, item), ...]) with up to
+                batch_size items and returns one result dict per item. If it raises, the items
+                are retried one by one with handler.
+        """
+        self.handlers[job_type] = handler
+        if batch_handler is not None:
+            self.batch_handlers[job_type] = batch_handler
+
+    def start(self):
+        """Start worker threads, re-enqueue jobs left unfinished by a previous run and delete expired ones"""
+        if self.workers:
+            return
+
+        for job_file in sorted(self.jobs_dir.glob('*.json')):
+            # Jobs submitted by this process are already queued
+            if job_file.stem in self.jobs:
+                continue
+            try:
+                job = self._load(job_file.stem)
+            except Exception as e:
+                print(f"Skipping unreadable job {job_file.name}: {str(e)}")
+                continue
+            if self._expired(job):
+                self._delete_files(job['id'])
+                continue
+            with self.lock:
+                self.jobs.setdefault(job['id'], job)
+            if job['status'] in UNFINISHED:
+                print(f"Resuming job {job['id']} at {len(job['results'])}/{job['total_chunks']} chunks")
+                self.pending.put(job['id'])
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, job_type, items, params=None):
+        """Persist a new job and queue it for processing. Returns the job id."""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        now = datetime.now().isoformat()
+        job = {
+            'id': str(uuid.uuid4()),
+            'type': job_type,
+            'status': QUEUED,
+            'params': params or {},
+            'items': list(items),
+            'total_chunks': len(items),
+            'created_at': now,
+            'updated_at': now,
+            'error': None,
+            'chunks_per_second': None,
+            'results': []
+        }
+        with self.lock:
+            self.jobs[job['id']] = job
+        self._save(job)
+        self.pending.put(job['id'])
+        return job['id']
+
+    def get(self, job_id):
+        """Return a progress snapshot of a job, or None if it does not exist"""
+        job = self._lookup(job_id)
+        if job is None:
+            return None
+
+        with self.lock:
+            results = sorted(job['results'], key=lambda r: r['index'])
+            successful = sum(1 for r in results if r.get('success', False))
+            return {
+                'job_id': job['id'],
+                'type': job['type'],
+                'status': job['status'],
+                'total_chunks': job['total_chunks'],
+                'completed_chunks': len(results),
+                'progress': round(len(results) / job['total_chunks'], 4) if job['total_chunks'] else 1.0,
+                'successful': successful,
+                'failed': len(results) - successful,
+                'results': results,
+                'created_at': job['created_at'],
+                'updated_at': job['updated_at'],
+                'chunks_per_second': job.get('chunks_per_second'),
+                'error': job['error']
+            }
+
+    def wait(self, job_id, after=0, status=None, timeout=None):
+        """
+        Block until a job has recorded more than `after` results or its status is no longer
+        `status` (the last one the caller saw), or timeout passes
+
+        Returns:
+            Dict with the job's 'status', 'error', 'total_chunks' and 'completed_chunks', and the
+            'results' recorded after the first `after` in completion order, or None if the job does not exist
+        """
+        job = self._lookup(job_id)
+        if job is None:
+            return None
+
+        with self.changed:
+            self.changed.wait_for(
+                lambda: len(job['results']) > after or job['status'] != status, timeout
+            )
+            return {
+                'status': job['status'],
+                'error': job['error'],
+                'total_chunks': job['total_chunks'],
+                'completed_chunks': len(job['results']),
+                'results': [dict(result) for result in job['results'][after:]]
+            }
+
+    def retained_results(self):
+        """Results recorded so far by every job not yet expired (unfinished, or finished within the TTL)"""
+        with self.lock:
+            return [result for job in self.jobs.values() for result in job['results']]
+
+    def expire(self):
+        """Delete finished jobs not updated within the TTL, in memory and on disk. Returns the number deleted."""
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items() if self._expired(job)]
+            for job_id in expired:
+                del self.jobs[job_id]
+        for job_id in expired:
+            self._delete_files(job_id)
+        return len(expired)
+
+    def queue_depth(self):
+        """Number of jobs waiting for a worker"""
+        return self.pending.qsize()
+
+    def _worker(self):
+        while True:
+            job_id = self.pending.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"Job {job_id} failed: {str(e)}")
+                traceback.print_exc()
+                self._set_status(job_id, FAILED, error=str(e))
+            finally:
+                self.pending.task_done()
+
+    def _run(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            job = self._load(job_id)
+            with self.lock:
+                job = self.jobs.setdefault(job_id, job)
+
+        handler = self.handlers[job['type']]
+        done = {r['index'] for r in job['results']}
+        self._rewrite_chunks(job)
+        self._set_status(job_id, RUNNING)
+
+        # Skip chunks finished before a restart
+        todo = [(idx, item) for idx, item in enumerate(job['items']) if idx not in done]
+
+        # Consecutive chunks go to the batch handler together when one is registered
+        batch_handler = self.batch_handlers.get(job['type'])
+        if batch_handler is None or self.batch_size <= 1:
+            batch_handler = None
+            groups = [[entry] for entry in todo]
+        else:
+            groups = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+
+        def run_group(group):
+            if batch_handler is None:
+                self._run_chunk(job, handler, *group[0])
+            else:
+                self._run_batch(job, handler, batch_handler, group)
+
+        start = time.time()
+        if self.chunk_workers > 1:
+            # Chunks run concurrently; results are recorded as they finish
+            with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+                futures = [executor.submit(run_group, group) for group in groups]
+                for future in futures:
+                    future.result()
+        else:
+            for group in groups:
+                run_group(group)
+
+        elapsed = time.time() - start
+        if todo and elapsed > 0:
+            with self.lock:
+                job['chunks_per_second'] = round(len(todo) / elapsed, 3)
+            print(f"Job {job_id}: {len(todo)} chunks in {elapsed:.1f}s "
+                  f"({job['chunks_per_second']} chunks/s, batch size {self.batch_size if batch_handler else 1})")
+        self._set_status(job_id, COMPLETED)
+
+    def _run_batch(self, job, handler, batch_handler, group):
+        start = time.perf_counter()
+        try:
+            results = batch_handler(job['params'], group)
+        except Exception as e:
+            print(f"Batch of {len(group)} chunks failed ({str(e)}), retrying one by one")
+            for idx, item in group:
+                self._run_chunk(job, handler, idx, item)
+            return
+        # Chunks of a batch finish together, each gets the time of the whole batch
+        seconds = round(time.perf_counter() - start, 3)
+        for (idx, _), result in zip(group, results):
+            result['seconds'] = seconds
+            result['batch_size'] = len(group)
+            self._record(job, idx, result)
+
+    def _run_chunk(self, job, handler, idx, item):
+        start = time.perf_counter()
+        try:
+            result = handler(job['params'], idx, item)
+        except Exception as e:
+            result = {'index': idx, 'success': False, 'error': str(e)}
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        self._record(job, idx, result)
+
+    def _record(self, job, idx, result):
+        """Persist one chunk result and update progress"""
+        result['index'] = idx
+
+        with self.lock:
+            with open(self._chunks_path(job['id']), 'a') as f:
+                f.write(json.dumps(result) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            job['results'].append(result)
+            job['updated_at'] = datetime.now().isoformat()
+            self.changed.notify_all()
+
+    def _set_status(self, job_id, status, error=None):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = status
+            job['error'] = error
+            job['updated_at'] = datetime.now().isoformat()
+            self.changed.notify_all()
+        self._save(job)
+
+    def _lookup(self, job_id):
+        """The in-memory job, loaded from disk on first access, or None if it does not exist"""
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            try:
+                job = self._load(job_id)
+            except FileNotFoundError:
+                return None
+            with self.lock:
+                job = self.jobs.setdefault(job_id, job)
+        return job
+
+    def _expired(self, job):
+        if not self.ttl_seconds or job['status'] in UNFINISHED:
+            return False
+        return datetime.fromisoformat(job['updated_at']) < datetime.now() - timedelta(seconds=self.ttl_seconds)
+
+    def _delete_files(self, job_id):
+        self._job_path(job_id).unlink(missing_ok=True)
+        self._chunks_path(job_id).unlink(missing_ok=True)
+
+    def _job_path(self, job_id):
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _chunks_path(self, job_id):
+        return self.jobs_dir / f"{job_id}.chunks.jsonl"
+
+    def _save(self, job):
+        """Atomically write job metadata (results live in the chunks file)"""
+        with self.lock:
+            data = {k: v for k, v in job.items() if k != 'results'}
+        tmp_path = self._job_path(job['id']).with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._job_path(job['id']))
+
+    def _rewrite_chunks(self, job):
+        """Rewrite the chunks file from known results, dropping any torn trailing line"""
+        tmp_path = self._chunks_path(job['id']).with_suffix('.jsonl.tmp')
+        with self.lock:
+            lines = [json.dumps(r) + '\n' for r in job['results']]
+        with open(tmp_path, 'w') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self._chunks_path(job['id']))
+
+    def _load(self, job_id):
+        with open(self._job_path(job_id), 'r') as f:
+            job = json.load(f)
+
+        results = {}
+        chunks_path = self._chunks_path(job_id)
+        if chunks_path.exists():
+            with open(chunks_path, 'r') as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write from a crash, the chunk will be redone
+                        continue
+                    results[result['index']] = result
+        job['results'] = list(results.values())
+        return job
@@ -0,0 +1,212 @@
+"""
+Metrics in the Prometheus text exposition format
+Counters, gauges and histograms for the synthesis pipeline, rendered without
+a client library. Stage timings observed inside inference worker processes
+are buffered per task and replayed in the server process.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds, from a short HTTP request up to a long chunk synthesis on CPU
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+PREFIX = 'voiceclone_'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """A named metric with one value (or histogram) per label combination"""
+
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.label_names)
+
+    def samples(self):
+        """(sample name, labels, value) triples"""
+        with self.lock:
+            return [(self.name, key, value) for key, value in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total) in self.values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", key + (('le', _format_value(bound)),), cumulative))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, cumulative))
+        return samples
+
+
+class Registry:
+    """Metrics of the process, plus collectors that read current values at scrape time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        Register a callable run on every scrape. It returns a list of
+        (name, help, type, [(labels dict, value), ...]) describing current values.
+        """
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                collected = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+                continue
+            for name, documentation, metric_type, values in collected:
+                lines.append(f"# HELP {PREFIX}{name} {documentation}")
+                lines.append(f"# TYPE {PREFIX}{name} {metric_type}")
+                for labels, value in values:
+                    if value is not None:
+                        lines.append(f"{PREFIX}{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'stage_seconds',
+    'Time spent per pipeline stage (model_load, translation, reference_ingest, speaker_conditioning, gpt, vocoder, '
+    'post_processing, file_write)',
+    labels=('stage',)
+))
+
+_stage_buffer = threading.local()
+
+
+def observe_stage(stage, seconds):
+    """Record one stage timing (buffered while inside buffered_stages)"""
+    buffer = getattr(_stage_buffer, 'items', None)
+    if buffer is not None:
+        buffer.append((stage, seconds))
+    else:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+@contextmanager
+def timed_stage(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def buffered_stages():
+    """Collect stage timings of this thread in a list instead of recording them (worker processes send it back)"""
+    _stage_buffer.items = []
+    try:
+        yield _stage_buffer.items
+    finally:
+        _stage_buffer.items = None
+
+
+def replay_stages(stages):
+    """Record stage timings collected by buffered_stages in another process"""
+    for stage, seconds in stages:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def process_memory_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
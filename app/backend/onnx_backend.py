@@ -0,0 +1,297 @@
+"""
+ONNX Runtime backend for XTTS
+The GPT transformer, the HiFi-GAN generator and the speaker encoder are exported
+to ONNX once, cached under ONNX_DIR, and run with ONNX Runtime's CPU execution
+provider. The loaded TTS object keeps its interface: the three modules are
+swapped for ONNX-backed drop-ins and their torch weights are released, while
+tokenization, sampling, embeddings and the conditioning perceiver stay in torch.
+The GPT graph takes and returns the attention KV cache, so each decoding step
+only runs the newest token through the transformer.
+"""
+import os
+import numpy as np
+from config import ONNX_DIR
+
+OPSET = 17
+
+
+def get_graph_dir(version):
+    """Directory of the exported graphs of one TTS library version"""
+    return ONNX_DIR / f"xtts_v2-{version}"
+
+
+def export_graph(module, args, path, input_names, output_names, dynamic_axes):
+    """Export a module to path, written atomically (inference workers may export at the same time)"""
+    import torch
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            module, args, str(tmp_path),
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+            do_constant_folding=True,
+            dynamo=False
+        )
+    os.replace(tmp_path, path)
+
+
+def create_session(path):
+    """ONNX Runtime CPU session using as many threads as torch"""
+    import onnxruntime
+    import torch
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = torch.get_num_threads()
+    return onnxruntime.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+
+
+def to_numpy(tensor):
+    return tensor.detach().cpu().float().numpy()
+
+
+def make_cache(layers):
+    """Cache object the installed transformers expects, from per-layer (key, value) tensors"""
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return tuple(layers)
+    return DynamicCache.from_legacy_cache(tuple(layers))
+
+
+def legacy_cache(cache):
+    """Per-layer (key, value) tensors of a cache object or tuple, or None if empty"""
+    if cache is None:
+        return None
+    if hasattr(cache, 'get_seq_length'):
+        if cache.get_seq_length() == 0:
+            return None
+        return cache.to_legacy_cache()
+    return cache
+
+
+def export_gpt(transformer, path):
+    import torch
+    config = transformer.config
+    heads, layers = config.n_head, config.n_layer
+    head_dim = config.n_embd // heads
+    past_length, new_length = 3, 2
+    past = [torch.randn(1, heads, past_length, head_dim) for _ in range(2 * layers)]
+    past_names = [f"past_{kind}_{i}" for i in range(layers) for kind in ('key', 'value')]
+    present_names = [f"present_{kind}_{i}" for i in range(layers) for kind in ('key', 'value')]
+
+    class Wrapper(torch.nn.Module):
+        """Flat tensor signature for export: (embeds, mask, *past) -> (hidden, *present)"""
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, inputs_embeds, attention_mask, *past):
+            # Build the 4D additive causal mask here, the transformers mask helpers do not trace
+            new_length, total_length = inputs_embeds.shape[1], attention_mask.shape[1]
+            positions = torch.arange(total_length)
+            query_positions = positions[total_length - new_length:].unsqueeze(1)
+            allowed = (positions.unsqueeze(0) <= query_positions).unsqueeze(0) & attention_mask.bool()[:, None, :]
+            mask = torch.zeros(allowed.shape, dtype=inputs_embeds.dtype).masked_fill(
+                ~allowed, torch.finfo(inputs_embeds.dtype).min
+            )
+            outputs = self.transformer(
+                inputs_embeds=inputs_embeds,
+                attention_mask=mask.unsqueeze(1),
+                past_key_values=make_cache(list(zip(past[0::2], past[1::2]))),
+                use_cache=True,
+                return_dict=True
+            )
+            present = legacy_cache(outputs.past_key_values)
+            return (outputs.last_hidden_state, *[tensor for layer in present for tensor in layer])
+
+    dynamic_axes = {
+        'inputs_embeds': {0: 'batch', 1: 'new'},
+        'attention_mask': {0: 'batch', 1: 'total'},
+        'last_hidden_state': {0: 'batch', 1: 'new'},
+        **{name: {0: 'batch', 2: 'past'} for name in past_names},
+        **{name: {0: 'batch', 2: 'total'} for name in present_names}
+    }
+    export_graph(
+        Wrapper(),
+        (torch.randn(1, new_length, config.n_embd), torch.ones(1, past_length + new_length, dtype=torch.int64), *past),
+        path, ['inputs_embeds', 'attention_mask', *past_names], ['last_hidden_state', *present_names], dynamic_axes
+    )
+
+
+def export_vocoder(generator, channels, path):
+    import torch
+
+    class Wrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.generator = generator
+
+        def forward(self, z, g):
+            return self.generator(z, g=g)
+
+    export_graph(
+        Wrapper(), (torch.randn(1, channels, 20), torch.randn(1, 512, 1)), path,
+        ['z', 'g'], ['wav'], {'z': {0: 'batch', 2: 'frames'}, 'g': {0: 'batch'}, 'wav': {0: 'batch', 2: 'samples'}}
+    )
+
+
+def export_speaker_encoder(encoder, path):
+    """Export the speaker encoder after its mel spectrogram, the torchaudio STFT does not export"""
+    import torch
+
+    class Wrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, spec):
+            return self.encoder(spec, l2_norm=False)
+
+    with torch.no_grad():
+        spec = encoder.torch_spec(torch.randn(1, 16000))
+    encoder.use_torch_spec = False
+    try:
+        export_graph(
+            Wrapper(), (spec,), path,
+            ['spec'], ['embedding'], {'spec': {0: 'batch', 2: 'frames'}, 'embedding': {0: 'batch'}}
+        )
+    finally:
+        encoder.use_torch_spec = True
+
+
+def quantize_graph(path, quantized_path):
+    """Dynamic int8 quantization of the weights of an exported graph"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    tmp_path = quantized_path.with_name(f"{quantized_path.name}.{os.getpid()}.tmp")
+    quantize_dynamic(str(path), str(tmp_path), weight_type=QuantType.QInt8)
+    os.replace(tmp_path, quantized_path)
+
+
+def make_modules():
+    """torch.nn.Module drop-ins running the exported graphs (defined lazily, torch is imported on use)"""
+    import torch
+    from transformers.modeling_outputs import BaseModelOutputWithPastAndCrossAttentions
+
+    class OnnxGPT(torch.nn.Module):
+        """Replaces the GPT2Model of XTTS, same call signature and KV cache handling"""
+
+        def __init__(self, session, config):
+            super().__init__()
+            self.session = session
+            self.config = config
+            self.head_dim = config.n_embd // config.n_head
+
+        def forward(self, inputs_embeds=None, past_key_values=None, attention_mask=None, use_cache=None,
+                    output_hidden_states=None, return_dict=None, **kwargs):
+            batch, new_length = inputs_embeds.shape[:2]
+            past = legacy_cache(past_key_values)
+            past_length = past[0][0].shape[2] if past else 0
+            if attention_mask is None:
+                attention_mask = torch.ones(batch, past_length + new_length, dtype=torch.int64)
+
+            feed = {'inputs_embeds': to_numpy(inputs_embeds), 'attention_mask': attention_mask.cpu().long().numpy()}
+            for i in range(self.config.n_layer):
+                for kind, index in (('key', 0), ('value', 1)):
+                    feed[f"past_{kind}_{i}"] = (
+                        to_numpy(past[i][index]) if past
+                        else np.zeros((batch, self.config.n_head, 0, self.head_dim), dtype=np.float32)
+                    )
+            outputs = [torch.from_numpy(output) for output in self.session.run(None, feed)]
+            hidden = outputs[0].to(inputs_embeds.dtype)
+            present = list(zip(outputs[1::2], outputs[2::2]))
+
+            cache = None
+            if use_cache or past_key_values is not None:
+                if hasattr(past_key_values, 'update'):
+                    # Generation owns the cache object, append the new positions to it
+                    for i, (key, value) in enumerate(present):
+                        past_key_values.update(key[:, :, past_length:], value[:, :, past_length:], i)
+                    cache = past_key_values
+                else:
+                    cache = tuple(present)
+            return BaseModelOutputWithPastAndCrossAttentions(
+                last_hidden_state=hidden,
+                past_key_values=cache,
+                hidden_states=(hidden,) if output_hidden_states else None
+            )
+
+    class OnnxVocoder(torch.nn.Module):
+        """Replaces the HiFi-GAN generator inside the XTTS HifiDecoder"""
+
+        def __init__(self, session):
+            super().__init__()
+            self.session = session
+
+        def forward(self, z, g=None):
+            # HifiDecoder squeezes single-item batches to (channels, frames), which conv1d accepts unbatched
+            unbatched = z.dim() == 2
+            wav = self.session.run(None, {'z': to_numpy(z[None] if unbatched else z), 'g': to_numpy(g)})[0]
+            return torch.from_numpy(wav[0] if unbatched else wav)
+
+    class OnnxSpeakerEncoder(torch.nn.Module):
+        """Replaces the ResNet speaker encoder used for voice conditioning, the mel spectrogram stays in torch"""
+
+        def __init__(self, session, torch_spec):
+            super().__init__()
+            self.session = session
+            self.torch_spec = torch_spec
+
+        def forward(self, x, l2_norm=False):
+            spec = self.torch_spec(x.reshape(x.shape[0], -1))
+            embedding = torch.from_numpy(self.session.run(None, {'spec': to_numpy(spec)})[0])
+            return torch.nn.functional.normalize(embedding, p=2, dim=1) if l2_norm else embedding
+
+    return OnnxGPT, OnnxVocoder, OnnxSpeakerEncoder
+
+
+def use_onnx_runtime(model, version, profile='fp32'):
+    """
+    Swap the GPT transformer, vocoder and speaker encoder of a loaded XTTS model
+    (model.synthesizer.tts_model) for ONNX Runtime sessions, exporting them on first use.
+
+    Args:
+        model: XTTS model on the CPU
+        version: TTS library version, exported graphs are kept per version
+        profile: 'int8' runs a weight-quantized GPT graph, other profiles use fp32 graphs
+
+    Returns:
+        Name of the backend and profile, as used in model version strings (e.g. 'onnx+int8')
+    """
+    if next(model.parameters()).is_cuda:
+        print("The ONNX Runtime backend runs on the CPU, keeping torch on GPU")
+        return None
+    if profile not in ('fp32', 'int8'):
+        print(f"Inference profile {profile} is not available with ONNX Runtime, using fp32 graphs")
+        profile = 'fp32'
+
+    graph_dir = get_graph_dir(version)
+    gpt_path = graph_dir / 'gpt.onnx'
+    vocoder_path = graph_dir / 'hifigan.onnx'
+    encoder_path = graph_dir / 'speaker_encoder.onnx'
+    decoder = model.hifigan_decoder
+    if not gpt_path.exists():
+        print(f"Exporting the XTTS GPT to {gpt_path}")
+        export_gpt(model.gpt.gpt, gpt_path)
+    if not vocoder_path.exists():
+        print(f"Exporting the HiFi-GAN decoder to {vocoder_path}")
+        export_vocoder(decoder.waveform_decoder, decoder.waveform_decoder.conv_pre.in_channels, vocoder_path)
+    if not encoder_path.exists():
+        print(f"Exporting the speaker encoder to {encoder_path}")
+        export_speaker_encoder(decoder.speaker_encoder, encoder_path)
+    if profile == 'int8':
+        quantized_path = graph_dir / 'gpt.int8.onnx'
+        if not quantized_path.exists():
+            quantize_graph(gpt_path, quantized_path)
+        gpt_path = quantized_path
+
+    OnnxGPT, OnnxVocoder, OnnxSpeakerEncoder = make_modules()
+    # The GPT2InferenceModel used for generation shares the transformer with model.gpt
+    transformer = OnnxGPT(create_session(gpt_path), model.gpt.gpt.config)
+    model.gpt.gpt = transformer
+    model.gpt.gpt_inference.transformer = transformer
+    decoder.waveform_decoder = OnnxVocoder(create_session(vocoder_path))
+    decoder.speaker_encoder = OnnxSpeakerEncoder(create_session(encoder_path), decoder.speaker_encoder.torch_spec)
+    return 'onnx' if profile == 'fp32' else f"onnx+{profile}"
@@ -0,0 +1,155 @@
+"""
+PDF text extraction
+Uploads are spooled to disk, pages are read lazily (in worker processes for
+large documents) and every page's text is cached by the PDF's content hash
+"""
+import hashlib
+import multiprocessing as mp
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SPOOL_BLOCK_SIZE = 1 << 20
+
+
+def spool_upload(file_storage, spool_dir=None):
+    """
+    Write an uploaded file to disk block by block while hashing it
+
+    Returns:
+        (path of the spooled file, sha256 of its content)
+    """
+    sha = hashlib.sha256()
+    fd, path = tempfile.mkstemp(suffix='.pdf', dir=spool_dir)
+    with os.fdopen(fd, 'wb') as f:
+        for block in iter(lambda: file_storage.stream.read(SPOOL_BLOCK_SIZE), b''):
+            sha.update(block)
+            f.write(block)
+    return Path(path), sha.hexdigest()
+
+
+def parse_page_ranges(spec, page_count):
+    """
+    Parse a 1-based page selection such as "1-5,8,12-" into sorted 0-based indices
+
+    Open ranges run to the last page. An empty spec selects every page.
+    Raises ValueError for malformed or out-of-range selections.
+    """
+    if not spec or not spec.strip():
+        return list(range(page_count))
+
+    pages = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, _, stop = part.partition('-')
+            start = int(start) if start.strip() else 1
+            stop = int(stop) if stop.strip() else page_count
+        else:
+            start = stop = int(part)
+        if start < 1 or stop > page_count or start > stop:
+            raise ValueError(f"Invalid page range '{part}' for a document with {page_count} pages")
+        pages.update(range(start - 1, stop))
+    return sorted(pages)
+
+
+def _extract_range(pdf_path, page_indices):
+    """Extract the text of a few pages (runs in a worker process)"""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(str(pdf_path))
+    return [reader.pages[idx].extract_text() or '' for idx in page_indices]
+
+
+class PdfExtractor:
+    """
+    Page-level text extraction with a persistent per-page cache.
+
+    Pages missing from the cache are extracted in the request thread for small
+    documents, and in a process pool when at least parallel_min_pages are missing.
+    """
+
+    def __init__(self, cache_path, workers=None, parallel_min_pages=50, pages_per_task=16):
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        self.executor = None
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(cache_path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS documents (pdf_hash TEXT PRIMARY KEY, page_count INTEGER)')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'pdf_hash TEXT, page INTEGER, text TEXT, PRIMARY KEY (pdf_hash, page))'
+        )
+        self.db.commit()
+
+    def page_count(self, pdf_path, pdf_hash):
+        with self.lock:
+            row = self.db.execute('SELECT page_count FROM documents WHERE pdf_hash = ?', (pdf_hash,)).fetchone()
+        if row:
+            return row[0]
+        import PyPDF2
+        count = len(PyPDF2.PdfReader(str(pdf_path)).pages)
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO documents VALUES (?, ?)', (pdf_hash, count))
+            self.db.commit()
+        return count
+
+    def iter_pages(self, pdf_path, pdf_hash, page_indices):
+        """Yield (page index, text) in order, extracting only pages not cached yet"""
+        cached = self._cached_pages(pdf_hash, page_indices)
+        missing = [idx for idx in page_indices if idx not in cached]
+        extracted = self._extract(pdf_path, missing)
+
+        for idx in page_indices:
+            if idx in cached:
+                yield idx, cached.pop(idx)
+                continue
+            text = next(extracted)
+            self._store_page(pdf_hash, idx, text)
+            yield idx, text
+
+    def _extract(self, pdf_path, page_indices):
+        """Generator over the text of page_indices, in order"""
+        if len(page_indices) < self.parallel_min_pages or self.workers < 2:
+            import PyPDF2
+            reader = PyPDF2.PdfReader(str(pdf_path)) if page_indices else None
+            for idx in page_indices:
+                yield reader.pages[idx].extract_text() or ''
+            return
+
+        tasks = [
+            page_indices[i:i + self.pages_per_task]
+            for i in range(0, len(page_indices), self.pages_per_task)
+        ]
+        futures = [self._get_executor().submit(_extract_range, str(pdf_path), task) for task in tasks]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                # Spawned workers re-import the main module, so the server opens its state in init_services()
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context('spawn'))
+            return self.executor
+
+    def _cached_pages(self, pdf_hash, page_indices):
+        wanted = set(page_indices)
+        with self.lock:
+            rows = self.db.execute('SELECT page, text FROM pages WHERE pdf_hash = ?', (pdf_hash,)).fetchall()
+        return {page: text for page, text in rows if page in wanted}
+
+    def _store_page(self, pdf_hash, idx, text):
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?)', (pdf_hash, idx, text))
+            self.db.commit()
@@ -0,0 +1,120 @@
+"""
+Reference audio ingestion for voice cloning
+Uploaded samples are decoded once, mixed down to mono, resampled to the rate
+XTTS conditions at, trimmed of leading and trailing silence and capped to the
+duration conditioning reads. The result is stored under its content hash, so
+identical uploads share one file and XTTS loads it without resampling.
+"""
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from metrics import REGISTRY, Counter, timed_stage
+
+# Sample rate of XTTS speaker conditioning (model.config.audio.sample_rate)
+REFERENCE_SAMPLE_RATE = 22050
+
+# Analysis frame for silence detection, and audio kept around the detected speech
+FRAME_SECONDS = 0.02
+MARGIN_SECONDS = 0.1
+
+UPLOADS = REGISTRY.register(Counter(
+    'reference_uploads_total', 'Ingested reference audio by result (new file or duplicate of a stored one)',
+    labels=('result',)
+))
+
+
+def decode(path):
+    """Decode an audio file to (float32 array of shape (channels, samples), sample rate)"""
+    try:
+        data, sample_rate = sf.read(str(path), dtype='float32', always_2d=True)
+        return data.T, sample_rate
+    except sf.LibsndfileError:
+        # Compressed browser recordings (webm, m4a) that libsndfile cannot read, decoded as XTTS would
+        import torchaudio
+        audio, sample_rate = torchaudio.load(str(path))
+        return audio.numpy().astype(np.float32), sample_rate
+
+
+def resample(audio, orig_rate, target_rate):
+    """Resample with the same filter XTTS applies when it loads reference audio"""
+    if orig_rate == target_rate:
+        return audio
+    import torch
+    import torchaudio
+    return torchaudio.functional.resample(torch.from_numpy(audio), orig_rate, target_rate).numpy()
+
+
+def trim_silence(audio, sample_rate, threshold_db):
+    """Cut leading and trailing frames quieter than threshold_db below the loudest frame"""
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    frames = len(audio) // frame
+    if frames == 0:
+        return audio
+    rms = np.sqrt(np.mean(audio[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+    peak = rms.max()
+    if peak <= 0:
+        return audio[:0]
+    voiced = np.flatnonzero(rms >= peak * 10 ** (-threshold_db / 20))
+    margin = int(sample_rate * MARGIN_SECONDS)
+    start = max(0, voiced[0] * frame - margin)
+    end = min(len(audio), (voiced[-1] + 1) * frame + margin)
+    return audio[start:end]
+
+
+def preprocess_reference(source_path, max_seconds, silence_db=40, min_seconds=1.0):
+    """
+    Decode, resample, trim and cap an uploaded reference sample (the expensive part of ingestion)
+
+    Args:
+        source_path: Uploaded audio in any format soundfile or torchaudio can decode
+        max_seconds: Audio kept after trimming (what conditioning reads, 0 = no cap)
+        silence_db: Frames this far below the loudest frame count as silence at either end
+        min_seconds: Shorter results are rejected as unusable
+
+    Returns:
+        16-bit PCM at REFERENCE_SAMPLE_RATE, to be stored with store_reference
+
+    Raises:
+        ValueError: If the audio cannot be decoded or is (nearly) silent
+    """
+    with timed_stage('reference_ingest'):
+        try:
+            audio, sample_rate = decode(source_path)
+        except Exception as e:
+            print(f"Could not decode reference audio {source_path}: {str(e)}")
+            raise ValueError("Unsupported or corrupt audio file") from e
+        audio = resample(audio.mean(axis=0), sample_rate, REFERENCE_SAMPLE_RATE)
+        audio = trim_silence(audio, REFERENCE_SAMPLE_RATE, silence_db)
+        if max_seconds:
+            audio = audio[:int(REFERENCE_SAMPLE_RATE * max_seconds)]
+        if len(audio) < REFERENCE_SAMPLE_RATE * min_seconds:
+            raise ValueError(f"Audio has less than {min_seconds:g}s of sound after trimming silence")
+        return (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+
+
+def store_reference(pcm, directory):
+    """
+    Store a preprocessed reference under its content hash
+
+    Returns:
+        (path of the stored reference, whether an identical reference was already stored)
+    """
+    digest = hashlib.sha256(pcm.tobytes()).hexdigest()
+    path = Path(directory) / f"ref-{digest[:32]}.wav"
+    # An existing file is left untouched, its mtime is part of the latents fingerprint of the voices using it
+    if path.exists():
+        UPLOADS.inc(result='duplicate')
+        return path, True
+    tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp.wav")
+    try:
+        sf.write(str(tmp_path), pcm, REFERENCE_SAMPLE_RATE, subtype='PCM_16')
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    UPLOADS.inc(result='new')
+    return path, False
@@ -0,0 +1,119 @@
+"""
+Priority scheduling of inference
+Every synthesis takes one of a fixed number of inference slots (one per worker
+process, or the in-process concurrency). Waiting tasks get a free slot by
+priority class first (interactive, then batch, then background) and round-robin
+between clients within a class, so one client's audiobook cannot hold back
+another client's chunks. Jobs take a slot per chunk and so yield to interactive
+requests at every chunk boundary. Classes with a queue limit reject new tasks
+once it is reached instead of piling them up.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from metrics import REGISTRY, Histogram
+
+PRIORITIES = ('interactive', 'batch', 'background')
+
+WAIT_SECONDS = REGISTRY.register(Histogram(
+    'scheduler_wait_seconds', 'Time inference tasks waited for a slot, by priority class', labels=('priority',)
+))
+
+
+class QueueFull(Exception):
+    """Admission control rejected a task, the caller should retry later"""
+
+
+class Scheduler:
+    """
+    Hands out inference slots by priority class and per-client round-robin.
+
+    Args:
+        slots: Tasks running at once
+        max_queued: {priority: limit} of waiting tasks, classes not listed are never rejected
+        max_queued_per_client: Waiting tasks of one client in a limited class (0 = no limit)
+    """
+
+    def __init__(self, slots, max_queued=None, max_queued_per_client=0):
+        self.slots = max(1, slots)
+        self.max_queued = dict(max_queued or {})
+        self.max_queued_per_client = max_queued_per_client
+        self.running = 0
+        # priority -> OrderedDict(client -> deque of waiting events), clients in round-robin order
+        self.waiting = {priority: OrderedDict() for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self.lock = threading.Lock()
+
+    def acquire(self, priority='interactive', client=None):
+        """
+        Wait for a slot. Raises QueueFull if the class or the client has too many waiting tasks.
+
+        Returns:
+            Seconds waited
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}, use one of: {', '.join(PRIORITIES)}")
+        start = time.perf_counter()
+        with self.lock:
+            if self.running < self.slots and not self._queued():
+                self.running += 1
+                event = None
+            else:
+                clients = self.waiting[priority]
+                limit = self.max_queued.get(priority)
+                client_queue = clients.get(client, ())
+                if limit is not None and (self._queued(priority) >= limit or (
+                    self.max_queued_per_client and len(client_queue) >= self.max_queued_per_client
+                )):
+                    self.rejected[priority] += 1
+                    raise QueueFull(f"Too many {priority} tasks waiting, try again later")
+                event = threading.Event()
+                clients.setdefault(client, deque()).append(event)
+        if event is not None:
+            # The releasing task hands its slot over directly, running stays unchanged
+            event.wait()
+        waited = time.perf_counter() - start
+        WAIT_SECONDS.observe(waited, priority=priority)
+        return waited
+
+    def release(self):
+        """Give the slot to the next waiting task, or free it"""
+        with self.lock:
+            for priority in PRIORITIES:
+                clients = self.waiting[priority]
+                if not clients:
+                    continue
+                client, client_queue = next(iter(clients.items()))
+                event = client_queue.popleft()
+                # Round-robin: the client goes to the back of its class
+                del clients[client]
+                if client_queue:
+                    clients[client] = client_queue
+                event.set()
+                return
+            self.running -= 1
+
+    @contextmanager
+    def slot(self, priority='interactive', client=None):
+        """Hold an inference slot for the duration of the block"""
+        self.acquire(priority, client)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'slots': self.slots,
+                'running': self.running,
+                'queued': {priority: self._queued(priority) for priority in PRIORITIES},
+                'rejected': dict(self.rejected)
+            }
+
+    def _queued(self, priority=None):
+        """Waiting tasks of one class, or of all classes. Caller holds the lock."""
+        priorities = PRIORITIES if priority is None else (priority,)
+        return sum(len(queue) for p in priorities for queue in self.waiting[p].values())
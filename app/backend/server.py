@@ -2,7 +2,10 @@
 Flask backend for Easy Voice Clone
 Manages voice models and generates speech
 """
-from flask import Flask, request, jsonify, send_file
+import time
+SERVER_IMPORT_START = time.perf_counter()
+
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g
 from flask_cors import CORS
 import os
 import json
@@ -10,186 +13,542 @@ import hashlib
 from datetime import datetime
 from pathlib import Path
 import uuid
-from TTS.api import TTS
-import torch
-import PyPDF2
-import nltk
+import struct
+import threading
+import wave
+import soundfile as sf
+from concurrent.futures import ThreadPoolExecutor
 import re
 from io import BytesIO
-from deep_translator import GoogleTranslator
+from config import (
+    BASE_DIR, MODELS_DIR, OUTPUT_DIR, VOICES_DB, JOBS_DIR, AUDIOBOOK_DIR, LEGACY_VOICES_JSON, LEGACY_TEMP_VOICES_JSON,
+    REFERENCE_MAX_SECONDS, REFERENCE_SILENCE_DB, OUTPUT_LOUDNESS_DB, OUTPUT_SAMPLE_RATES,
+    SERVER_HOST, SERVER_PORT, SERVER_DEBUG, SERVER_THREADS, PDF_PARSE_THREADS,
+    MAX_QUEUED_INTERACTIVE, MAX_QUEUED_PER_CLIENT, MAX_QUEUED_JOBS, JOB_EVENTS_KEEPALIVE, MAX_EVENT_STREAMS,
+    STREAM_CHUNK_SIZE, MAX_AUDIO_STREAMS, JOB_WORKERS, INFERENCE_WORKERS, THREADS_PER_WORKER, AUDIO_CACHE_MAX_MB, INFERENCE_BATCH_SIZE,
+    OUTPUT_TTL_HOURS, OUTPUT_JANITOR_INTERVAL,
+    PRELOAD_MODEL, WARMUP_MODEL, TRANSLATION_BACKEND, TRANSLATION_CACHE_DB, TRANSLATION_CONCURRENCY, TRANSLATION_BATCH_CHARS,
+    PDF_CACHE_DB, PDF_EXTRACT_WORKERS, PDF_PARALLEL_MIN_PAGES
+)
+from inference import (
+    get_tts_model, is_model_loaded, compute_speaker_latents, invalidate_speaker_latents, delete_sample,
+    synthesize_to_file, synthesize_batch_to_files, stream_speech, get_model_version, warmup
+)
+from audio_cache import AudioCache, CACHE_KEY_PATTERN, AUDIO_ID_PATTERN
+from transcode import Transcoder, FORMATS, negotiate_format
+from audiobook import Assembly, AssemblyError
+from inference_pool import InferencePool
+from jobs import JobQueue
+from singleflight import SingleFlight
+from scheduler import Scheduler, QueueFull, PRIORITIES
+from translation import Translator, create_backend
+from voice_store import VoiceStore
+from reference_audio import preprocess_reference, store_reference
+from audio_dsp import SPEED_RANGE, PITCH_RANGE
+from pdf_extract import PdfExtractor, spool_upload, parse_page_ranges
+from chunking import clean_text, chunk_text_by_sentences, chunk_text_by_paragraphs, SpeechRateTracker, ensure_sentence_data
+from metrics import REGISTRY, Histogram, timed_stage, process_memory_bytes
 
 app = Flask(__name__)
-CORS(app)
-
-# Configuration
-BASE_DIR = Path(__file__).parent.parent.parent
-MODELS_DIR = BASE_DIR / "models" / "voices"
-OUTPUT_DIR = BASE_DIR / "output" / "app"
-VOICES_DB = BASE_DIR / "app" / "voices.json"
-
-# Create directories
-MODELS_DIR.mkdir(parents=True, exist_ok=True)
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# Initialize TTS model (singleton)
-tts_model = None
-
-# Download NLTK data for sentence tokenization
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-
-try:
-    nltk.data.find('tokenizers/punkt_tab')
-except LookupError:
-    nltk.download('punkt_tab', quiet=True)
-
-def get_tts_model():
-    """Lazy load TTS model"""
-    global tts_model
-    if tts_model is None:
-        tts_model = TTS('tts_models/multilingual/multi-dataset/xtts_v2', 
-                       progress_bar=False, 
-                       gpu=torch.cuda.is_available())
-    return tts_model
-
-def load_voices_db():
-    """Load voices database"""
-    if VOICES_DB.exists():
-        with open(VOICES_DB, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_voices_db(db):
-    """Save voices database"""
-    VOICES_DB.parent.mkdir(parents=True, exist_ok=True)
-    with open(VOICES_DB, 'w') as f:
-        json.dump(db, f, indent=2)
-
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file"""
+CORS(app, expose_headers=['X-Time-To-First-Audio', 'Server-Timing', 'Content-Range', 'Accept-Ranges', 'Content-Length'])
+
+# Measured speech rate and real-time factor, used to size chunks by duration
+speech_rate = SpeechRateTracker()
+
+# Open audio streams, each holds a request thread for as long as it generates
+audio_stream_slots = threading.BoundedSemaphore(max(1, MAX_AUDIO_STREAMS))
+# Open job event streams, each holds a request thread until its job finishes; together with the
+# audio streams they always leave request threads for the other endpoints
+max_event_streams = max(1, min(MAX_EVENT_STREAMS, SERVER_THREADS - MAX_AUDIO_STREAMS - 1))
+event_stream_slots = threading.BoundedSemaphore(max_event_streams)
+
+# Identical syntheses (same cache key) running at the same time, from requests or job chunks, run once
+inflight_syntheses = SingleFlight()
+
+# Serializes changes to the sample lists of voices and the deletion of sample files
+voice_samples_lock = threading.Lock()
+
+# Stores, caches, executors and queues, created by init_services() in the serving process only:
+# inference and PDF worker processes are spawned and re-import this module, which must not touch any state
+voice_store = None
+temp_voice_store = None
+pdf_extractor = None
+transcoder = None
+audio_cache = None
+inference_pool = None
+inference_slots = None
+max_queued_interactive = None
+scheduler = None
+stream_scheduler = None
+inference_executor = None
+pdf_executor = None
+reference_executor = None
+job_queue = None
+translator = None
+
+def init_services():
+    """Open the stores and create the services request handlers use. Call once in the serving process."""
+    global voice_store, temp_voice_store, pdf_extractor, transcoder, audio_cache, inference_pool
+    global inference_slots, max_queued_interactive, scheduler, stream_scheduler, inference_executor, pdf_executor
+    global reference_executor, job_queue, translator
+
+    # Create directories
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    AUDIOBOOK_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Voice library and unsaved voice-design previews, imported once from the old JSON files
+    voice_store = VoiceStore(VOICES_DB)
+    voice_store.migrate_json(LEGACY_VOICES_JSON)
+    temp_voice_store = VoiceStore(VOICES_DB, table='temp_voices')
+    temp_voice_store.migrate_json(LEGACY_TEMP_VOICES_JSON)
+
+    # PDF text extraction with a per-page cache
+    pdf_extractor = PdfExtractor(PDF_CACHE_DB, workers=PDF_EXTRACT_WORKERS, parallel_min_pages=PDF_PARALLEL_MIN_PAGES)
+
+    # Opus / MP3 / FLAC copies of generated audio, encoded on first request
+    transcoder = Transcoder(OUTPUT_DIR / "encoded")
+
+    # Generated audio, synthesis results keyed by (voice audio, text, language, model)
+    audio_cache = AudioCache(
+        OUTPUT_DIR, AUDIO_CACHE_MAX_MB * 1024 * 1024,
+        ttl_seconds=int(OUTPUT_TTL_HOURS * 3600), on_evict=transcoder.remove
+    )
+
+    # Optional pool of inference worker processes for PDF and batch chunks
+    inference_pool = (
+        InferencePool(INFERENCE_WORKERS, THREADS_PER_WORKER, warmup=WARMUP_MODEL) if INFERENCE_WORKERS > 0 else None
+    )
+
+    # The server process has a single model replica and XTTS keeps per-call state on it (the cached GPT
+    # conditioning prefix), so in-process syntheses run one at a time; INFERENCE_WORKERS runs them in parallel
+    inference_slots = INFERENCE_WORKERS if inference_pool is not None else 1
+
+    # Waiting interactive requests hold a request thread each, so the queue only gets the threads the running
+    # syntheses and the streams leave (keeping one for the cheap endpoints) and fills up with 429s before the pool
+    max_queued_interactive = max(
+        1, min(MAX_QUEUED_INTERACTIVE, SERVER_THREADS - inference_slots - max_event_streams - MAX_AUDIO_STREAMS - 1)
+    )
+    if max_queued_interactive < MAX_QUEUED_INTERACTIVE:
+        print(f"MAX_QUEUED_INTERACTIVE={MAX_QUEUED_INTERACTIVE} lowered to {max_queued_interactive} to fit "
+              f"SERVER_THREADS={SERVER_THREADS}")
+
+    # Inference slots (one per worker process, or the single in-process one) handed out by priority
+    # class and per-client round-robin; jobs take a slot per chunk, so they yield to interactive requests
+    scheduler = Scheduler(
+        inference_slots,
+        max_queued={'interactive': max_queued_interactive}, max_queued_per_client=MAX_QUEUED_PER_CLIENT
+    )
+    # Streams always generate on the server process's model. Without workers that is the in-process slot above;
+    # with workers the server's replica gets a slot of its own, so streams never take a worker's slot
+    stream_scheduler = scheduler if inference_pool is None else Scheduler(1)
+
+    # CPU-bound work of request handlers runs on executors, so however many requests arrive
+    # it never takes more cores than this and the cheap endpoints keep getting CPU time
+    inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+    pdf_executor = ThreadPoolExecutor(max_workers=max(1, PDF_PARSE_THREADS), thread_name_prefix='pdf-parse')
+    reference_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='reference')
+
+    # Background queue for PDF and batch synthesis; chunks of a job run in parallel across the pool,
+    # finished jobs expire with the generated audio
+    job_queue = JobQueue(
+        JOBS_DIR, num_workers=JOB_WORKERS, chunk_workers=max(1, INFERENCE_WORKERS), batch_size=INFERENCE_BATCH_SIZE,
+        ttl_seconds=int(OUTPUT_TTL_HOURS * 3600)
+    )
+    job_queue.register('batch', synthesize_batch_item, synthesize_batch_items)
+    job_queue.register('pdf', synthesize_pdf_chunk, synthesize_pdf_chunks)
+
+    # Chunks of jobs that have not expired (so a completed job can be assembled into an audiobook) and previews
+    # of unsaved designed voices are not evicted while they fit in the cache's pinned share of the budget
+    audio_cache.add_pin_provider(
+        lambda: [result['audio_id'] for result in job_queue.retained_results() if result.get('audio_id')]
+    )
+    audio_cache.add_pin_provider(
+        lambda: [Path(voice['preview_file']).stem for _, voice in temp_voice_store.list()[0] if voice.get('preview_file')]
+    )
+
+    # Batched translation with a persistent cache
+    translator = Translator(
+        create_backend(TRANSLATION_BACKEND), TRANSLATION_CACHE_DB,
+        max_concurrency=TRANSLATION_CONCURRENCY, batch_chars=TRANSLATION_BATCH_CHARS
+    )
+
+# Request latency per endpoint (streamed responses count until their headers are sent)
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint', labels=('method', 'endpoint', 'status')
+))
+
+def collect_metrics():
+    """Current values of the pipeline for /api/metrics"""
+    rate = speech_rate.stats()
+    cache = audio_cache.stats()
+    translations = translator.stats()
+    syntheses = inflight_syntheses.stats()
+    scheduling = scheduler.stats()
+    collected = [
+        ('real_time_factor', 'Synthesis seconds per second of audio (moving average)', 'gauge',
+         [({}, rate['real_time_factor'])]),
+        ('speech_chars_per_second', 'Characters of text per second of audio (moving average)', 'gauge',
+         [({}, rate['chars_per_second'])]),
+        ('job_queue_depth', 'Jobs waiting for a worker', 'gauge', [({}, job_queue.queue_depth())]),
+        ('cache_lookups_total', 'Cache lookups by cache and result', 'counter', [
+            ({'cache': 'audio', 'result': 'hit'}, cache['hits']),
+            ({'cache': 'audio', 'result': 'miss'}, cache['misses']),
+            ({'cache': 'translation', 'result': 'hit'}, translations['hits']),
+            ({'cache': 'translation', 'result': 'miss'}, translations['misses'])
+        ]),
+        ('synthesis_singleflight_total', 'Uncached syntheses run, and those coalesced into an identical running one',
+         'counter', [
+            ({'result': 'started'}, syntheses['started']),
+            ({'result': 'coalesced'}, syntheses['coalesced'])
+        ]),
+        ('synthesis_inflight', 'Distinct syntheses running', 'gauge', [({}, syntheses['inflight'])]),
+        ('scheduler_running', 'Inference slots in use', 'gauge', [({}, scheduling['running'])]),
+        ('scheduler_queued', 'Inference tasks waiting for a slot, by priority class', 'gauge', [
+            ({'priority': priority}, scheduling['queued'][priority]) for priority in PRIORITIES
+        ]),
+        ('scheduler_rejected_total', 'Inference tasks rejected by admission control, by priority class', 'counter', [
+            ({'priority': priority}, scheduling['rejected'][priority]) for priority in PRIORITIES
+        ]),
+        ('audio_cache_bytes', 'Disk used by generated audio', 'gauge', [({}, cache['bytes'])]),
+        ('audio_cache_entries', 'Generated audio files on disk', 'gauge', [({}, cache['entries'])]),
+        ('audio_cache_evictions_total', 'Generated audio removed by quota or TTL', 'counter', [
+            ({'reason': 'quota'}, cache['evictions']),
+            ({'reason': 'ttl'}, cache['expirations'])
+        ]),
+        ('model_loaded', 'Whether the server process has loaded the model', 'gauge', [({}, int(is_model_loaded()))]),
+        ('ready', 'Whether the server reports ready on /api/ready', 'gauge', [({}, int(is_ready()))]),
+        ('startup_seconds', 'Duration of startup phases', 'gauge', [
+            ({'phase': phase}, startup[f'{phase}_seconds'])
+            for phase in ('import', 'model_load', 'warmup', 'time_to_ready')
+        ]),
+        ('process_resident_memory_bytes', 'Resident memory of the server process', 'gauge',
+         [({}, process_memory_bytes())])
+    ]
+    if inference_pool is not None:
+        workers = inference_pool.status()
+        collected.append(('inference_queue_depth', 'Tasks waiting for an inference worker', 'gauge',
+                          [({}, inference_pool.queue_depth())]))
+        collected.append(('inference_workers', 'Inference workers by status', 'gauge', [
+            ({'status': status}, sum(1 for worker in workers if worker['status'] == status))
+            for status in ('loading', 'idle', 'busy', 'failed')
+        ]))
+    return collected
+
+REGISTRY.add_collector(collect_metrics)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, endpoint=endpoint, status=str(response.status_code)
+        )
+    return response
+
+# Startup progress: the model is loaded and warmed up in the background, /api/ready reports when it is done
+startup = {
+    'state': 'starting',
+    'import_seconds': None,
+    'model_load_seconds': None,
+    'warmup_seconds': None,
+    'time_to_ready_seconds': None,
+    'error': None
+}
+
+def preload():
+    """
+    Background startup: sentence tokenizer data, model load and a warmup synthesis.
+    With inference workers the workers load and warm up their own replicas, and the server
+    process loads its replica for streaming once it is ready, so no stream waits for a model load.
+    """
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        ensure_sentence_data()
+        if PRELOAD_MODEL and inference_pool is None:
+            startup['state'] = 'loading_model'
+            start = time.perf_counter()
+            get_tts_model()
+            startup['model_load_seconds'] = round(time.perf_counter() - start, 3)
+            if WARMUP_MODEL:
+                startup['state'] = 'warming_up'
+                # Falls back to the first library voice if the checkpoint bundles no speaker
+                voice = voice_store.first()
+                try:
+                    seconds = warmup(*((voice[0], voice_audio(voice[1])) if voice else ()))
+                    startup['warmup_seconds'] = round(seconds, 3) if seconds is not None else None
+                except Exception as e:
+                    print(f"Warmup synthesis failed: {str(e)}")
+        startup['state'] = 'ready'
+        startup['time_to_ready_seconds'] = round(time.perf_counter() - SERVER_IMPORT_START, 3)
+        print(f"Server ready after {startup['time_to_ready_seconds']}s "
+              f"(model load {startup['model_load_seconds']}s, warmup {startup['warmup_seconds']}s)")
+        if PRELOAD_MODEL and inference_pool is not None:
+            try:
+                get_tts_model()
+            except Exception as e:
+                print(f"Could not load the model for streaming: {str(e)}")
     except Exception as e:
-        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+        startup.update({'state': 'failed', 'error': str(e)})
+        print(f"Startup failed: {str(e)}")
 
-def clean_text(text):
-    """Clean extracted text"""
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    # Remove page numbers (common patterns)
-    text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
-    # Remove multiple newlines
-    text = re.sub(r'\n+', '\n', text)
-    return text.strip()
+def start_background_services():
+    """Inference workers, job queue, output janitor and model preload. Call once in the serving process."""
+    if inference_pool is not None:
+        inference_pool.start()
+    job_queue.start()
+    audio_cache.start_janitor(
+        OUTPUT_JANITOR_INTERVAL, derived_dirs=[AUDIOBOOK_DIR, transcoder.encoded_dir],
+        before_sweep={'expired_jobs': job_queue.expire}
+    )
+    threading.Thread(target=preload, name='preload', daemon=True).start()
 
-def translate_text(text, source_lang='auto', target_lang='en'):
+def is_ready():
+    """Whether requests can be served without waiting for a model load"""
+    if startup['state'] != 'ready':
+        return False
+    return inference_pool is None or inference_pool.ready_workers() > 0
+
+def offload(executor, fn, *args):
+    """Run fn on an executor and wait for its result (exceptions are raised in the caller)"""
+    return executor.submit(fn, *args).result()
+
+def request_client():
+    """Client identity for fair sharing: the X-Client-Id header if the caller sets one, else its address"""
+    return request.headers.get('X-Client-Id') or request.remote_addr
+
+def job_admission(data):
     """
-    Translate text from source language to target language
+    Priority class of a new job from its request ('batch' by default, or 'background'),
+    or an error response if it is invalid or too many jobs are queued
+    """
+    priority = data.get('priority', 'batch')
+    if priority not in ('batch', 'background'):
+        return None, (jsonify({'error': "priority must be 'batch' or 'background'"}), 400)
+    if job_queue.queue_depth() >= MAX_QUEUED_JOBS:
+        return None, queue_full_response('Too many jobs queued, try again later')
+    return priority, None
+
+def queue_full_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '5'
+    return response, 429
+
+def busy_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+def run_synthesis(text, voice_id, audio_path, language, output_path, use_pool=False,
+                  priority='interactive', client=None, effects=None):
+    """
+    Synthesize on the inference pool if requested and enabled, otherwise on the in-process inference executor.
+    Waits for an inference slot of the scheduler first (raises QueueFull if admission control rejects it).
+    effects (see audio_dsp.apply_effects) are applied to the audio before it is written.
+    """
+    with scheduler.slot(priority, client):
+        if use_pool and inference_pool is not None:
+            return inference_pool.synthesize_to_file(text, voice_id, audio_path, language, output_path, effects)
+        return offload(
+            inference_executor, synthesize_to_file, text, voice_id, audio_path, language, output_path, effects
+        )
+
+def synthesize_cached(text, voice_id, audio_path, language, use_pool=False, priority='interactive', client=None):
+    """
+    Synthesize through the output cache.
     
-    Args:
-        text: Text to translate
-        source_lang: Source language code (default 'auto' for auto-detection)
-        target_lang: Target language code
-        
     Returns:
-        Translated text
+        Audio id of the WAV in the output store (the cache key)
+    """
+    key = audio_cache.make_key(audio_path, text, language, get_model_version())
+    if audio_cache.lookup(key) is not None:
+        return key
+    
+    def compute():
+        # An identical synthesis may have finished between the lookup above and the claim
+        if audio_cache.lookup(key) is not None:
+            return
+        # Write under a temporary name so readers of the cache never see a partial file
+        tmp_path = OUTPUT_DIR / f"{key}.{uuid.uuid4().hex}.tmp.wav"
+        try:
+            start = time.time()
+            run_synthesis(
+                text, voice_id, audio_path, language, tmp_path, use_pool=use_pool, priority=priority, client=client
+            )
+            speech_rate.record(len(text), wav_duration(tmp_path), time.time() - start)
+            audio_cache.add(key, tmp_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    
+    # An identical synthesis already running is waited for instead of repeated
+    inflight_syntheses.run(key, compute)
+    return key
+
+def run_batch_synthesis(texts, voice_id, audio_path, language, output_paths, use_pool=False,
+                        priority='batch', client=None):
+    """Batched counterpart of run_synthesis"""
+    with scheduler.slot(priority, client):
+        if use_pool and inference_pool is not None:
+            return inference_pool.synthesize_batch_to_files(texts, voice_id, audio_path, language, output_paths)
+        return offload(
+            inference_executor, synthesize_batch_to_files, texts, voice_id, audio_path, language, output_paths
+        )
+
+def synthesize_cached_batch(texts, voice_id, audio_path, language, use_pool=False, priority='batch', client=None):
+    """
+    Synthesize several texts of one voice through the output cache, running
+    all cache misses as one batched inference call.
+    
+    Returns:
+        Audio ids in the order of texts
     """
+    keys = [audio_cache.make_key(audio_path, text, language, get_model_version()) for text in texts]
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in missing and audio_cache.lookup(key) is None:
+            missing[key] = text
+    if not missing:
+        return keys
+    
+    # Texts another request or job is already synthesizing are waited for, the rest run here
+    owned, waiting = inflight_syntheses.claim(missing)
+    # Identical syntheses may have finished between the lookups above and the claim
+    for key in [key for key in owned if audio_cache.lookup(key) is not None]:
+        owned.remove(key)
+        inflight_syntheses.resolve(key)
+    tmp_paths = {key: OUTPUT_DIR / f"{key}.{uuid.uuid4().hex}.tmp.wav" for key in owned}
+    error = None
     try:
-        if source_lang == target_lang or target_lang == 'original':
-            return text
-            
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
-        translated = translator.translate(text)
-        return translated
+        if owned:
+            start = time.time()
+            run_batch_synthesis(
+                [missing[key] for key in owned], voice_id, audio_path, language, list(tmp_paths.values()),
+                use_pool=use_pool, priority=priority, client=client
+            )
+            speech_rate.record(
+                sum(len(missing[key]) for key in owned),
+                sum(wav_duration(path) for path in tmp_paths.values()),
+                time.time() - start
+            )
+            for key, tmp_path in tmp_paths.items():
+                audio_cache.add(key, tmp_path)
     except Exception as e:
-        print(f"Translation error: {str(e)}")
-        # If translation fails, return original text
-        return text
+        error = e
+        raise
+    finally:
+        for key, tmp_path in tmp_paths.items():
+            tmp_path.unlink(missing_ok=True)
+            inflight_syntheses.resolve(key, error=error)
+    for future in waiting.values():
+        future.result()
+    return keys
 
-def chunk_text_by_sentences(text, max_chars=500, min_chars=100):
+def wav_duration(path):
+    """Length of a WAV file in seconds"""
+    with wave.open(str(path), 'rb') as wav_file:
+        return wav_file.getnframes() / float(wav_file.getframerate())
+
+def wav_stream_header(sample_rate, channels=1, bits_per_sample=16):
+    """WAV header for a stream of unknown length (sizes set to the maximum)"""
+    block_align = channels * bits_per_sample // 8
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 0xFFFFFFFF, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample,
+        b'data', 0xFFFFFFFF
+    )
+
+def extract_text_from_pdf(pdf_file, pages=None):
     """
-    Intelligently chunk text into manageable pieces for TTS.
+    Extract text from an uploaded PDF file
     
     Args:
-        text: The text to chunk
-        max_chars: Maximum characters per chunk (ideal for ~30-60 second audio)
-        min_chars: Minimum characters to start a new chunk
+        pdf_file: Uploaded file
+        pages: 1-based page selection such as "1-5,8" (default all pages)
         
     Returns:
-        List of text chunks
+        (text, total page count, number of pages extracted)
     """
-    # Tokenize into sentences
-    sentences = nltk.sent_tokenize(text)
-    
-    chunks = []
-    current_chunk = ""
-    
-    for sentence in sentences:
-        # If adding this sentence would exceed max_chars and we have minimum content
-        if len(current_chunk) + len(sentence) > max_chars and len(current_chunk) >= min_chars:
-            # Save current chunk and start new one
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence + " "
-        else:
-            # Add sentence to current chunk
-            current_chunk += sentence + " "
-    
-    # Add the last chunk if it has content
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+    pdf_path, pdf_hash = spool_upload(pdf_file)
+    try:
+        return offload(pdf_executor, read_pdf_text, pdf_path, pdf_hash, pages)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    finally:
+        pdf_path.unlink(missing_ok=True)
 
-def chunk_text_by_paragraphs(text, max_chars=800):
-    """
-    Chunk text by paragraphs with a maximum size.
-    Good for maintaining context and natural breaks.
+def read_pdf_text(pdf_path, pdf_hash, pages):
+    """Parse the selected pages of a spooled PDF, returns (text, total page count, pages extracted)"""
+    page_count = pdf_extractor.page_count(pdf_path, pdf_hash)
+    page_indices = parse_page_ranges(pages, page_count)
+    texts = [text for _, text in pdf_extractor.iter_pages(pdf_path, pdf_hash, page_indices)]
+    return "\n".join(texts) + "\n", page_count, len(page_indices)
+
+def translate_text(text, source_lang='auto', target_lang='en'):
     """
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = ""
-    
-    for para in paragraphs:
-        para = para.strip()
-        if not para:
-            continue
-            
-        # If paragraph alone exceeds max, break it into sentences
-        if len(para) > max_chars:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = ""
-            # Break large paragraph into sentences
-            chunks.extend(chunk_text_by_sentences(para, max_chars=max_chars))
-        elif len(current_chunk) + len(para) > max_chars:
-            # Save current and start new
-            chunks.append(current_chunk.strip())
-            current_chunk = para + "\n\n"
-        else:
-            current_chunk += para + "\n\n"
-    
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    Translate text from source language to target language
     
-    return chunks
+    Args:
+        text: Text to translate
+        source_lang: Source language code (default 'auto' for auto-detection)
+        target_lang: Target language code
+        
+    Returns:
+        Translated text
+    """
+    with timed_stage('translation'):
+        return translator.translate(text, source=source_lang, target=target_lang)
 
 @app.route('/api/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'model_loaded': tts_model is not None})
+    """Liveness: the process is up and serving requests (see /api/ready for readiness)"""
+    health_data = {'status': 'healthy', 'model_loaded': is_model_loaded(), 'startup': startup['state']}
+    health_data['audio_cache'] = audio_cache.stats()
+    health_data['syntheses'] = inflight_syntheses.stats()
+    health_data['scheduler'] = scheduler.stats()
+    if inference_pool is not None:
+        health_data['inference_workers'] = inference_pool.status()
+    return jsonify(health_data)
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness: 200 once the model is loaded and warmed up, 503 before"""
+    ready_data = dict(startup, ready=is_ready(), model_loaded=is_model_loaded())
+    if inference_pool is not None:
+        ready_data['inference_workers_ready'] = inference_pool.ready_workers()
+    return jsonify(ready_data), 200 if ready_data['ready'] else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Pipeline metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/voices', methods=['GET'])
 def get_voices():
-    """Get all registered voices"""
-    db = load_voices_db()
+    """Get registered voices, optionally filtered and paginated"""
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if (limit is not None and limit < 0) or offset < 0:
+        return jsonify({'error': 'limit and offset must not be negative'}), 400
+    
+    matches, total = voice_store.list(
+        language=request.args.get('language'),
+        query=request.args.get('q'),
+        voice_type=request.args.get('type'),
+        limit=limit,
+        offset=offset
+    )
     voices = []
-    for voice_id, voice_data in db.items():
+    for voice_id, voice_data in matches:
         voices.append({
             'id': voice_id,
             'name': voice_data['name'],
@@ -198,7 +557,68 @@ def get_voices():
             'audio_path': voice_data['audio_path'],
             'samples_count': voice_data.get('samples_count', 0)
         })
-    return jsonify({'voices': voices})
+    return jsonify({'voices': voices, 'total': total, 'limit': limit, 'offset': offset})
+
+def voice_samples(voice_data):
+    """Paths of a voice's reference samples (voices saved before multi-sample support have one)"""
+    return voice_data.get('samples') or [voice_data['audio_path']]
+
+def voice_audio(voice_data):
+    """Reference audio a voice is conditioned on: its sample, or the list of samples of a multi-sample voice"""
+    samples = voice_samples(voice_data)
+    return samples[0] if len(samples) == 1 else samples
+
+def voice_audio_exists(voice_data):
+    return all(os.path.exists(sample) for sample in voice_samples(voice_data))
+
+def voices_using_sample(sample_path):
+    """IDs of saved voices that have sample_path among their reference samples"""
+    sample_path = str(sample_path)
+    return [voice_id for voice_id, voice_data in voice_store.list()[0] if sample_path in voice_samples(voice_data)]
+
+def release_samples(sample_paths):
+    """Delete reference samples no saved voice uses anymore"""
+    for sample_path in sample_paths:
+        if not voices_using_sample(sample_path):
+            delete_sample(sample_path)
+
+def condition_voice(voice_id, audio_path):
+    """Precompute a voice's latents, samples conditioned before are reused (failures are retried on use)"""
+    try:
+        if inference_pool is not None:
+            inference_pool.compute_speaker_latents(voice_id, audio_path)
+        else:
+            offload(inference_executor, compute_speaker_latents, voice_id, audio_path)
+    except Exception as e:
+        print(f"Could not precompute latents for voice {voice_id}: {str(e)}")
+
+def preprocess_upload(audio_file):
+    """
+    Decode and preprocess an uploaded reference sample (raises ValueError for unusable audio).
+    Runs without voice_samples_lock; store the result with store_sample.
+    """
+    upload_path = MODELS_DIR / f"upload-{uuid.uuid4()}.tmp"
+    audio_file.save(upload_path)
+    try:
+        return offload(reference_executor, preprocess_reference, upload_path, REFERENCE_MAX_SECONDS, REFERENCE_SILENCE_DB)
+    finally:
+        upload_path.unlink(missing_ok=True)
+
+def store_sample(pcm):
+    """
+    Store a preprocessed sample in MODELS_DIR (identical samples share one file) and return its path.
+    Caller holds voice_samples_lock until the sample is recorded, so it cannot be released meanwhile.
+    """
+    audio_path, _ = store_reference(pcm, MODELS_DIR)
+    return audio_path
+
+def sample_summary(voice_id, voice_data):
+    samples = voice_samples(voice_data)
+    return {
+        'voice_id': voice_id,
+        'samples': [{'id': Path(sample).stem, 'audio_path': sample} for sample in samples],
+        'samples_count': len(samples)
+    }
 
 @app.route('/api/voices', methods=['POST'])
 def create_voice():
@@ -213,21 +633,25 @@ def create_voice():
     # Generate voice ID
     voice_id = str(uuid.uuid4())
     
-    # Save audio file
-    audio_filename = f"{voice_id}.wav"
-    audio_path = MODELS_DIR / audio_filename
-    audio_file.save(audio_path)
+    try:
+        pcm = preprocess_upload(audio_file)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Update database
-    db = load_voices_db()
-    db[voice_id] = {
-        'name': name,
-        'language': language,
-        'created_at': datetime.now().isoformat(),
-        'audio_path': str(audio_path),
-        'samples_count': 1
-    }
-    save_voices_db(db)
+    # Store the preprocessed sample and update database
+    with voice_samples_lock:
+        audio_path = store_sample(pcm)
+        voice_store.put(voice_id, {
+            'name': name,
+            'language': language,
+            'created_at': datetime.now().isoformat(),
+            'audio_path': str(audio_path),
+            'samples': [str(audio_path)],
+            'samples_count': 1
+        })
+    
+    # Condition once at registration so synthesis can skip it
+    condition_voice(voice_id, audio_path)
     
     return jsonify({
         'success': True,
@@ -238,21 +662,74 @@ def create_voice():
 @app.route('/api/voices/<voice_id>', methods=['DELETE'])
 def delete_voice(voice_id):
     """Delete a voice"""
-    db = load_voices_db()
+    with voice_samples_lock:
+        voice_data = voice_store.delete(voice_id)
+        if voice_data is None:
+            return jsonify({'error': 'Voice not found'}), 404
+        
+        # Delete audio files, unless another voice was created from the same sample
+        release_samples(voice_samples(voice_data))
+    invalidate_speaker_latents(voice_id)
     
-    if voice_id not in db:
+    return jsonify({'success': True})
+
+@app.route('/api/voices/<voice_id>/samples', methods=['GET'])
+def list_voice_samples(voice_id):
+    """Reference samples of a voice"""
+    voice_data = voice_store.get(voice_id)
+    if voice_data is None:
         return jsonify({'error': 'Voice not found'}), 404
+    return jsonify(sample_summary(voice_id, voice_data))
+
+@app.route('/api/voices/<voice_id>/samples', methods=['POST'])
+def add_voice_sample(voice_id):
+    """Add a reference sample to a voice, only the new sample is conditioned"""
+    if 'audio' not in request.files:
+        return jsonify({'error': 'No audio file provided'}), 400
     
-    # Delete audio file
-    audio_path = Path(db[voice_id]['audio_path'])
-    if audio_path.exists():
-        audio_path.unlink()
+    if voice_id not in voice_store:
+        return jsonify({'error': 'Voice not found'}), 404
+    try:
+        pcm = preprocess_upload(request.files['audio'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Remove from database
-    del db[voice_id]
-    save_voices_db(db)
+    with voice_samples_lock:
+        # The voice may have been deleted while the upload was processed
+        voice_data = voice_store.get(voice_id)
+        if voice_data is None:
+            return jsonify({'error': 'Voice not found'}), 404
+        sample_path = str(store_sample(pcm))
+        samples = voice_samples(voice_data)
+        if sample_path in samples:
+            return jsonify({'error': 'The voice already has this sample'}), 409
+        samples = samples + [sample_path]
+        voice_data = voice_store.update(voice_id, samples=samples, samples_count=len(samples))
     
-    return jsonify({'success': True})
+    condition_voice(voice_id, voice_audio(voice_data))
+    return jsonify({'success': True, **sample_summary(voice_id, voice_data)})
+
+@app.route('/api/voices/<voice_id>/samples/<sample_id>', methods=['DELETE'])
+def remove_voice_sample(voice_id, sample_id):
+    """Remove a reference sample from a voice, the remaining samples are not conditioned again"""
+    with voice_samples_lock:
+        voice_data = voice_store.get(voice_id)
+        if voice_data is None:
+            return jsonify({'error': 'Voice not found'}), 404
+        samples = voice_samples(voice_data)
+        removed = [sample for sample in samples if Path(sample).stem == sample_id]
+        if not removed:
+            return jsonify({'error': 'Sample not found'}), 404
+        if len(removed) == len(samples):
+            return jsonify({'error': 'A voice needs at least one sample, delete the voice instead'}), 400
+        samples = [sample for sample in samples if sample not in removed]
+        voice_data = voice_store.update(
+            voice_id, samples=samples, samples_count=len(samples), audio_path=samples[0]
+        )
+        release_samples(removed)
+    
+    condition_voice(voice_id, voice_audio(voice_data))
+    return jsonify({'success': True, **sample_summary(voice_id, voice_data)})
 
 @app.route('/api/synthesize', methods=['POST'])
 def synthesize():
@@ -268,15 +745,13 @@ def synthesize():
         return jsonify({'error': 'Missing voice_id or text'}), 400
     
     # Get voice from database
-    db = load_voices_db()
-    if voice_id not in db:
+    voice_data = voice_store.get(voice_id)
+    if voice_data is None:
         return jsonify({'error': 'Voice not found'}), 404
     
-    voice_data = db[voice_id]
-    audio_path = voice_data['audio_path']
-    
-    if not os.path.exists(audio_path):
+    if not voice_audio_exists(voice_data):
         return jsonify({'error': 'Voice audio file not found'}), 404
+    audio_path = voice_audio(voice_data)
     
     try:
         # Translate text if requested
@@ -285,18 +760,10 @@ def synthesize():
             text = translate_text(text, source_lang=source_lang, target_lang=translate_to)
             print(f"Translated from {source_lang} to {translate_to}: {original_text[:50]}... -> {text[:50]}...")
         
-        # Generate output filename
-        output_id = str(uuid.uuid4())
-        output_filename = f"{output_id}.wav"
-        output_path = OUTPUT_DIR / output_filename
-        
-        # Load TTS model and generate
-        tts = get_tts_model()
-        tts.tts_to_file(
-            text=text,
-            speaker_wav=audio_path,
-            language=language,
-            file_path=str(output_path)
+        # Generate with the voice's cached conditioning latents (or reuse an identical earlier result),
+        # in a worker process if there are any
+        output_id = synthesize_cached(
+            text, voice_id, audio_path, language, use_pool=True, priority='interactive', client=request_client()
         )
         
         response_data = {
@@ -316,22 +783,191 @@ def synthesize():
         
         return jsonify(response_data)
     
+    except QueueFull as e:
+        return queue_full_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/synthesize/stream', methods=['GET', 'POST'])
+def synthesize_stream():
+    """
+    Stream speech as chunked WAV while it is being generated.
+    Accepts JSON (POST) or query parameters (GET, usable as an <audio> src).
+    """
+    data = request.get_json(silent=True) or request.args
+    voice_id = data.get('voice_id')
+    text = data.get('text')
+    language = data.get('language', 'en')
+    translate_to = data.get('translate_to')
+    source_lang = data.get('source_lang', 'auto')
+    
+    if not voice_id or not text:
+        return jsonify({'error': 'Missing voice_id or text'}), 400
+    
+    try:
+        stream_chunk_size = int(data.get('stream_chunk_size', STREAM_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({'error': 'stream_chunk_size must be an integer'}), 400
+    
+    voice_data = voice_store.get(voice_id)
+    if voice_data is None:
+        return jsonify({'error': 'Voice not found'}), 404
+    
+    if not voice_audio_exists(voice_data):
+        return jsonify({'error': 'Voice audio file not found'}), 404
+    audio_path = voice_audio(voice_data)
+    
+    if not audio_stream_slots.acquire(blocking=False):
+        return busy_response('Too many audio streams open, try again shortly')
+    start_time = time.perf_counter()
+    # The stream holds an interactive slot of the server's model for as long as it generates frames
+    try:
+        stream_scheduler.acquire('interactive', request_client())
+    except QueueFull as e:
+        audio_stream_slots.release()
+        return queue_full_response(e)
+    frames = None
+    
+    def close_stream():
+        # Frees the model and the slot when the client disconnects mid-stream, or when the response is never sent
+        try:
+            if frames is not None:
+                frames.close()
+        finally:
+            stream_scheduler.release()
+            audio_stream_slots.release()
+    
+    try:
+        if translate_to and translate_to != 'original':
+            text = translate_text(text, source_lang=source_lang, target_lang=translate_to)
+        
+        # Decode the first frame before responding so failures still return JSON
+        # and the time to first audio can go out in the headers
+        frames = stream_speech(text, voice_id, audio_path, language, stream_chunk_size)
+        first_frame = next(frames, b'')
+        time_to_first_audio = time.perf_counter() - start_time
+        sample_rate = get_tts_model().synthesizer.output_sample_rate
     except Exception as e:
+        close_stream()
         return jsonify({'error': str(e)}), 500
+    
+    print(f"Streaming synthesis: first audio after {time_to_first_audio:.3f}s")
+    
+    def generate():
+        yield wav_stream_header(sample_rate)
+        yield first_frame
+        yield from frames
+    
+    response = Response(generate(), mimetype='audio/wav')
+    response.call_on_close(close_stream)
+    response.headers['X-Time-To-First-Audio'] = f"{time_to_first_audio:.3f}"
+    response.headers['Server-Timing'] = f"ttfa;dur={time_to_first_audio * 1000:.1f}"
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @app.route('/api/audio/<audio_id>', methods=['GET'])
 def get_audio(audio_id):
-    """Serve generated audio file"""
-    audio_path = OUTPUT_DIR / f"{audio_id}.wav"
+    """
+    Serve generated audio file
+    
+    Query params:
+        format: wav (default), opus, mp3 or flac. Without it, an explicit audio type
+                in the Accept header selects the format.
+    Byte ranges are supported for seeking.
+    """
+    if not AUDIO_ID_PATTERN.match(audio_id):
+        return jsonify({'error': 'Audio not found'}), 404
+    audio_path = audio_cache.lookup(audio_id)
     
-    if not audio_path.exists():
+    if audio_path is None:
         return jsonify({'error': 'Audio not found'}), 404
     
-    return send_file(audio_path, mimetype='audio/wav')
+    fmt = negotiate_format(request.args.get('format'), request.accept_mimetypes)
+    if fmt is None:
+        return jsonify({'error': f"Unsupported format, use one of: {', '.join(FORMATS)}"}), 400
+    
+    try:
+        path = transcoder.get(audio_path, audio_id, fmt)
+    except Exception as e:
+        return jsonify({'error': f'Audio encoding failed: {str(e)}'}), 500
+    
+    # Cache keys are content hashes, so the audio behind them never changes
+    return send_audio_file(path, fmt, immutable=bool(CACHE_KEY_PATTERN.match(audio_id)))
+
+def send_audio_file(path, fmt, immutable=False, download_name=None):
+    """send_file with byte ranges, validators and cache headers"""
+    response = send_file(
+        path, mimetype=FORMATS[fmt][0], conditional=True, etag=True,
+        as_attachment=download_name is not None, download_name=download_name
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Vary'] = 'Accept'
+    if immutable:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+def translate_job_text(params, text):
+    """Translate a job's text if the job asked for translation"""
+    translate_to = params.get('translate_to')
+    if translate_to and translate_to != 'original':
+        return translate_text(text, source_lang=params['source_lang'], target_lang=translate_to)
+    return text
+
+def batch_item_result(params, idx, original_text, text, output_id):
+    result = {
+        'index': idx,
+        'success': True,
+        'audio_id': output_id,
+        'audio_url': f'/api/audio/{output_id}',
+        'text': text
+    }
+    
+    # Include translation info if translation was performed
+    translate_to = params.get('translate_to')
+    if translate_to and translate_to != 'original':
+        result['original_text'] = original_text
+        result['translated_text'] = text
+    
+    return result
+
+def synthesize_batch_item(params, idx, text):
+    """Synthesize one text of a batch job"""
+    try:
+        # Translate text if requested
+        original_text = text
+        text = translate_job_text(params, text)
+        
+        output_id = synthesize_cached(
+            text, params['voice_id'], params['audio_path'], params['language'], use_pool=True,
+            priority=params.get('priority', 'batch'), client=params.get('client')
+        )
+        return batch_item_result(params, idx, original_text, text, output_id)
+    except Exception as e:
+        return {
+            'index': idx,
+            'success': False,
+            'error': str(e),
+            'text': text
+        }
+
+def synthesize_batch_items(params, entries):
+    """Synthesize several texts of a batch job with one batched inference call"""
+    originals = [text for _, text in entries]
+    texts = [translate_job_text(params, text) for text in originals]
+    output_ids = synthesize_cached_batch(
+        texts, params['voice_id'], params['audio_path'], params['language'], use_pool=True,
+        priority=params.get('priority', 'batch'), client=params.get('client')
+    )
+    return [
+        batch_item_result(params, idx, original_text, text, output_id)
+        for (idx, _), original_text, text, output_id in zip(entries, originals, texts, output_ids)
+    ]
 
 @app.route('/api/batch-synthesize', methods=['POST'])
 def batch_synthesize():
-    """Generate multiple audio files from a list of texts"""
+    """Queue a job that generates one audio file per text"""
     data = request.json
     voice_id = data.get('voice_id')
     texts = data.get('texts', [])
@@ -343,57 +979,35 @@ def batch_synthesize():
         return jsonify({'error': 'Missing voice_id or texts'}), 400
     
     # Get voice from database
-    db = load_voices_db()
-    if voice_id not in db:
+    voice_data = voice_store.get(voice_id)
+    if voice_data is None:
         return jsonify({'error': 'Voice not found'}), 404
     
-    voice_data = db[voice_id]
-    audio_path = voice_data['audio_path']
-    
-    results = []
-    tts = get_tts_model()
+    priority, error_response = job_admission(data)
+    if error_response is not None:
+        return error_response
     
-    for idx, text in enumerate(texts):
-        try:
-            # Translate text if requested
-            original_text = text
-            if translate_to and translate_to != 'original':
-                text = translate_text(text, source_lang=source_lang, target_lang=translate_to)
-            
-            output_id = str(uuid.uuid4())
-            output_filename = f"{output_id}.wav"
-            output_path = OUTPUT_DIR / output_filename
-            
-            tts.tts_to_file(
-                text=text,
-                speaker_wav=audio_path,
-                language=language,
-                file_path=str(output_path)
-            )
-            
-            result = {
-                'index': idx,
-                'success': True,
-                'audio_id': output_id,
-                'audio_url': f'/api/audio/{output_id}',
-                'text': text
-            }
-            
-            # Include translation info if translation was performed
-            if translate_to and translate_to != 'original':
-                result['original_text'] = original_text
-                result['translated_text'] = text
-            
-            results.append(result)
-        except Exception as e:
-            results.append({
-                'index': idx,
-                'success': False,
-                'error': str(e),
-                'text': text
-            })
+    job_id = job_queue.submit('batch', texts, {
+        'voice_id': voice_id,
+        'audio_path': voice_audio(voice_data),
+        'language': language,
+        'translate_to': translate_to,
+        'source_lang': source_lang,
+        'priority': priority,
+        'client': request_client()
+    })
+
+    # Translate all texts up front in a few batched requests; chunk handlers then hit the cache
+    if translate_to and translate_to != 'original':
+        translator.prefetch(texts, source=source_lang, target=translate_to)
     
-    return jsonify({'results': results})
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events',
+        'total_chunks': len(texts)
+    }), 202
 
 @app.route('/api/pdf/extract', methods=['POST'])
 def extract_pdf():
@@ -412,9 +1026,21 @@ def extract_pdf():
         # Get chunking parameters
         chunk_method = request.form.get('chunk_method', 'sentences')  # 'sentences' or 'paragraphs'
         max_chars = int(request.form.get('max_chars', 500))
+        language = request.form.get('language', 'en')
+        # Optional: size chunks by seconds of audio, or by seconds of synthesis once the
+        # real-time factor has been measured, instead of max_chars
+        target_seconds = request.form.get('target_seconds', type=float)
+        target_synthesis_seconds = request.form.get('target_synthesis_seconds', type=float)
+        if target_synthesis_seconds and speech_rate.chars_for_compute(target_synthesis_seconds):
+            max_chars = speech_rate.chars_for_compute(target_synthesis_seconds)
+        elif target_seconds:
+            max_chars = speech_rate.chars_for_duration(target_seconds)
         
         # Extract text
-        text = extract_text_from_pdf(pdf_file)
+        try:
+            text, page_count, pages_extracted = extract_text_from_pdf(pdf_file, request.form.get('pages'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         if not text.strip():
             return jsonify({'error': 'No text could be extracted from PDF'}), 400
@@ -424,26 +1050,86 @@ def extract_pdf():
         
         # Chunk text
         if chunk_method == 'paragraphs':
-            chunks = chunk_text_by_paragraphs(cleaned_text, max_chars=max_chars)
+            chunks = chunk_text_by_paragraphs(cleaned_text, max_chars=max_chars, language=language)
         else:
-            chunks = chunk_text_by_sentences(cleaned_text, max_chars=max_chars, min_chars=100)
+            chunks = chunk_text_by_sentences(cleaned_text, max_chars=max_chars, min_chars=100, language=language)
         
         return jsonify({
             'success': True,
             'filename': pdf_file.filename,
+            'page_count': page_count,
+            'pages_extracted': pages_extracted,
             'total_chars': len(cleaned_text),
             'total_chunks': len(chunks),
             'chunks': chunks,
             'chunk_method': chunk_method,
+            'max_chars': max_chars,
+            'speech_rate': speech_rate.stats(),
             'avg_chunk_size': sum(len(c) for c in chunks) // len(chunks) if chunks else 0
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def pdf_chunk_result(params, idx, original_chunk, chunk, output_id):
+    result = {
+        'index': idx,
+        'success': True,
+        'audio_id': output_id,
+        'audio_url': f'/api/audio/{output_id}',
+        'chunk': chunk[:100] + '...' if len(chunk) > 100 else chunk,
+        'chunk_length': len(chunk)
+    }
+    
+    # Include translation info if translation was performed
+    translate_to = params.get('translate_to')
+    if translate_to and translate_to != 'original':
+        result['original_chunk'] = original_chunk[:100] + '...' if len(original_chunk) > 100 else original_chunk
+        result['translated_chunk'] = chunk[:100] + '...' if len(chunk) > 100 else chunk
+    
+    return result
+
+def synthesize_pdf_chunk(params, idx, chunk):
+    """Synthesize one chunk of a PDF job"""
+    try:
+        # Translate chunk if requested
+        original_chunk = chunk
+        chunk = translate_job_text(params, chunk)
+        if chunk != original_chunk:
+            print(f"Chunk {idx}: Translated {len(original_chunk)} chars to {len(chunk)} chars")
+        
+        output_id = synthesize_cached(
+            chunk, params['voice_id'], params['audio_path'], params['language'], use_pool=True,
+            priority=params.get('priority', 'batch'), client=params.get('client')
+        )
+        return pdf_chunk_result(params, idx, original_chunk, chunk, output_id)
+    except Exception as e:
+        print(f"Error processing chunk {idx}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'index': idx,
+            'success': False,
+            'error': str(e),
+            'chunk': chunk[:100] + '...' if len(chunk) > 100 else chunk
+        }
+
+def synthesize_pdf_chunks(params, entries):
+    """Synthesize several chunks of a PDF job with one batched inference call"""
+    originals = [chunk for _, chunk in entries]
+    chunks = [translate_job_text(params, chunk) for chunk in originals]
+    output_ids = synthesize_cached_batch(
+        chunks, params['voice_id'], params['audio_path'], params['language'], use_pool=True,
+        priority=params.get('priority', 'batch'), client=params.get('client')
+    )
+    return [
+        pdf_chunk_result(params, idx, original_chunk, chunk, output_id)
+        for (idx, _), original_chunk, chunk, output_id in zip(entries, originals, chunks, output_ids)
+    ]
+
 @app.route('/api/pdf/synthesize', methods=['POST'])
 def synthesize_pdf():
-    """Synthesize audio from PDF chunks"""
+    """Queue a job that synthesizes audio from PDF chunks"""
     data = request.get_json()
     
     if not data or 'voice_id' not in data or 'chunks' not in data:
@@ -456,76 +1142,191 @@ def synthesize_pdf():
     source_lang = data.get('source_lang', 'auto')  # Source language for translation
     
     # Validate voice exists
-    db = load_voices_db()
-    if voice_id not in db:
+    voice_data = voice_store.get(voice_id)
+    if voice_data is None:
         return jsonify({'error': 'Voice not found'}), 404
     
-    voice_data = db[voice_id]
-    audio_path = voice_data['audio_path']
+    priority, error_response = job_admission(data)
+    if error_response is not None:
+        return error_response
     
-    results = []
-    tts = get_tts_model()
+    job_id = job_queue.submit('pdf', chunks, {
+        'voice_id': voice_id,
+        'audio_path': voice_audio(voice_data),
+        'language': language,
+        'translate_to': translate_to,
+        'source_lang': source_lang,
+        'priority': priority,
+        'client': request_client()
+    })
+
+    # Translate all chunks up front in a few batched requests; chunk handlers then hit the cache
+    if translate_to and translate_to != 'original':
+        translator.prefetch(chunks, source=source_lang, target=translate_to)
     
-    print(f"PDF Synthesis: Processing {len(chunks)} chunks with voice {voice_id}")
+    print(f"PDF Synthesis: Queued job {job_id} with {len(chunks)} chunks for voice {voice_id}")
     print(f"Translation: translate_to={translate_to}, source_lang={source_lang}")
     
-    for idx, chunk in enumerate(chunks):
-        try:
-            # Translate chunk if requested
-            original_chunk = chunk
-            if translate_to and translate_to != 'original':
-                chunk = translate_text(chunk, source_lang=source_lang, target_lang=translate_to)
-                print(f"Chunk {idx}: Translated {len(original_chunk)} chars to {len(chunk)} chars")
-            
-            output_id = str(uuid.uuid4())
-            output_filename = f"{output_id}.wav"
-            output_path = OUTPUT_DIR / output_filename
-            
-            tts.tts_to_file(
-                text=chunk,
-                speaker_wav=audio_path,
-                language=language,
-                file_path=str(output_path)
-            )
-            
-            result = {
-                'index': idx,
-                'success': True,
-                'audio_id': output_id,
-                'audio_url': f'/api/audio/{output_id}',
-                'chunk': chunk[:100] + '...' if len(chunk) > 100 else chunk,
-                'chunk_length': len(chunk)
-            }
-            
-            # Include translation info if translation was performed
-            if translate_to and translate_to != 'original':
-                result['original_chunk'] = original_chunk[:100] + '...' if len(original_chunk) > 100 else original_chunk
-                result['translated_chunk'] = chunk[:100] + '...' if len(chunk) > 100 else chunk
-            
-            results.append(result)
-        except Exception as e:
-            print(f"Error processing chunk {idx}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            results.append({
-                'index': idx,
-                'success': False,
-                'error': str(e),
-                'chunk': chunk[:100] + '...' if len(chunk) > 100 else chunk
-            })
-    
-    successful_count = sum(1 for r in results if r.get('success', False))
-    failed_count = sum(1 for r in results if not r.get('success', False))
-    
-    print(f"PDF Synthesis complete: {successful_count} successful, {failed_count} failed")
-    
     return jsonify({
         'success': True,
-        'results': results,
-        'total_chunks': len(chunks),
-        'successful': successful_count,
-        'failed': failed_count
-    })
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events',
+        'total_chunks': len(chunks)
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get progress and partial results of a synthesis job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+def sse_event(event, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return '\n'.join(lines) + '\n\n'
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-Sent Events of a synthesis job.
+    
+    Events:
+        status: the job's status, sent on connect and whenever it changes
+        chunk:  one result as soon as its audio is ready, with index, audio_url, seconds or error,
+                and the job's completed_chunks/total_chunks. Event ids count chunks in completion
+                order, so a reconnecting client (Last-Event-ID header or ?after=) only gets newer chunks.
+        done:   final status, then the stream ends
+    """
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'Invalid event id'}), 400
+    update = job_queue.wait(job_id, after)
+    if update is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not event_stream_slots.acquire(blocking=False):
+        return busy_response('Too many event streams open, poll the job instead')
+    
+    def generate(update, seen):
+        status = None
+        while True:
+            for result in update['results']:
+                seen += 1
+                yield sse_event('chunk', {
+                    **result, 'completed_chunks': seen, 'total_chunks': update['total_chunks']
+                }, event_id=seen)
+            if update['status'] != status:
+                status = update['status']
+                yield sse_event('status', {
+                    'status': status, 'completed_chunks': seen, 'total_chunks': update['total_chunks']
+                })
+            if status in ('completed', 'failed') and seen >= update['completed_chunks']:
+                yield sse_event('done', {
+                    'status': status, 'error': update['error'],
+                    'completed_chunks': seen, 'total_chunks': update['total_chunks']
+                })
+                return
+            update = job_queue.wait(job_id, seen, status, timeout=JOB_EVENTS_KEEPALIVE)
+            if update['status'] == status and update['completed_chunks'] <= seen:
+                # Comment line: keeps proxies from closing the stream and fails once the client has gone
+                yield ': keepalive\n\n'
+    
+    response = Response(stream_with_context(generate(update, after)), mimetype='text/event-stream')
+    response.call_on_close(event_stream_slots.release)
+    response.headers['Cache-Control'] = 'no-store'
+    # Tell nginx-style proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def load_audiobook_request(job_id):
+    """
+    Validate an audiobook request for a job.
+    
+    Returns:
+        (Assembly or None, output path, index path, audiobook name, error response or None).
+        The assembly is None when the audiobook was already written.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return None, None, None, None, (jsonify({'error': 'Job not found'}), 404)
+    if job['status'] != 'completed':
+        return None, None, None, None, (jsonify({'error': f"Job is {job['status']}, wait until it completes"}), 409)
+    
+    silence_ms = request.args.get('silence_ms', 0, type=int)
+    if not 0 <= silence_ms <= 10000:
+        return None, None, None, None, (jsonify({'error': 'silence_ms must be between 0 and 10000'}), 400)
+    
+    name = f"{job['job_id']}_{silence_ms}ms"
+    output_path = AUDIOBOOK_DIR / f"{name}.wav"
+    index_path = AUDIOBOOK_DIR / f"{name}.index.json"
+    if output_path.exists() and index_path.exists():
+        return None, output_path, index_path, name, None
+    
+    chunks = [
+        (result['index'], result['audio_id'], audio_cache.path_for(result['audio_id']))
+        for result in job['results'] if result.get('success')
+    ]
+    try:
+        assembly = Assembly(chunks, silence_ms=silence_ms)
+    except AssemblyError as e:
+        return None, None, None, None, (jsonify({'error': str(e)}), 409)
+    return assembly, output_path, index_path, name, None
+
+@app.route('/api/jobs/<job_id>/audiobook', methods=['GET'])
+def get_audiobook(job_id):
+    """
+    The whole job as one audio file, chunks joined in order
+    
+    Query params:
+        silence_ms: Silence between chunks (default 0)
+        format: wav (default), opus, mp3 or flac
+        stream: 1 to stream the WAV while it is being assembled
+        download: 1 to download as an attachment
+    """
+    assembly, output_path, index_path, name, error = load_audiobook_request(job_id)
+    if error is not None:
+        return error
+    
+    fmt = negotiate_format(request.args.get('format'))
+    if fmt is None:
+        return jsonify({'error': f"Unsupported format, use one of: {', '.join(FORMATS)}"}), 400
+    
+    if assembly is not None and fmt == 'wav' and request.args.get('stream') == '1':
+        return Response(
+            stream_with_context(assembly.iter_and_write(output_path, index_path)),
+            mimetype='audio/wav',
+            headers={'Content-Length': str(assembly.file_size), 'Cache-Control': 'no-cache'}
+        )
+    
+    if assembly is not None:
+        assembly.write(output_path, index_path)
+    
+    try:
+        path = transcoder.get(output_path, f"audiobook_{name}", fmt)
+    except Exception as e:
+        return jsonify({'error': f'Audio encoding failed: {str(e)}'}), 500
+    download_name = f"audiobook_{job_id[:8]}.{FORMATS[fmt][1]}" if request.args.get('download') == '1' else None
+    return send_audio_file(path, fmt, download_name=download_name)
+
+@app.route('/api/jobs/<job_id>/audiobook/index', methods=['GET'])
+def get_audiobook_index(job_id):
+    """Start time, duration and WAV byte offset of every chunk in the audiobook"""
+    assembly, output_path, index_path, name, error = load_audiobook_request(job_id)
+    if error is not None:
+        return error
+    
+    if assembly is None:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    else:
+        index = assembly.index_document()
+    index['job_id'] = job_id
+    index['audio_url'] = f"/api/jobs/{job_id}/audiobook?silence_ms={index['silence_ms']}"
+    return jsonify(index)
 
 @app.route('/api/languages', methods=['GET'])
 def get_languages():
@@ -573,9 +1374,9 @@ def generate_voice_from_prompt():
         voice_id = str(uuid.uuid4())
         
         # Check if we have any existing voices to use as a base
-        voices_db = load_voices_db()
+        base = voice_store.first()
         
-        if not voices_db:
+        if base is None:
             return jsonify({
                 'error': 'No base voices available. Please upload at least one voice in "Manage Voices" first.',
                 'note': 'Voice Designer requires a base voice to work with. Upload a sample voice file to get started.'
@@ -583,10 +1384,8 @@ def generate_voice_from_prompt():
         
         # Select a base voice (in production, this would be chosen based on prompt characteristics)
         # For now, use the first available voice
-        base_voice = list(voices_db.values())[0]
-        base_audio_path = base_voice.get('audio_path')
-        
-        if not base_audio_path or not Path(base_audio_path).exists():
+        base_voice_id, base_voice = base
+        if not voice_audio_exists(base_voice):
             return jsonify({
                 'error': 'Base voice audio file not found',
                 'note': 'Please re-upload your voice files in "Manage Voices"'
@@ -595,21 +1394,15 @@ def generate_voice_from_prompt():
         # Generate a sample audio with the TTS to demonstrate the "designed" voice
         sample_text = f"Hello, I am {voice_name}. This is a preview of the custom voice you designed."
         
-        tts = get_tts_model()
-        output_filename = f"{voice_id}_preview.wav"
-        output_path = OUTPUT_DIR / output_filename
-        
         # Extract characteristics from prompt (tone, accent, age) and apply them
         language = extract_language_from_prompt(prompt)
         
         # Use the base voice to generate the preview
         # In production, you would use AI to generate entirely new voices
-        tts.tts_to_file(
-            text=sample_text,
-            speaker_wav=base_audio_path,
-            language=language,
-            file_path=str(output_path)
+        preview_id = synthesize_cached(
+            sample_text, base_voice_id, voice_audio(base_voice), language, use_pool=True, client=request_client()
         )
+        output_filename = f"{preview_id}.wav"
         
         # Store temporary voice info
         temp_voice_data = {
@@ -619,29 +1412,22 @@ def generate_voice_from_prompt():
             'created_at': datetime.now().isoformat(),
             'preview_file': output_filename,
             'language': language,
-            'base_voice_id': base_voice.get('id'),
+            'base_voice_id': base_voice_id,
             'note': 'Preview generated using base voice. Production version would create entirely new voices.'
         }
         
-        # Save to temporary storage (would be a database in production)
-        temp_voices_file = BASE_DIR / "app" / "temp_voices.json"
-        temp_voices = {}
-        if temp_voices_file.exists():
-            with open(temp_voices_file, 'r') as f:
-                temp_voices = json.load(f)
-        
-        temp_voices[voice_id] = temp_voice_data
-        
-        with open(temp_voices_file, 'w') as f:
-            json.dump(temp_voices, f, indent=2)
+        # Save to temporary storage until the user keeps the voice
+        temp_voice_store.put(voice_id, temp_voice_data)
         
         return jsonify({
             'success': True,
             'voice_id': voice_id,
-            'preview_url': f'/api/audio/{voice_id}_preview',
+            'preview_url': f'/api/audio/{preview_id}',
             'message': f'Voice "{voice_name}" generated successfully!'
         })
         
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         print(f"Voice generation error: {str(e)}")
         import traceback
@@ -689,45 +1475,36 @@ def save_designed_voice():
     
     try:
         # Load temporary voice data
-        temp_voices_file = BASE_DIR / "app" / "temp_voices.json"
-        if not temp_voices_file.exists():
+        voice_data = temp_voice_store.get(voice_id)
+        if voice_data is None:
             return jsonify({'error': 'Voice not found'}), 404
         
-        with open(temp_voices_file, 'r') as f:
-            temp_voices = json.load(f)
-        
-        if voice_id not in temp_voices:
-            return jsonify({'error': 'Voice not found'}), 404
-        
-        voice_data = temp_voices[voice_id]
-        
-        # Copy the preview file to a permanent location
-        preview_file = OUTPUT_DIR / voice_data['preview_file']
-        permanent_file = MODELS_DIR / f"{voice_id}.wav"
-        
-        if preview_file.exists():
-            import shutil
-            shutil.copy(preview_file, permanent_file)
-        
-        # Add to voices database
-        voices_db = load_voices_db()
-        new_voice = {
-            'id': voice_id,
-            'name': voice_name,
-            'audio_path': str(permanent_file),
-            'language': voice_data.get('language', 'en'),
-            'created_at': voice_data['created_at'],
-            'design_prompt': voice_data['prompt'],
-            'type': 'designed'
-        }
-        
-        voices_db[voice_id] = new_voice
-        save_voices_db(voices_db)
+        # Store the preview as the voice's reference sample
+        preview_file = audio_cache.path_for(Path(voice_data['preview_file']).stem)
+        if not preview_file.exists():
+            return jsonify({'error': 'Voice preview has expired, generate the voice again'}), 404
+        pcm = offload(reference_executor, preprocess_reference, preview_file, REFERENCE_MAX_SECONDS, REFERENCE_SILENCE_DB)
+        with voice_samples_lock:
+            permanent_file = store_sample(pcm)
+            
+            # Add to voices database
+            new_voice = {
+                'id': voice_id,
+                'name': voice_name,
+                'audio_path': str(permanent_file),
+                'samples': [str(permanent_file)],
+                'samples_count': 1,
+                'language': voice_data.get('language', 'en'),
+                'created_at': voice_data['created_at'],
+                'design_prompt': voice_data['prompt'],
+                'type': 'designed'
+            }
+            voice_store.put(voice_id, new_voice)
+        invalidate_speaker_latents(voice_id)
+        condition_voice(voice_id, permanent_file)
         
         # Clean up temporary voice
-        del temp_voices[voice_id]
-        with open(temp_voices_file, 'w') as f:
-            json.dump(temp_voices, f, indent=2)
+        temp_voice_store.delete(voice_id)
         
         return jsonify({
             'success': True,
@@ -758,29 +1535,29 @@ def transform_voice():
         pitch = float(request.form.get('pitch', 1.0))
         emotion = request.form.get('emotion', 'neutral')
         intensity = float(request.form.get('intensity', 0.5))
+        sample_rate = request.form.get('sample_rate', type=int)
         
         if not target_voice_id:
             return jsonify({'error': 'Target voice ID is required'}), 400
+        if not SPEED_RANGE[0] <= speed <= SPEED_RANGE[1] or not PITCH_RANGE[0] <= pitch <= PITCH_RANGE[1]:
+            return jsonify({
+                'error': f'Speed must be between {SPEED_RANGE[0]} and {SPEED_RANGE[1]}, '
+                         f'pitch between {PITCH_RANGE[0]} and {PITCH_RANGE[1]}'
+            }), 400
+        if sample_rate is not None and sample_rate not in OUTPUT_SAMPLE_RATES:
+            return jsonify({'error': f"sample_rate must be one of {', '.join(map(str, OUTPUT_SAMPLE_RATES))}"}), 400
         
         # Load target voice from database
-        voices_db = load_voices_db()
-        if target_voice_id not in voices_db:
+        target_voice = voice_store.get(target_voice_id)
+        if target_voice is None:
             return jsonify({'error': 'Target voice not found'}), 404
         
-        target_voice = voices_db[target_voice_id]
-        target_audio_path = target_voice.get('audio_path')
-        
-        if not target_audio_path or not Path(target_audio_path).exists():
+        if not voice_audio_exists(target_voice):
             return jsonify({'error': 'Target voice audio file not found'}), 404
         
-        # Save source audio temporarily
-        source_temp_path = OUTPUT_DIR / f"temp_source_{uuid.uuid4()}.wav"
-        source_audio.save(source_temp_path)
-        
-        # Get audio duration using a simple approach
-        import wave
+        # Get source audio duration straight from the upload
         try:
-            with wave.open(str(source_temp_path), 'rb') as wav_file:
+            with wave.open(source_audio.stream, 'rb') as wav_file:
                 frames = wav_file.getnframes()
                 rate = wav_file.getframerate()
                 original_duration = frames / float(rate)
@@ -799,68 +1576,34 @@ def transform_voice():
         sample_text = "This is a voice transformation demo. In production, this would contain the transcribed speech from your source audio."
         
         # Generate output with target voice
-        tts = get_tts_model()
-        output_id = str(uuid.uuid4())
-        output_filename = f"transformed_{output_id}.wav"
-        output_path = OUTPUT_DIR / output_filename
+        output_id = f"transformed_{uuid.uuid4().hex}"
+        output_path = OUTPUT_DIR / f"{output_id}.tmp.wav"
         
         # Apply transformations
-        # Note: XTTS doesn't directly support pitch/speed/emotion
+        # Note: XTTS doesn't directly support pitch/speed/emotion, speed and pitch are applied
+        # to the synthesized audio in memory (audio_dsp) before it is written
         # In production, you would use:
-        # - Audio processing libraries (pydub, librosa, soundfile)
         # - Emotion-aware TTS models
         # - Voice conversion models (so-vits-svc, RVC, etc.)
+        effects = {'speed': speed, 'pitch': pitch, 'output_sample_rate': sample_rate, 'loudness': OUTPUT_LOUDNESS_DB}
         
-        tts.tts_to_file(
-            text=sample_text,
-            speaker_wav=target_audio_path,
-            language=target_voice.get('language', 'en'),
-            file_path=str(output_path)
-        )
-        
-        # Apply post-processing for speed and pitch
-        # This is a simplified version - production would use librosa or pydub
         try:
-            import subprocess
-            processed_path = OUTPUT_DIR / f"processed_{output_id}.wav"
-            
-            # Use ffmpeg for speed and pitch adjustment if available
-            speed_filter = f"atempo={speed}" if speed != 1.0 else None
-            pitch_filter = f"asetrate=44100*{pitch},aresample=44100" if pitch != 1.0 else None
-            
-            filters = []
-            if speed_filter:
-                filters.append(speed_filter)
-            if pitch_filter:
-                filters.append(pitch_filter)
-            
-            if filters:
-                filter_str = ",".join(filters)
-                subprocess.run([
-                    'ffmpeg', '-i', str(output_path),
-                    '-af', filter_str,
-                    '-y', str(processed_path)
-                ], capture_output=True, check=True)
-                
-                # Replace original with processed
-                output_path.unlink()
-                processed_path.rename(output_path)
-        except Exception as e:
-            print(f"Post-processing warning: {str(e)}")
-            # Continue without post-processing if ffmpeg is not available
-        
-        # Calculate transformed duration
-        try:
-            with wave.open(str(output_path), 'rb') as wav_file:
-                frames = wav_file.getnframes()
-                rate = wav_file.getframerate()
-                transformed_duration = frames / float(rate)
-        except:
-            transformed_duration = original_duration / speed if speed > 0 else original_duration
+            run_synthesis(
+                sample_text,
+                target_voice_id,
+                voice_audio(target_voice),
+                target_voice.get('language', 'en'),
+                output_path,
+                use_pool=True,
+                client=request_client(),
+                effects=effects
+            )
+            transformed_duration = sf.info(str(output_path)).duration
         
-        # Clean up temporary source file
-        if source_temp_path.exists():
-            source_temp_path.unlink()
+            # Move the result into the output store, temporary files never outlive the request
+            audio_cache.add(output_id, output_path)
+        finally:
+            output_path.unlink(missing_ok=True)
         
         return jsonify({
             'success': True,
@@ -870,26 +1613,43 @@ def transform_voice():
             'settings': {
                 'speed': speed,
                 'pitch': pitch,
+                'sample_rate': sample_rate,
                 'emotion': emotion,
                 'intensity': intensity
             },
             'note': 'Demo transformation. Production version would include speech-to-text and advanced voice conversion.'
         })
         
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         print(f"Voice transformation error: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({
             'error': f'Voice transformation failed: {str(e)}',
-            'note': 'Advanced voice transformation requires additional tools (ffmpeg, Whisper AI, voice conversion models)'
+            'note': 'Advanced voice transformation requires additional tools (Whisper AI, voice conversion models)'
         }), 500
 
+startup['import_seconds'] = round(time.perf_counter() - SERVER_IMPORT_START, 3)
+
 if __name__ == '__main__':
     print("🎙️  Easy Voice Clone Server")
     print("=" * 50)
     print(f"Models Directory: {MODELS_DIR}")
     print(f"Output Directory: {OUTPUT_DIR}")
-    print("Server starting on http://localhost:5000")
+    print(f"Server starting on http://localhost:{SERVER_PORT}")
     print("=" * 50)
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if SERVER_DEBUG:
+        # The debug reloader imports this module twice; only open state and run workers in the serving process
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            init_services()
+            start_background_services()
+        app.run(debug=True, host=SERVER_HOST, port=SERVER_PORT)
+    else:
+        # waitress: one event loop thread does all socket I/O (slow clients, file bodies), request
+        # threads only run handlers, whose CPU-bound work goes to the executors above
+        from waitress import serve
+        init_services()
+        start_background_services()
+        serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS, ident='EasyVoiceClone')
@@ -0,0 +1,65 @@
+"""
+Single-flight coalescing of identical in-flight work
+While a key is being computed, other callers asking for the same key wait for
+that computation instead of starting their own. Keys are released as soon as
+their computation finishes, results are expected to be cached elsewhere.
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """In-flight computations by key, with counters of how much work was shared"""
+
+    def __init__(self):
+        self.inflight = {}
+        self.started = 0
+        self.coalesced = 0
+        self.lock = threading.Lock()
+
+    def claim(self, keys):
+        """
+        Claim keys for computation.
+
+        Returns:
+            (owned, waiting): keys this caller must compute and then resolve(),
+            and {key: Future} of keys another caller is already computing
+        """
+        owned, waiting = [], {}
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                future = self.inflight.get(key)
+                if future is None:
+                    self.inflight[key] = Future()
+                    self.started += 1
+                    owned.append(key)
+                else:
+                    self.coalesced += 1
+                    waiting[key] = future
+        return owned, waiting
+
+    def resolve(self, key, result=None, error=None):
+        """Finish an owned key, waking its waiters with the result or the error"""
+        with self.lock:
+            future = self.inflight.pop(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run(self, key, compute):
+        """Return compute() for key, or the result of the identical computation already running"""
+        owned, waiting = self.claim([key])
+        if waiting:
+            return waiting[key].result()
+        try:
+            result = compute()
+        except Exception as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {'started': self.started, 'coalesced': self.coalesced, 'inflight': len(self.inflight)}
@@ -0,0 +1,122 @@
+"""
+Compressed delivery formats for synthesized audio
+WAV files are encoded to Opus, MP3 or FLAC on first request and the encoded
+file is kept next to the cache, so later requests are served straight from disk
+"""
+import os
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from audio_cache import shard_path
+
+# format name -> (mimetype, file extension, soundfile format, soundfile subtype)
+FORMATS = {
+    'wav': ('audio/wav', 'wav', None, None),
+    'opus': ('audio/ogg', 'opus', 'OGG', 'OPUS'),
+    'mp3': ('audio/mpeg', 'mp3', 'MP3', 'MPEG_LAYER_III'),
+    'flac': ('audio/flac', 'flac', 'FLAC', 'PCM_16'),
+}
+
+# Frames read and encoded at a time (~2.7 s at 24 kHz)
+ENCODE_BLOCK_FRAMES = 65536
+
+# Sample rates libopus encodes, audio at other rates (22050, 44100 Hz) is resampled to OPUS_RESAMPLE_RATE
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+OPUS_RESAMPLE_RATE = 48000
+
+# Accept header types that select a format
+ACCEPT_TYPES = {
+    'audio/ogg': 'opus',
+    'audio/opus': 'opus',
+    'audio/mpeg': 'mp3',
+    'audio/mp3': 'mp3',
+    'audio/flac': 'flac',
+    'audio/wav': 'wav',
+}
+
+
+def negotiate_format(requested, accept_mimetypes=None):
+    """
+    Pick the delivery format from an explicit ?format= value, or from the Accept header
+
+    Returns:
+        A key of FORMATS, or None if the requested format is unknown
+    """
+    if requested:
+        requested = requested.lower()
+        return requested if requested in FORMATS else None
+    if accept_mimetypes is not None:
+        # Only explicitly listed audio types count, wildcards keep the WAV default
+        for mimetype, quality in accept_mimetypes:
+            if quality > 0 and mimetype.lower() in ACCEPT_TYPES:
+                return ACCEPT_TYPES[mimetype.lower()]
+    return 'wav'
+
+
+class Transcoder:
+    """Encodes WAV files once per format and keeps the results in encoded_dir"""
+
+    def __init__(self, encoded_dir):
+        self.encoded_dir = Path(encoded_dir)
+        self.encoded_dir.mkdir(parents=True, exist_ok=True)
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def path_for(self, audio_id, fmt):
+        return shard_path(self.encoded_dir, audio_id, FORMATS[fmt][1])
+
+    def get(self, wav_path, audio_id, fmt):
+        """Path of audio_id in fmt, encoding it from wav_path if needed"""
+        if fmt == 'wav':
+            return Path(wav_path)
+
+        path = self.path_for(audio_id, fmt)
+        if path.exists():
+            return path
+
+        # One encode per file and format, concurrent requests wait for it
+        with self.lock:
+            lock = self.locks.setdefault((audio_id, fmt), threading.Lock())
+        with lock:
+            if not path.exists():
+                self._encode(wav_path, path, fmt)
+        with self.lock:
+            self.locks.pop((audio_id, fmt), None)
+        return path
+
+    def remove(self, audio_id):
+        """Delete every encoded variant of audio_id"""
+        for fmt in FORMATS:
+            if fmt != 'wav':
+                self.path_for(audio_id, fmt).unlink(missing_ok=True)
+
+    def _encode(self, wav_path, path, fmt):
+        """
+        Encode block by block, so memory stays constant however long the audio (assembled audiobooks).
+        Opus at a rate libopus does not support is resampled on the way, with a streaming resampler.
+        """
+        _, extension, sf_format, sf_subtype = FORMATS[fmt]
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp.{extension}")
+        try:
+            with sf.SoundFile(str(wav_path)) as source:
+                sample_rate, resampler = source.samplerate, None
+                if fmt == 'opus' and sample_rate not in OPUS_SAMPLE_RATES:
+                    import soxr
+                    sample_rate = OPUS_RESAMPLE_RATE
+                    resampler = soxr.ResampleStream(source.samplerate, sample_rate, source.channels, dtype='float32')
+                with sf.SoundFile(
+                    str(tmp_path), 'w', samplerate=sample_rate, channels=source.channels,
+                    format=sf_format, subtype=sf_subtype
+                ) as encoded:
+                    for block in source.blocks(blocksize=ENCODE_BLOCK_FRAMES, dtype='float32', always_2d=True):
+                        encoded.write(block if resampler is None else resampler.resample_chunk(block))
+                    if resampler is not None:
+                        encoded.write(resampler.resample_chunk(np.zeros((0, source.channels), np.float32), last=True))
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
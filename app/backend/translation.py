@@ -0,0 +1,181 @@
+"""
+Translation layer for synthesis text
+Batches many chunks per backend call, bounds concurrent calls and memoizes
+results in a persistent (backend, source, target, text hash) cache
+"""
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class GoogleBackend:
+    """Google Translate through deep_translator (needs network access)"""
+
+    name = 'google'
+
+    def translate_batch(self, texts, source, target):
+        from deep_translator import GoogleTranslator
+        translator = GoogleTranslator(source=source, target=target)
+        # One round-trip for the whole batch: one text per line
+        translated = translator.translate('\n'.join(texts))
+        lines = translated.split('\n') if translated else []
+        if len(lines) == len(texts):
+            return [line.strip() for line in lines]
+        # The service merged or split lines, fall back to one call per text
+        return [translator.translate(text) for text in texts]
+
+
+class OfflineBackend:
+    """
+    Local stand-in that returns the text unchanged.
+    Used for tests and air-gapped deployments where no service is reachable.
+    """
+
+    name = 'offline'
+
+    def translate_batch(self, texts, source, target):
+        return list(texts)
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'offline': OfflineBackend,
+}
+
+
+def register_backend(name, backend_class):
+    """Make another translation backend selectable by name"""
+    BACKENDS[name] = backend_class
+
+
+def create_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name} (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+class Translator:
+    """
+    Cached, batched and concurrent translation.
+
+    Identical texts requested while a translation is already running wait for
+    that result instead of calling the backend again.
+    """
+
+    def __init__(self, backend, cache_path, max_concurrency=4, batch_chars=4500):
+        self.backend = backend
+        self.batch_chars = batch_chars
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='translate')
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(cache_path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            'backend TEXT, source TEXT, target TEXT, text_hash TEXT, translation TEXT, '
+            'PRIMARY KEY (backend, source, target, text_hash))'
+        )
+        self.db.commit()
+
+    def translate(self, text, source='auto', target='en'):
+        """Translate one text (returns the original text if translation fails)"""
+        return self.translate_many([text], source, target)[0]
+
+    def translate_many(self, texts, source='auto', target='en'):
+        """Translate a list of texts, preserving order"""
+        results = list(texts)
+        if source == target or not target or target == 'original':
+            return results
+
+        waiting = {}
+        to_fetch = {}
+        with self.lock:
+            for idx, text in enumerate(texts):
+                if not text or not text.strip():
+                    continue
+                key = (self.backend.name, source, target, hashlib.sha256(text.encode('utf-8')).hexdigest())
+                cached = self._cache_get(key)
+                if cached is not None:
+                    results[idx] = cached
+                    self.hits += 1
+                    continue
+                self.misses += 1
+                future = self.inflight.get(key)
+                if future is None:
+                    future = Future()
+                    self.inflight[key] = future
+                    to_fetch[key] = text
+                waiting[idx] = future
+
+        if to_fetch:
+            self._fetch(to_fetch, source, target)
+
+        for idx, future in waiting.items():
+            results[idx] = future.result()
+        return results
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'inflight': len(self.inflight)}
+
+    def prefetch(self, texts, source='auto', target='en'):
+        """Translate texts in the background so later translate() calls hit the cache"""
+        threading.Thread(
+            target=self.translate_many, args=(list(texts), source, target), daemon=True
+        ).start()
+
+    def _fetch(self, to_fetch, source, target):
+        """Call the backend for uncached texts, batch by batch, at most max_concurrency at once"""
+        batches = []
+        batch, batch_len = [], 0
+        for key, text in to_fetch.items():
+            if batch and batch_len + len(text) > self.batch_chars:
+                batches.append(batch)
+                batch, batch_len = [], 0
+            batch.append((key, text))
+            batch_len += len(text) + 1
+        if batch:
+            batches.append(batch)
+
+        for future in [self.executor.submit(self._fetch_batch, b, source, target) for b in batches]:
+            future.result()
+
+    def _fetch_batch(self, batch, source, target):
+        texts = [' '.join(text.split()) for _, text in batch]
+        try:
+            translations = self.backend.translate_batch(texts, source, target)
+            if len(translations) != len(batch):
+                raise ValueError(f"backend returned {len(translations)} translations for {len(batch)} texts")
+        except Exception as e:
+            print(f"Translation error: {str(e)}")
+            translations = [None] * len(batch)
+
+        with self.lock:
+            try:
+                for (key, _), translated in zip(batch, translations):
+                    if translated:
+                        self._cache_put(key, translated)
+                self.db.commit()
+            except Exception as e:
+                print(f"Could not cache translations: {str(e)}")
+            finally:
+                # Every waiter gets an answer, the original text where translation failed (not cached)
+                for (key, original), translated in zip(batch, translations):
+                    self.inflight.pop(key).set_result(translated or original)
+
+    def _cache_get(self, key):
+        """Caller holds the lock"""
+        row = self.db.execute(
+            'SELECT translation FROM translations WHERE backend=? AND source=? AND target=? AND text_hash=?', key
+        ).fetchone()
+        return row[0] if row else None
+
+    def _cache_put(self, key, translation):
+        """Caller holds the lock"""
+        self.db.execute(
+            'INSERT OR REPLACE INTO translations (backend, source, target, text_hash, translation) VALUES (?, ?, ?, ?, ?)',
+            (*key, translation)
+        )
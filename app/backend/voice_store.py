@@ -0,0 +1,164 @@
+"""
+SQLite-backed voice library
+Replaces the voices.json / temp_voices.json files that were re-read and
+rewritten on every request. Reads are served from memory, writes touch one row.
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class VoiceStore:
+    """
+    Voice records stored in one SQLite table (WAL mode) with an in-memory read cache.
+
+    Records are plain dicts, as in the old JSON file. name, language, type and
+    created_at are mirrored into indexed columns for filtered listing.
+    """
+
+    def __init__(self, db_path, table='voices'):
+        self.table = table
+        self.lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            'id TEXT PRIMARY KEY, name TEXT, language TEXT, type TEXT, created_at TEXT, data TEXT NOT NULL)'
+        )
+        for column in ('name', 'language', 'created_at'):
+            self.db.execute(f'CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})')
+        # Imported legacy files, shared by the stores of one database
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS migrations (table_name TEXT, source TEXT, PRIMARY KEY (table_name, source))'
+        )
+        self.cache = {
+            voice_id: json.loads(data)
+            for voice_id, data in self.db.execute(f'SELECT id, data FROM {table} ORDER BY created_at, rowid')
+        }
+
+    def migrate_json(self, json_path):
+        """
+        One-time import of a legacy JSON file ({voice_id: record}).
+        The import is recorded in the database, so it never repeats and the file is left
+        untouched (it may be tracked by git). Voices already in the store are kept.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+        with self.lock:
+            if self.db.execute(
+                'SELECT 1 FROM migrations WHERE table_name = ? AND source = ?', (self.table, json_path.name)
+            ).fetchone():
+                return 0
+            with open(json_path, 'r') as f:
+                records = {
+                    voice_id: record for voice_id, record in json.load(f).items() if voice_id not in self.cache
+                }
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                for voice_id, record in records.items():
+                    self._write(voice_id, record)
+                self.db.execute(
+                    'INSERT INTO migrations (table_name, source) VALUES (?, ?)', (self.table, json_path.name)
+                )
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+            self.cache.update(records)
+        print(f"Migrated {len(records)} voices from {json_path.name}")
+        return len(records)
+
+    def get(self, voice_id):
+        """Return a copy of a voice record, or None"""
+        with self.lock:
+            record = self.cache.get(voice_id)
+            return dict(record) if record is not None else None
+
+    def __contains__(self, voice_id):
+        with self.lock:
+            return voice_id in self.cache
+
+    def first(self):
+        """(voice_id, record) of the oldest voice, or None if the library is empty"""
+        with self.lock:
+            for voice_id, record in self.cache.items():
+                return voice_id, dict(record)
+        return None
+
+    def count(self):
+        with self.lock:
+            return len(self.cache)
+
+    def list(self, language=None, query=None, voice_type=None, limit=None, offset=0):
+        """
+        Filtered, paginated listing ordered by creation time
+
+        Args:
+            language: Only voices with this language code
+            query: Case-insensitive substring of the voice name
+            voice_type: Only voices with this type (e.g. 'designed')
+            limit: Maximum number of voices returned (None = all)
+            offset: Number of matching voices to skip
+
+        Returns:
+            (list of (voice_id, record), total number of matching voices)
+        """
+        conditions, args = [], []
+        if language:
+            conditions.append('language = ?')
+            args.append(language)
+        if query:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            args.append(f'%{escaped}%')
+        if voice_type:
+            conditions.append('type = ?')
+            args.append(voice_type)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self.lock:
+            total = self.db.execute(f'SELECT COUNT(*) FROM {self.table}{where}', args).fetchone()[0]
+            ids = self.db.execute(
+                f'SELECT id FROM {self.table}{where} ORDER BY created_at, rowid LIMIT ? OFFSET ?',
+                args + [limit if limit is not None else -1, offset]
+            ).fetchall()
+            voices = [(voice_id, dict(self.cache[voice_id])) for (voice_id,) in ids if voice_id in self.cache]
+        return voices, total
+
+    def put(self, voice_id, record):
+        """Insert or replace one voice"""
+        record = dict(record)
+        with self.lock:
+            self._write(voice_id, record)
+            self.cache[voice_id] = record
+
+    def update(self, voice_id, **fields):
+        """Atomically merge fields into an existing voice. Returns the updated record, or None."""
+        with self.lock:
+            if voice_id not in self.cache:
+                return None
+            record = {**self.cache[voice_id], **fields}
+            self._write(voice_id, record)
+            self.cache[voice_id] = record
+            return dict(record)
+
+    def delete(self, voice_id):
+        """Remove a voice. Returns its record, or None if it did not exist."""
+        with self.lock:
+            record = self.cache.pop(voice_id, None)
+            if record is not None:
+                self.db.execute(f'DELETE FROM {self.table} WHERE id = ?', (voice_id,))
+            return record
+
+    def _write(self, voice_id, record):
+        """Upsert one row (autocommit unless inside a transaction). Caller holds the lock."""
+        self.db.execute(
+            f'INSERT OR REPLACE INTO {self.table} (id, name, language, type, created_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (voice_id, record.get('name', record.get('voice_name')), record.get('language', 'en'),
+             record.get('type'), record.get('created_at'), json.dumps(record))
+        )
@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 import toast from 'react-hot-toast';
+import { waitForJob } from '../utils/jobs';
+import { playbackUrl } from '../utils/audio';
 
 function BatchSynthesis({ voices, selectedVoice, onVoiceSelect }) {
   const [texts, setTexts] = useState('');
@@ -34,9 +36,13 @@ function BatchSynthesis({ voices, selectedVoice, onVoiceSelect }) {
         language: language
       });
 
-      setResults(response.data.results);
+      const job = await waitForJob(response.data.job_id, (progress) => {
+        setResults(progress.results);
+      });
+
+      setResults(job.results);
       
-      const successCount = response.data.results.filter(r => r.success).length;
+      const successCount = job.successful;
       toast.success(`Generated ${successCount}/${textList.length} audio files`);
     } catch (error) {
       toast.error('Batch synthesis failed');
@@ -199,7 +205,7 @@ function BatchSynthesis({ voices, selectedVoice, onVoiceSelect }) {
                       </p>
                       {result.success && (
                         <audio
-                          src={result.audio_url}
+                          src={playbackUrl(result.audio_url)}
                           controls
                           className="w-full mt-2"
                         />
@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useDropzone } from 'react-dropzone';
 import toast from 'react-hot-toast';
+import { streamJob } from '../utils/jobs';
+import { playbackUrl } from '../utils/audio';
 
 function PdfReader({ voices, onVoicesUpdate }) {
   const [pdfFile, setPdfFile] = useState(null);
@@ -11,6 +13,7 @@ function PdfReader({ voices, onVoicesUpdate }) {
   const [language, setLanguage] = useState('en');
   const [synthesizing, setSynthesizing] = useState(false);
   const [audioResults, setAudioResults] = useState([]);
+  const [jobId, setJobId] = useState(null);
   const [chunkMethod, setChunkMethod] = useState('sentences');
   const [maxChars, setMaxChars] = useState(500);
   const [languages, setLanguages] = useState([]);
@@ -90,6 +93,8 @@ function PdfReader({ voices, onVoicesUpdate }) {
     }
 
     setSynthesizing(true);
+    setJobId(null);
+    setAudioResults([]);
     
     // Only synthesize selected chunks
     const chunksToSynthesize = selectedChunks.map(idx => extractedData.chunks[idx]);
@@ -101,11 +106,24 @@ function PdfReader({ voices, onVoicesUpdate }) {
         language: language
       });
 
-      setAudioResults(response.data.results);
-      toast.success(`Generated ${response.data.successful} audio files`);
+      // Chunks are listed (and playable) as soon as their audio is ready
+      const job = await streamJob(response.data.job_id, {
+        onChunk: (result) => {
+          setAudioResults(prev => [...prev.filter(r => r.index !== result.index), result].sort((a, b) => a.index - b.index));
+        },
+        onProgress: (progress) => {
+          if (progress.results) {
+            setAudioResults(progress.results);
+          }
+        }
+      });
+
+      setAudioResults(job.results);
+      setJobId(job.job_id);
+      toast.success(`Generated ${job.successful} audio files`);
       
-      if (response.data.failed > 0) {
-        toast.error(`Failed to generate ${response.data.failed} audio files`);
+      if (job.failed > 0) {
+        toast.error(`Failed to generate ${job.failed} audio files`);
       }
     } catch (error) {
       toast.error(error.response?.data?.error || 'Failed to synthesize PDF');
@@ -134,6 +152,11 @@ function PdfReader({ voices, onVoicesUpdate }) {
     setSelectedChunks([]);
   };
 
+  const downloadAudiobook = () => {
+    // All chunks joined into one file with a short pause between them
+    window.open(`http://localhost:5000/api/jobs/${jobId}/audiobook?silence_ms=300&download=1`, '_blank');
+  };
+
   const downloadAllAudio = () => {
     audioResults.forEach((result, idx) => {
       if (result.success) {
@@ -365,12 +388,22 @@ function PdfReader({ voices, onVoicesUpdate }) {
             <h3 className="text-xl font-bold text-gray-800">
               Generated Audio ({audioResults.filter(r => r.success).length}/{audioResults.length})
             </h3>
-            <button
-              onClick={downloadAllAudio}
-              className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700"
-            >
-              📥 Download All
-            </button>
+            <div className="flex gap-2">
+              {jobId && (
+                <button
+                  onClick={downloadAudiobook}
+                  className="px-4 py-2 bg-green-600 text-white rounded hover:bg-green-700"
+                >
+                  📖 Download Audiobook
+                </button>
+              )}
+              <button
+                onClick={downloadAllAudio}
+                className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700"
+              >
+                📥 Download All
+              </button>
+            </div>
           </div>
 
           <div className="space-y-3 max-h-96 overflow-y-auto">
@@ -397,7 +430,7 @@ function PdfReader({ voices, onVoicesUpdate }) {
                     <p className="text-sm text-gray-600 mb-2">{result.chunk}</p>
                     {result.success && (
                       <audio controls className="w-full mt-2">
-                        <source src={`http://localhost:5000${result.audio_url}`} type="audio/wav" />
+                        <source src={playbackUrl(`http://localhost:5000${result.audio_url}`)} />
                       </audio>
                     )}
                     {!result.success && (
@@ -2,6 +2,8 @@ import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useDropzone } from 'react-dropzone';
 import toast from 'react-hot-toast';
+import { streamJob } from '../utils/jobs';
+import { playbackUrl } from '../utils/audio';
 
 function PdfReaderChat({ voices, onVoicesUpdate }) {
   const [selectedVoice, setSelectedVoice] = useState('');
@@ -184,24 +186,55 @@ function PdfReaderChat({ voices, onVoicesUpdate }) {
         source_lang: sourceLang
       });
 
+      // The assistant response appears with the first chunk and fills in as the rest finish,
+      // so playback can start while the remaining chunks are synthesized
+      const assistantId = Date.now() + 1;
+      const updateAssistantMessage = (update) => {
+        setHistory(prev => {
+          const existing = prev.find(message => message.id === assistantId) || {
+            id: assistantId,
+            type: 'assistant',
+            action: 'synthesized',
+            results: [],
+            successful: 0,
+            failed: 0,
+            timestamp: new Date().toLocaleTimeString()
+          };
+          const updated = { ...existing, ...update(existing) };
+          return prev.some(message => message.id === assistantId)
+            ? prev.map(message => (message.id === assistantId ? updated : message))
+            : [...prev, updated];
+        });
+      };
+
+      const job = await streamJob(response.data.job_id, {
+        onChunk: (result) => {
+          updateAssistantMessage((message) => {
+            const results = [...message.results.filter(r => r.index !== result.index), result]
+              .sort((a, b) => a.index - b.index);
+            const successful = results.filter(r => r.success).length;
+            return { results, successful, failed: results.length - successful };
+          });
+        },
+        onProgress: (progress) => {
+          setProgress(40 + Math.round(progress.progress * 60));
+          setProgressText(`Synthesized ${progress.completed_chunks}/${progress.total_chunks} chunks...`);
+        }
+      });
+
       setProgress(100);
       setProgressText('Synthesis complete!');
       
-      // Add assistant response with audio results
-      const assistantMessage = {
-        id: Date.now() + 1,
-        type: 'assistant',
-        action: 'synthesized',
-        results: response.data.results,
-        successful: response.data.successful,
-        failed: response.data.failed,
-        timestamp: new Date().toLocaleTimeString()
-      };
-      setHistory(prev => [...prev, assistantMessage]);
+      // Final assistant response with all audio results
+      updateAssistantMessage(() => ({
+        results: job.results,
+        successful: job.successful,
+        failed: job.failed
+      }));
       
-      toast.success(`Generated ${response.data.successful} audio files`);
-      if (response.data.failed > 0) {
-        toast.error(`Failed to generate ${response.data.failed} audio files`);
+      toast.success(`Generated ${job.successful} audio files`);
+      if (job.failed > 0) {
+        toast.error(`Failed to generate ${job.failed} audio files`);
       }
     } catch (error) {
       const errorMessage = {
@@ -556,7 +589,7 @@ function PdfReaderChat({ voices, onVoicesUpdate }) {
                                 <audio
                                   controls
                                   className="w-full"
-                                  src={`http://localhost:5000${result.audio_url}`}
+                                  src={playbackUrl(`http://localhost:5000${result.audio_url}`)}
                                 />
                               </div>
                             ))}
@@ -1,6 +1,8 @@
 import React, { useState, useRef, useEffect } from 'react';
 import axios from 'axios';
 import toast from 'react-hot-toast';
+import { waitForJob } from '../utils/jobs';
+import { playbackUrl } from '../utils/audio';
 
 function SynthesisPanel({ voices, selectedVoice, onVoiceSelect }) {
   const [text, setText] = useState('');
@@ -102,10 +104,13 @@ function SynthesisPanel({ voices, selectedVoice, onVoiceSelect }) {
           translate_to: inputTranslateTo,
           source_lang: inputSourceLang
         });
+        const job = await waitForJob(response.data.job_id, (progress) => {
+          setProgress(30 + Math.round(progress.progress * 70));
+        });
         setProgress(100);
 
-        results = response.data.results;
-        const successCount = response.data.results.filter(r => r.success).length;
+        results = job.results;
+        const successCount = job.successful;
         toast.success(`Generated ${successCount}/${textLines.length} audio files`);
       }
 
@@ -414,7 +419,7 @@ function SynthesisPanel({ voices, selectedVoice, onVoiceSelect }) {
                                 )}
                                 {result.success ? (
                                   <audio
-                                    src={result.audio_url}
+                                    src={playbackUrl(result.audio_url)}
                                     controls
                                     className="w-full"
                                   />
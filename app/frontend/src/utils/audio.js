@@ -0,0 +1,19 @@
+/**
+ * Compressed variant of an /api/audio URL for in-page playback.
+ * Opus where the browser can play it, MP3 otherwise; downloads keep the WAV URL.
+ */
+const playbackFormat = (() => {
+  const probe = typeof document !== 'undefined' ? document.createElement('audio') : null;
+  if (probe && probe.canPlayType('audio/ogg; codecs="opus"')) {
+    return 'opus';
+  }
+  return 'mp3';
+})();
+
+export const playbackUrl = (url) => {
+  if (!url) {
+    return url;
+  }
+  const separator = url.includes('?') ? '&' : '?';
+  return `${url}${separator}format=${playbackFormat}`;
+};
@@ -0,0 +1,99 @@
+import axios from 'axios';
+
+/**
+ * Poll a background synthesis job until it finishes.
+ * onProgress is called with every status snapshot (including partial results).
+ * Resolves with the final job, rejects in the same shape as an axios error.
+ */
+export const waitForJob = async (jobId, onProgress, interval = 1000) => {
+  while (true) {
+    const response = await axios.get(`/api/jobs/${jobId}`);
+    const job = response.data;
+
+    if (onProgress) {
+      onProgress(job);
+    }
+
+    if (job.status === 'completed') {
+      return job;
+    }
+
+    if (job.status === 'failed') {
+      const error = new Error(job.error || 'Job failed');
+      error.response = { data: { error: job.error || 'Job failed' } };
+      throw error;
+    }
+
+    await new Promise(resolve => setTimeout(resolve, interval));
+  }
+};
+
+/**
+ * Follow a background synthesis job over its event stream (Server-Sent Events).
+ * onChunk is called with every chunk result as soon as its audio is ready, onProgress with
+ * { status, completed_chunks, total_chunks, progress }. Resolves with the final job like
+ * waitForJob, and falls back to polling where EventSource is unavailable or the stream
+ * cannot be opened.
+ */
+export const streamJob = (jobId, { onChunk, onProgress } = {}) => {
+  if (typeof EventSource === 'undefined') {
+    return waitForJob(jobId, onProgress);
+  }
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    let opened = false;
+
+    const progress = (data) => {
+      if (onProgress) {
+        onProgress({
+          status: data.status,
+          completed_chunks: data.completed_chunks,
+          total_chunks: data.total_chunks,
+          progress: data.total_chunks ? data.completed_chunks / data.total_chunks : 1
+        });
+      }
+    };
+
+    source.addEventListener('status', (event) => {
+      opened = true;
+      progress(JSON.parse(event.data));
+    });
+
+    source.addEventListener('chunk', (event) => {
+      opened = true;
+      const data = JSON.parse(event.data);
+      const { completed_chunks, total_chunks, ...result } = data;
+      if (onChunk) {
+        onChunk(result);
+      }
+      progress({ status: 'running', completed_chunks, total_chunks });
+    });
+
+    source.addEventListener('done', async (event) => {
+      source.close();
+      const data = JSON.parse(event.data);
+      if (data.status === 'failed') {
+        const error = new Error(data.error || 'Job failed');
+        error.response = { data: { error: data.error || 'Job failed' } };
+        reject(error);
+        return;
+      }
+      try {
+        const response = await axios.get(`/api/jobs/${jobId}`);
+        resolve(response.data);
+      } catch (error) {
+        reject(error);
+      }
+    });
+
+    source.onerror = () => {
+      // EventSource reconnects by itself (resuming after the last chunk) once the stream
+      // was open; if it never opened, the stream is not usable here and polling takes over
+      if (!opened) {
+        source.close();
+        waitForJob(jobId, onProgress).then(resolve, reject);
+      }
+    };
+  });
+};